@@ -0,0 +1,110 @@
+"""
+私有 WebSocket 账户状态流
+
+订阅 Paradex 的 account / positions / fills 私有频道，实时更新余额、持仓和成交,
+替代每 10 秒一次 (以及每个循环后一次) 的 REST fetch_account_summary 轮询。
+REST 只用于启动时的初始快照和低频对账。
+"""
+
+import logging
+import time
+from typing import Optional, Dict, Any, Callable, List
+
+from paradex_py.api.ws_client import ParadexWebsocketChannel
+
+logger = logging.getLogger(__name__)
+
+
+def balance_from_account_data(data: Dict[str, Any]) -> float:
+    """从 account 频道数据中取余额 (与 REST 相同的字段优先级)"""
+    for field in ("account_value", "equity", "free_collateral"):
+        value = data.get(field)
+        if value:
+            return float(value)
+    return 0.0
+
+
+class AccountStream:
+    """账户私有频道订阅器"""
+
+    def __init__(self, ws_client, pnl_tracker, market: str, extra_markets: tuple = ()):
+        """
+        Args:
+            market: 主市场 (get_position_size 的默认市场)
+            extra_markets: 多市场模式下其余需要订阅成交的市场
+        """
+        self.ws_client = ws_client
+        self.pnl_tracker = pnl_tracker
+        self.market = market
+        self.markets = [market] + [m for m in extra_markets if m != market]
+
+        self.balance = 0.0
+        self.positions: Dict[str, Dict[str, float]] = {}
+        self.fill_count = 0
+        self.fill_volume_usd = 0.0
+        self.last_account_update = 0.0
+        self.last_reconcile = 0.0
+        self.fill_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    async def subscribe(self):
+        """订阅 account / positions / fills 频道 (需已认证的 ws_client)"""
+        await self.ws_client.subscribe(ParadexWebsocketChannel.ACCOUNT, callback=self.on_account)
+        await self.ws_client.subscribe(ParadexWebsocketChannel.POSITIONS, callback=self.on_positions)
+        for market in self.markets:
+            await self.ws_client.subscribe(
+                ParadexWebsocketChannel.FILLS,
+                callback=self.on_fills,
+                params={"market": market}
+            )
+
+    async def on_account(self, channel, message):
+        try:
+            data = message.get("params", {}).get("data", {})
+            if not data:
+                return
+            balance = balance_from_account_data(data)
+            if balance > 0:
+                self.balance = balance
+                self.pnl_tracker.update_balance(balance)
+                self.last_account_update = time.time()
+        except Exception as e:
+            logger.error(f"account 频道解析错误: {e}")
+
+    async def on_positions(self, channel, message):
+        try:
+            data = message.get("params", {}).get("data", {})
+            if not data or "market" not in data:
+                return
+            self.positions[data["market"]] = {
+                "size": float(data.get("size", 0)),
+                "entry_price": float(data.get("average_entry_price", 0)),
+                "unrealized_pnl": float(data.get("unrealized_pnl", 0)),
+            }
+        except Exception as e:
+            logger.error(f"positions 频道解析错误: {e}")
+
+    async def on_fills(self, channel, message):
+        try:
+            data = message.get("params", {}).get("data", {})
+            if not data:
+                return
+            self.fill_count += 1
+            self.fill_volume_usd += float(data.get("price", 0)) * float(data.get("size", 0))
+            for listener in self.fill_listeners:
+                listener(data)
+        except Exception as e:
+            logger.error(f"fills 频道解析错误: {e}")
+
+    def get_position_size(self, market: Optional[str] = None) -> float:
+        pos = self.positions.get(market or self.market)
+        return pos["size"] if pos else 0.0
+
+    def reconcile(self, rest_balance: float):
+        """用 REST 余额对账，WS 与 REST 偏差过大时记录警告"""
+        self.last_reconcile = time.time()
+        if rest_balance <= 0:
+            return
+        if self.balance > 0 and abs(rest_balance - self.balance) > 0.01:
+            logger.warning(f"余额对账偏差: WS {self.balance:.4f} / REST {rest_balance:.4f}")
+        self.balance = rest_balance
+        self.pnl_tracker.update_balance(rest_balance)
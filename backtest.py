@@ -0,0 +1,244 @@
+"""
+入场规则向量化回测 (基于 tick_recorder 录制的 BBO 数据)
+
+对整组参数 (价差阈值 × 深度下限 × 方向规则 × speed bump 延迟) 评估:
+1. 入场条件: 价差/深度掩码对全部 tick 一次性向量化计算
+2. 调度: 循环执行期间不再触发，并遵守 30/分、300/时、1000/日 限速
+   (每次触发用 searchsorted 跳到下一个合格 tick，每 24 小时循环次数 ≤ 500，开销可忽略)
+3. 成交: 开仓在触发后 delay 秒按当时盘口成交，平仓在开仓确认后
+   close_delay 秒发出、再经过 delay 秒成交，市价单吃对手价
+输出每组参数的触发次数、每万磨损和用完日限额所需时间。
+
+方向规则除下面的向量化规则外，也可以是 signals.MODELS 中的方向模型 (如 signal):
+按录制顺序逐 tick 算出决策，决策为 0 (不交易) 的 tick 不作为候选。
+
+用法:
+    python backtest.py bbo_ticks.bin --spreads 0.0004,0.0006,0.0008 --depths 0.001,0.006 --delays 0.5
+"""
+
+import argparse
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+
+from signals import MODELS, model_signs
+from tick_recorder import TickReader
+
+MAX_ORDERS_PER_MINUTE = 30
+MAX_ORDERS_PER_HOUR = 300
+MAX_ORDERS_PER_DAY = 1000
+
+# 方向规则: 返回 +1 (LONG) / -1 (SHORT)
+DIRECTION_RULES = {
+    "size": lambda bid_size, ask_size: np.where(bid_size >= ask_size, 1, -1),
+    "inverse": lambda bid_size, ask_size: np.where(bid_size >= ask_size, -1, 1),
+    "long": lambda bid_size, ask_size: np.ones(len(bid_size), dtype=np.int64),
+    "short": lambda bid_size, ask_size: -np.ones(len(bid_size), dtype=np.int64),
+}
+
+
+def load_ticks(path: str) -> Dict[str, np.ndarray]:
+    """读取录制文件，返回各列数组及派生列 (中间价、价差%、较小一侧深度)"""
+    raw = TickReader(path).as_numpy()
+    return prepare_ticks(raw["ts"], raw["bid"], raw["ask"], raw["bid_size"], raw["ask_size"])
+
+
+def prepare_ticks(ts, bid, ask, bid_size, ask_size) -> Dict[str, np.ndarray]:
+    valid = (bid > 0) & (ask > 0)
+    ts, bid, ask = np.asarray(ts[valid]), np.asarray(bid[valid]), np.asarray(ask[valid])
+    bid_size, ask_size = np.asarray(bid_size[valid]), np.asarray(ask_size[valid])
+    mid = (bid + ask) / 2
+    return {
+        "ts": ts, "bid": bid, "ask": ask,
+        "bid_size": bid_size, "ask_size": ask_size,
+        "mid": mid,
+        "spread": (ask - bid) / mid * 100,
+        "depth": np.minimum(bid_size, ask_size),
+    }
+
+
+def schedule_triggers(ts: np.ndarray, candidates: np.ndarray, cycle_sec: float,
+                      per_minute: int = MAX_ORDERS_PER_MINUTE,
+                      per_hour: int = MAX_ORDERS_PER_HOUR,
+                      per_day: int = MAX_ORDERS_PER_DAY) -> np.ndarray:
+    """从合格 tick 中按执行时间和限速挑出实际触发的 tick
+
+    Args:
+        ts: 全部 tick 时间戳
+        candidates: 合格 tick 的下标 (升序)
+        cycle_sec: 一个循环占用的时间
+    Returns:
+        触发 tick 的下标
+    """
+    if len(candidates) == 0:
+        return candidates
+    cand_ts = ts[candidates]
+    # 每个循环下 2 单
+    # 日限额按滚动 24 小时窗口计，录制跨多天时每天都能继续触发
+    limits = ((per_minute // 2, 60.0), (per_hour // 2, 3600.0), (per_day // 2, 86400.0))
+
+    fired: List[float] = []
+    chosen: List[int] = []
+    pos = 0
+    while pos < len(candidates):
+        t = cand_ts[pos]
+        earliest = t
+        n = len(fired)
+        for limit, window in limits:
+            if n >= limit:
+                earliest = max(earliest, fired[n - limit] + window)
+        if earliest > t:
+            pos = int(np.searchsorted(cand_ts, earliest, side="left"))
+            continue
+        chosen.append(pos)
+        fired.append(t)
+        pos = int(np.searchsorted(cand_ts, t + cycle_sec, side="right"))
+    return candidates[np.asarray(chosen, dtype=np.int64)]
+
+
+def simulate(ticks: Dict[str, np.ndarray], max_spread: float, min_depth: float,
+             rule: str = "size", delay: float = 0.5, close_delay: float = 0.0,
+             size: float = 0.001, mask: Optional[np.ndarray] = None,
+             directions: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """评估一组参数
+
+    Args:
+        ticks: prepare_ticks 的结果
+        max_spread: 价差阈值 (%)
+        min_depth: 买一/卖一最小深度
+        rule: 方向规则 (DIRECTION_RULES 的键)
+        delay: 每单从发出到成交的延迟 (speed bump + 网络)
+        close_delay: 开仓确认后到发出平仓的等待
+        size: 每单大小
+        mask: 预先算好的入场掩码 (网格回测时复用)
+        directions: 方向模型在每个 tick 上的决策 (+1 / -1 / 0)，给出时代替 rule
+    """
+    ts = ticks["ts"]
+    if mask is None:
+        mask = (ticks["spread"] <= max_spread) & (ticks["depth"] >= min_depth)
+    if directions is not None:
+        mask = mask & (directions != 0)
+    candidates = np.flatnonzero(mask)
+    cycle_sec = 2 * delay + close_delay
+    triggers = schedule_triggers(ts, candidates, cycle_sec)
+
+    result = {
+        "max_spread": max_spread, "min_depth": min_depth, "rule": rule,
+        "delay": delay, "close_delay": close_delay, "size": size,
+        "candidates": len(candidates), "cycles": len(triggers),
+        "pnl": 0.0, "volume": 0.0, "per_10k": 0.0, "slippage_bps": 0.0,
+        "budget_hours": None,
+    }
+    if len(triggers) == 0:
+        return result
+
+    if directions is not None:
+        signs = directions[triggers]
+    else:
+        signs = DIRECTION_RULES[rule](ticks["bid_size"][triggers], ticks["ask_size"][triggers])
+    t0 = ts[triggers]
+    # 成交时刻的盘口 = 该时刻之前最后一个 tick
+    open_idx = np.clip(np.searchsorted(ts, t0 + delay, side="right") - 1, 0, len(ts) - 1)
+    close_idx = np.clip(np.searchsorted(ts, t0 + cycle_sec, side="right") - 1, 0, len(ts) - 1)
+
+    bid, ask = ticks["bid"], ticks["ask"]
+    long = signs > 0
+    open_px = np.where(long, ask[open_idx], bid[open_idx])
+    close_px = np.where(long, bid[close_idx], ask[close_idx])
+    pnl = np.where(long, close_px - open_px, open_px - close_px) * size
+    volume = (open_px + close_px) * size
+    trigger_mid = ticks["mid"][triggers]
+    slippage = (np.where(long, open_px - trigger_mid, trigger_mid - open_px)
+                + np.where(long, trigger_mid - close_px, close_px - trigger_mid)) * size
+
+    total_pnl = float(pnl.sum())
+    total_volume = float(volume.sum())
+    result.update({
+        "pnl": total_pnl,
+        "volume": total_volume,
+        "per_10k": -total_pnl / total_volume * 10000,
+        "slippage_bps": float(slippage.sum()) / total_volume * 10000,
+    })
+    max_cycles = MAX_ORDERS_PER_DAY // 2
+    duration = ts[-1] - ts[0]
+    if len(triggers) >= max_cycles:
+        result["budget_hours"] = float(t0[max_cycles - 1] - ts[0]) / 3600
+    elif duration > 0:
+        # 按当前触发速率外推
+        result["budget_hours"] = duration * max_cycles / len(triggers) / 3600
+    return result
+
+
+def run_grid(ticks: Dict[str, np.ndarray], spreads: List[float], depths: List[float],
+             rules: List[str], delays: List[float], close_delay: float = 0.0,
+             size: float = 0.001, signal_params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """网格回测: 入场掩码按 价差 × 深度 广播一次算出，按磨损升序返回"""
+    # 方向模型的逐 tick 决策与阈值无关，每个模型只算一次
+    directions = {
+        rule: model_signs(ticks, rule, signal_params) for rule in rules if rule not in DIRECTION_RULES
+    }
+    spread_ok = ticks["spread"][None, :] <= np.asarray(spreads)[:, None]   # (S, N)
+    depth_ok = ticks["depth"][None, :] >= np.asarray(depths)[:, None]      # (D, N)
+
+    results = []
+    for i, max_spread in enumerate(spreads):
+        for j, min_depth in enumerate(depths):
+            mask = spread_ok[i] & depth_ok[j]
+            for rule in rules:
+                for delay in delays:
+                    results.append(simulate(ticks, max_spread, min_depth, rule, delay,
+                                            close_delay, size, mask=mask, directions=directions.get(rule)))
+    results.sort(key=lambda r: (r["cycles"] == 0, r["per_10k"]))
+    return results
+
+
+def format_results(results: List[Dict[str, Any]], limit: int = 20) -> str:
+    lines = [
+        f"{'价差%':>8} {'深度':>7} {'方向':>7} {'延迟':>5} {'平仓等待':>5} {'大小':>6} {'候选':>8} {'循环':>5} "
+        f"{'磨损/万':>8} {'滑点bp':>7} {'盈亏':>9} {'满额(h)':>8}",
+        "-" * 105,
+    ]
+    for r in results[:limit]:
+        budget = f"{r['budget_hours']:.1f}" if r["budget_hours"] is not None else "-"
+        lines.append(
+            f"{r['max_spread']:>8.5f} {r['min_depth']:>7.4f} {r['rule']:>7} {r['delay']:>5.2f} "
+            f"{r['close_delay']:>9.2f} {r['size']:>6.3f} "
+            f"{r['candidates']:>8} {r['cycles']:>5} {r['per_10k']:>8.3f} {r['slippage_bps']:>7.3f} "
+            f"{r['pnl']:>9.4f} {budget:>8}"
+        )
+    return "\n".join(lines)
+
+
+def parse_floats(text: str) -> List[float]:
+    return [float(x) for x in text.split(",") if x]
+
+
+def main():
+    from config import MAX_SPREAD_PERCENT, ORDER_SIZE_BTC, CLOSE_LEG_DELAY_SEC, SIGNAL_PARAMS
+
+    parser = argparse.ArgumentParser(description="入场规则向量化回测")
+    parser.add_argument("path", help="tick_recorder 录制文件")
+    parser.add_argument("--spreads", default=str(MAX_SPREAD_PERCENT), help="价差阈值列表 (%%)")
+    parser.add_argument("--depths", default="0.006", help="最小深度列表 (BTC)")
+    parser.add_argument("--rules", default="size",
+                        help=f"方向规则: {','.join(DIRECTION_RULES)} 或方向模型: {','.join(MODELS)}")
+    parser.add_argument("--delays", default="0.5", help="每单成交延迟列表 (秒)")
+    parser.add_argument("--close-delay", type=float, default=CLOSE_LEG_DELAY_SEC, help="开仓确认后平仓等待 (秒)")
+    parser.add_argument("--size", type=float, default=ORDER_SIZE_BTC, help="每单大小")
+    parser.add_argument("--top", type=int, default=20, help="显示前 N 行")
+    args = parser.parse_args()
+
+    ticks = load_ticks(args.path)
+    duration = (ticks["ts"][-1] - ticks["ts"][0]) / 3600 if len(ticks["ts"]) else 0
+    print(f"📼 {len(ticks['ts'])} 条 tick | {duration:.2f} 小时")
+
+    results = run_grid(
+        ticks, parse_floats(args.spreads), parse_floats(args.depths),
+        [r for r in args.rules.split(",") if r], parse_floats(args.delays),
+        args.close_delay, args.size, SIGNAL_PARAMS,
+    )
+    print(format_results(results, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+BBO 热路径微基准
+
+对比每个 tick 的处理耗时 (不连接交易所，使用 fake_exchange 的合成盘口):
+1. 原做法: json.loads 解码 + parse_bbo 每 tick 新建 dict 快照
+2. 现做法: json_loads (有 orjson 时用 orjson) 解码 + BookTop.update 原地更新
+
+分别给出 "仅回调" (消息已解码，对应 paradex_py 客户端) 和 "解码 + 回调" 两组结果。
+用法: python bench_bbo.py [tick 数]
+"""
+
+import json
+import random
+import sys
+import time
+
+from book_top import BookTop, bbo_data
+from fake_exchange import SyntheticBook
+from local_paradex import json_loads
+
+MARKET = "BTC-USD-PERP"
+
+
+def legacy_parse_bbo(message):
+    """原 scalper.parse_bbo (每 tick 新建 dict)"""
+    params = message.get("params", {})
+    data = params.get("data", {})
+    if not data:
+        return None
+    bid = float(data.get("bid", 0))
+    ask = float(data.get("ask", 0))
+    if bid <= 0 or ask <= 0:
+        return None
+    mid = (bid + ask) / 2
+    seq_no = data.get("seq_no")
+    return {
+        "market": data.get("market") or params.get("channel", "").split(".", 1)[-1],
+        "bid": bid, "ask": ask,
+        "bid_size": float(data.get("bid_size", 0)), "ask_size": float(data.get("ask_size", 0)),
+        "spread": (ask - bid) / mid * 100, "mid_price": mid,
+        "last_update": time.time(),
+        "exchange_ms": float(data.get("last_updated_at") or 0),
+        "seq_no": int(seq_no) if seq_no is not None else None,
+    }
+
+
+def make_frames(count: int) -> list[bytes]:
+    book = SyntheticBook(MARKET, rng=random.Random(7))
+    frames = []
+    for _ in range(count):
+        book.step()
+        frames.append(json.dumps({
+            "jsonrpc": "2.0", "method": "subscription",
+            "params": {"channel": f"bbo.{MARKET}", "data": book.bbo()},
+        }).encode())
+    return frames
+
+
+def run_legacy(messages, decode) -> float:
+    state = {}
+    start = time.perf_counter()
+    for message in messages:
+        if decode is not None:
+            message = decode(message)
+        bbo = legacy_parse_bbo(message)
+        if bbo is not None:
+            state[bbo["market"]] = bbo
+    return time.perf_counter() - start
+
+
+def run_book_top(messages, decode) -> float:
+    books = {MARKET: BookTop(MARKET)}
+    start = time.perf_counter()
+    for message in messages:
+        if decode is not None:
+            message = decode(message)
+        data = bbo_data(message)
+        if data is not None:
+            books[data["market"]].update(data, time.time())
+    return time.perf_counter() - start
+
+
+def report(name: str, legacy: float, current: float, count: int):
+    print(f"  {name:<10} 原 {count / legacy:>10,.0f} ticks/s ({legacy / count * 1e6:5.2f}µs) | "
+          f"现 {count / current:>10,.0f} ticks/s ({current / count * 1e6:5.2f}µs) | x{legacy / current:.2f}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    frames = make_frames(count)
+
+    print("=" * 70)
+    print(f"📏 BBO 处理吞吐 ({count} ticks, 解码器: {json_loads.__module__})")
+    print("=" * 70)
+    # 仅回调: 预先解码 (每轮单独解码，避免 bbo_data 补 market 影响另一组)
+    report("仅回调",
+           run_legacy([json.loads(f) for f in frames], None),
+           run_book_top([json.loads(f) for f in frames], None), count)
+    report("解码+回调", run_legacy(frames, json.loads), run_book_top(frames, json_loads), count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+预签名订单工厂微基准
+
+对比触发路径上两种取单方式的耗时 (不发送任何订单):
+1. 现场构造 Order + Decimal(str(size)) + 签名 (原 place_market_order 的做法)
+2. OrderFactory.take() 取出预签名订单 (补签在计时区间之外)
+
+需要 .env 中配置 L2 密钥: 会按 PARADEX_ENV 连接 API 拉取系统配置并认证账户 (签名需要链 ID)，
+但不发送任何订单。完全离线时用 PARADEX_ENV=LOCAL 并先启动 fake_exchange.py。
+用法: python bench_order_factory.py [次数]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+from config import ORDER_SIZE_BTC, MARKET, PARADEX_ENV, L2_ADDRESS, L2_PRIVATE_KEY
+from paradex_py.common.order import Order, OrderType, OrderSide
+
+from session import ParadexSession
+from order_factory import OrderFactory
+
+
+def inline_order(account, side: str) -> Order:
+    order = Order(
+        market=MARKET,
+        order_type=OrderType.Market,
+        order_side=OrderSide.Buy if side == "BUY" else OrderSide.Sell,
+        size=Decimal(str(ORDER_SIZE_BTC))
+    )
+    order.signature = account.sign_order(order)
+    return order
+
+
+def summarize(name: str, samples: list[float]):
+    samples.sort()
+    p50 = samples[len(samples) // 2]
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"  {name:<12} 平均 {statistics.mean(samples):9.1f}µs | p50 {p50:9.1f}µs | p99 {p99:9.1f}µs")
+    return statistics.mean(samples)
+
+
+async def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    session = ParadexSession(PARADEX_ENV, L2_PRIVATE_KEY, L2_ADDRESS, use_interactive_token=False)
+    await session.connect()
+    account = session.account
+    factory = OrderFactory(account, MARKET, ORDER_SIZE_BTC)
+
+    # 预热签名路径
+    for side in ("BUY", "SELL"):
+        inline_order(account, side)
+    factory.prepare_all()
+
+    inline_samples = []
+    factory_samples = []
+    for i in range(rounds):
+        side = "BUY" if i % 2 == 0 else "SELL"
+
+        start = time.perf_counter()
+        inline_order(account, side)
+        inline_samples.append((time.perf_counter() - start) * 1e6)
+
+        start = time.perf_counter()
+        factory.take(side)
+        factory_samples.append((time.perf_counter() - start) * 1e6)
+        factory.prepare(side)
+
+    print("=" * 70)
+    print(f"📏 触发→可提交 耗时 ({rounds} 次, {MARKET} {ORDER_SIZE_BTC} BTC)")
+    print("=" * 70)
+    inline_avg = summarize("现场签名", inline_samples)
+    factory_avg = summarize("预签名", factory_samples)
+    print("-" * 70)
+    print(f"  每单节省 {inline_avg - factory_avg:.1f}µs (x{inline_avg / max(factory_avg, 1e-9):.0f})")
+    print(f"  命中 {factory.hits} | 未命中 {factory.misses}")
+
+    await session.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""
+买一/卖一快照 (__slots__，原地更新)
+
+原来每个 BBO tick 都由 parse_bbo 新建一个十来个键的 dict 替换 current_bbo,
+在 BBO 推送频率下是纯粹的分配开销。这里每个市场只有一个 BookTop 对象:
+BBO 回调直接从消息的 data 原地写入各字段，触发器、面板和录制都读同一个对象。
+需要保留某一时刻的盘口时 (触发时交给执行器) 用 copy() 复制一份。
+"""
+
+from typing import Optional, Dict, Any
+
+
+class BookTop:
+    """单个市场的买一/卖一快照"""
+
+    __slots__ = ("market", "bid", "ask", "bid_size", "ask_size", "spread", "mid_price",
+                 "last_update", "exchange_ms", "exchange_ts", "seq_no")
+
+    def __init__(self, market: str = ""):
+        self.market = market
+        self.bid = 0.0
+        self.ask = 0.0
+        self.bid_size = 0.0
+        self.ask_size = 0.0
+        self.spread = 100.0
+        self.mid_price = 0.0
+        self.last_update = 0.0     # 本地收到时刻 (time.time())
+        self.exchange_ms = 0.0     # 交易所时间戳 last_updated_at (毫秒，交易所时钟)
+        self.exchange_ts = 0.0     # 换算到本地时钟的交易所时间戳 (秒)，时钟未同步时为 0
+        self.seq_no: Optional[int] = None
+
+    def update(self, data: Dict[str, Any], now: float) -> bool:
+        """用 BBO 频道消息的 data 原地更新; 报价无效时返回 False 且不修改"""
+        bid = float(data["bid"])
+        ask = float(data["ask"])
+        if bid <= 0 or ask <= 0:
+            return False
+        mid = (bid + ask) * 0.5
+        self.bid = bid
+        self.ask = ask
+        self.bid_size = float(data["bid_size"])
+        self.ask_size = float(data["ask_size"])
+        self.spread = (ask - bid) / mid * 100
+        self.mid_price = mid
+        self.last_update = now
+        self.exchange_ms = float(data.get("last_updated_at") or 0)
+        self.exchange_ts = 0.0
+        self.seq_no = data.get("seq_no")
+        return True
+
+    def copy(self) -> "BookTop":
+        other = BookTop.__new__(BookTop)
+        for name in BookTop.__slots__:
+            setattr(other, name, getattr(self, name))
+        return other
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in BookTop.__slots__}
+
+
+def bbo_data(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """取出 BBO 频道消息的 data，并保证带有 market (缺失时从频道名 bbo.<市场> 补上)"""
+    params = message.get("params")
+    if not params:
+        return None
+    data = params.get("data")
+    if not data:
+        return None
+    if "market" not in data:
+        data["market"] = params.get("channel", "").split(".", 1)[-1]
+    return data
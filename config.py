@@ -7,41 +7,142 @@ load_dotenv()
 
 # ==================== API 配置 ====================
 # Paradex 环境
-PARADEX_ENV = "MAINNET"  # MAINNET 或 TESTNET
+PARADEX_ENV = os.getenv("PARADEX_ENV", "MAINNET")  # MAINNET、TESTNET 或 LOCAL (本地模拟交易所)
 
 # L2 认证 - 从 .env 文件读取
 L2_ADDRESS = os.getenv("L2_ADDRESS", "")
 L2_PRIVATE_KEY = os.getenv("L2_PRIVATE_KEY", "")
 
+# 多账户 (python supervisor.py) - 逗号分隔的 "地址:私钥"，留空则只用上面的单账户
+L2_ACCOUNTS = [
+    tuple(item.strip().split(":", 1)) for item in os.getenv("L2_ACCOUNTS", "").split(",") if ":" in item
+]
+
 # Paradex API URLs
 API_BASE_URL = "https://api.prod.paradex.trade"
 WS_URL = "wss://ws.api.prod.paradex.trade/v1"
 
+# 本地模拟交易所 (python fake_exchange.py)
+LOCAL_API_URL = os.getenv("LOCAL_API_URL", "http://127.0.0.1:8880/v1")
+LOCAL_WS_URL = os.getenv("LOCAL_WS_URL", "ws://127.0.0.1:8881/v1")
+
 # ==================== 交易配置 ====================
 MARKET = "BTC-USD-PERP"
 
 # 每单大小 (BTC)
 ORDER_SIZE_BTC = 0.001
+MAX_ORDER_SIZE_BTC = 0.01   # 每单大小上限 (控制命令 size 和重载配置都不能超过)
 
 # 价差阈值 (百分比)
 # 当价差 <= 此值时触发开仓
 MAX_SPREAD_PERCENT = 0.0008  # 0.0008%
 
+# 买一/卖一最小深度 (BTC)，MARKETS 中未设置 min_depth 的市场使用此值
+MIN_DEPTH_BTC = 0.006
+
 # 最大循环次数 (一开一关为一个循环)
 # 每循环下2单，500循环 = 1000单 = Retail 24h 上限
 MAX_CYCLES = 500
 
+# 同时监控的市场 (共用一个 WebSocket 和同一份限速额度，哪个市场先满足条件就在哪个市场开平)
+# 每个市场可单独设置每单大小、价差阈值 (%) 和买一/卖一最小深度 (以该市场基础币计)
+# 只配置 MARKET 一项即为原来的单市场行为
+MARKETS = {
+    MARKET: {"size": ORDER_SIZE_BTC, "max_spread": MAX_SPREAD_PERCENT, "min_depth": MIN_DEPTH_BTC},
+    # "ETH-USD-PERP": {"size": 0.03, "max_spread": 0.0010, "min_depth": 0.2},
+    # "SOL-USD-PERP": {"size": 0.5, "max_spread": 0.0015, "min_depth": 5},
+}
+
+# L2 盘口 (order_book 增量频道，本地按快照 + 增量维护): 开启后入场按每单大小的深度加权往返成本
+# 与价差阈值比较，并要求盘口能完全吃下该单 (此时 min_depth 不再使用); 盘口未同步时退回买一/卖一判断
+ORDER_BOOK_ENABLED = True
+
+# 方向模型 (signals.py)
+#   size:   买一量 ≥ 卖一量做多 (原规则)，每次满足条件都交易
+#   signal: 盘口失衡 + 微价格漂移 + 成交流加权打分，分数不够时不交易
+# 切换到 signal 前先用 python signals.py bbo_ticks.bin 在录制数据上对比磨损
+DIRECTION_MODEL = "size"
+# signal 模型参数 (覆盖 CompositeSignal 默认值)，如 {"min_score": 0.4, "half_life": 0.5}
+SIGNAL_PARAMS = {}
+
 # 循环间隔 (秒)
 # 考虑到 500ms speed bump，实际每单延迟约 1.5s
 CYCLE_INTERVAL_SEC = 1.0
 
+# 下单节奏: 最近一小时下单速度超过把 1000 单均匀摊满 24 小时的 r 倍时，
+# 价差阈值收紧到 1/r，把日额度留给价差更好的时段
+PACING_ENABLED = True
+
+# 平仓腿模式
+#   sequential: 开仓确认后等待 CLOSE_LEG_DELAY_SEC 再平仓 (原行为)
+#   ack:        开仓确认后立即平仓
+#   concurrent: 开平两腿同时发出 (要求当前无持仓，单腿失败自动补发)
+CLOSE_LEG_MODE = "ack"
+CLOSE_LEG_DELAY_SEC = 0.1
+
+# 下单方式
+#   market: 预签名市价单 (原行为)，两腿都吃价差，speed bump 期间滑点没有上限
+#   ioc:    按最新盘口定价的限价 IOC 单，最多比吃完本单的最差价位差 LIMIT_TOLERANCE_BPS;
+#           限价内吃不到的部分立即取消。开仓零成交则放弃本次循环，平仓只平实际成交量,
+#           剩余量放宽容忍度重试 IOC_CLOSE_RETRIES 次，仍未平完则用市价单补齐
+ORDER_MODE = "market"
+LIMIT_TOLERANCE_BPS = 1.0
+IOC_CLOSE_RETRIES = 2
+IOC_SETTLE_TIMEOUT_SEC = 2.0   # 等待 IOC 订单结束的最长时间 (秒)
+
 # ==================== 日志配置 ====================
 LOG_FILE = "scalper.log"
 LOG_LEVEL = "INFO"
 
+# 结构化事件日志 (cycle/order/fill，JSON Lines；留空则只写文本日志)
+EVENT_LOG_FILE = "scalper_events.jsonl"
+
+# 日志按大小轮转: 单个文件上限 (MB) 和保留的旧文件数
+LOG_MAX_MB = 50
+LOG_BACKUP_COUNT = 5
+
+# 成交账本导出 (退出时写入，留空则不导出)
+LEDGER_EXPORT_FILE = "fills_ledger.csv"
+
+# BBO tick 录制文件 (定长二进制，可用 tick_recorder.py 回放；留空则不录制)
+TICK_RECORD_FILE = "bbo_ticks.bin"
+
+# 终端面板: 刷新间隔 (秒)；HEADLESS=True 时不渲染 (stdout 不是终端时也自动关闭)
+PANEL_REFRESH_SEC = 0.5
+HEADLESS = os.getenv("HEADLESS", "").lower() in ("1", "true", "yes")
+
+# 本地 Prometheus 指标端口 (各阶段延迟直方图、限速计数、盈亏)，0 则不启动
+METRICS_PORT = 9108
+
+# 控制通道 (stop/pause/resume/threshold/size/reload/status 命令，见 control.py)
+# Unix socket 路径 (Windows 下忽略，留空则不启动) 和 HTTP 端口 (0 则不启动)
+# HTTP 只接受 POST 且不带 Origin 头，但本机任何进程都能访问，默认关闭
+CONTROL_SOCKET = "scalper.sock"
+CONTROL_PORT = 0
+
 # ==================== 安全配置 ====================
 # 最大连续失败次数 (超过则暂停)
 MAX_CONSECUTIVE_FAILURES = 5
 
-# 紧急停止文件 (存在此文件则停止运行)
+# 紧急停止文件 (存在此文件则停止运行，控制通道之外的兜底，每秒检查一次)
 EMERGENCY_STOP_FILE = "STOP"
+
+# 最低余额 (USDC)，低于此值停止策略
+MIN_BALANCE_USD = 10
+
+# 行情最大年龄 (毫秒，按交易所时间戳扣除时钟偏差计算)，超过则不触发
+MAX_FEED_AGE_MS = 500
+
+# ==================== 账户同步配置 ====================
+# 余额通过私有 WebSocket 频道实时更新，REST 仅用于定期对账
+ACCOUNT_RECONCILE_SEC = 60
+
+# 与交易所时钟同步间隔 (秒)，用于换算行情单向延迟
+CLOCK_SYNC_SEC = 300
+
+# 成交记录分页对账间隔 (秒)，进度保存在 FILLS_STATE_FILE，中断后可续拉
+FILLS_RECONCILE_SEC = 300
+FILLS_STATE_FILE = "fills_state.json"
+
+# 限速/会话状态日志 (重启后恢复 24h 内下单时间、循环数和盈亏基准；留空则不持久化)
+STATE_JOURNAL_FILE = "scalper_state.jsonl"
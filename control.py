@@ -0,0 +1,230 @@
+"""
+本地控制通道 (事件驱动，无轮询)
+
+原来 start() 用 msvcrt 轮询键盘 (Linux 服务器上直接报错)，主循环每轮还要 stat 一次 STOP 文件。
+这里所有控制输入都直接变成事件循环里的回调:
+1. Unix socket (CONTROL_SOCKET，Windows 不支持): 一行一个命令，返回一行结果
+       echo "threshold BTC-USD-PERP 0.0005" | nc -U scalper.sock
+2. HTTP (CONTROL_PORT，默认关闭): 路径即命令，参数用 / 分隔 (同一端口也接受一行一个命令)
+       curl -X POST 127.0.0.1:9109/pause
+       curl -X POST 127.0.0.1:9109/size/BTC-USD-PERP/0.002
+   只接受 POST，带 Origin 头的请求一律拒绝: 本机浏览器里的任意网页都能向 127.0.0.1 发请求,
+   GET 可以直接用 <img>/<script> 触发，跨站 POST 一定带 Origin
+3. 终端按键: POSIX 下 stdin 切到 cbreak 模式，由 loop.add_reader 回调;
+   Windows 下在线程中阻塞读 msvcrt.getwch (不 sleep 轮询)
+4. SIGHUP (POSIX): 重载配置
+5. STOP 文件: 保留作兜底，由独立的低频任务检查，不占用交易循环
+
+命令表由调用方提供 (名称 → 函数)，函数参数为命令后的各个字符串，
+返回结果文本或可 await 的结果。
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import signal
+import sys
+import threading
+from typing import Optional, Dict, Callable, Any
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+# 默认按键 → 命令
+DEFAULT_KEYS = {"q": "stop", "p": "pause", "c": "resume", "r": "reload"}
+
+
+def reload_config():
+    """重新读取 config.py (及 .env)，返回新的 config 模块"""
+    import config
+    return importlib.reload(config)
+
+
+class ControlPlane:
+    """控制命令入口 (socket / HTTP / 按键 / 信号)"""
+
+    def __init__(self, commands: Dict[str, Callable[..., Any]], socket_path: str = "", port: int = 0,
+                 stop_file: str = "", keys: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            commands: 命令名 → 处理函数
+            socket_path: Unix socket 路径，留空则不启动
+            port: HTTP 端口 (仅监听 127.0.0.1)，0 则不启动
+            stop_file: 兜底的紧急停止文件，出现时执行 stop
+            keys: 终端按键 → 命令
+        """
+        self.commands = commands
+        self.socket_path = socket_path
+        self.port = port
+        self.stop_file = stop_file
+        self.keys = DEFAULT_KEYS if keys is None else keys
+        self.servers: list[asyncio.AbstractServer] = []
+        self.tasks: list[asyncio.Task] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stdin_fd: Optional[int] = None
+        self.term_attrs = None
+        self.sighup = False
+
+    async def execute(self, line: str) -> str:
+        """执行一条命令，返回结果文本 (命令抛出的异常都转成 "错误: ..."，submit 提交的命令也不会丢失)"""
+        parts = line.split()
+        if not parts:
+            return ""
+        name, args = parts[0].lower(), parts[1:]
+        if name == "help":
+            return "命令: " + " | ".join(sorted(self.commands))
+        handler = self.commands.get(name)
+        if handler is None:
+            return f"未知命令: {name} (help 查看可用命令)"
+        try:
+            result = handler(*args)
+            if asyncio.iscoroutine(result):
+                result = await result
+        except (TypeError, ValueError, KeyError) as e:
+            # 参数错误
+            logger.warning("控制命令 %s 参数错误: %s", line.strip(), e)
+            return f"错误: {e}"
+        except Exception as e:
+            # 重载配置的语法/导入错误、改单量时重新签名失败等
+            logger.exception("控制命令 %s 执行失败", line.strip())
+            return f"错误: {e}"
+        logger.info("控制命令: %s → %s", line.strip(), result)
+        return str(result)
+
+    def submit(self, line: str):
+        """从回调/其他线程中提交命令 (结果只写日志)"""
+        self.tasks = [t for t in self.tasks if not t.done()]
+        self.tasks.append(self.loop.create_task(self.execute(line)))
+
+    # ==================== 生命周期 ====================
+
+    async def start(self, stdin: bool = True) -> list[str]:
+        """启动各通道，返回已启用通道的说明"""
+        self.loop = asyncio.get_running_loop()
+        enabled = []
+        if self.socket_path and hasattr(asyncio, "start_unix_server"):
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)   # 上次异常退出留下的
+            self.servers.append(await asyncio.start_unix_server(self._handle, self.socket_path))
+            enabled.append(f"unix:{self.socket_path}")
+        if self.port:
+            self.servers.append(await asyncio.start_server(self._handle, "127.0.0.1", self.port))
+            enabled.append(f"http://127.0.0.1:{self.port}/<命令>")
+        if stdin and self._start_keys():
+            enabled.append("按键 " + " ".join(f"{k.upper()}={c}" for k, c in self.keys.items()))
+        if hasattr(signal, "SIGHUP"):
+            try:
+                self.loop.add_signal_handler(signal.SIGHUP, self.submit, "reload")
+                self.sighup = True
+            except (NotImplementedError, RuntimeError):
+                pass
+        if self.stop_file:
+            self.tasks.append(asyncio.create_task(self._watch_stop_file()))
+        return enabled
+
+    async def close(self):
+        if self.stdin_fd is not None:
+            self.loop.remove_reader(self.stdin_fd)
+            if self.term_attrs is not None:
+                import termios
+                termios.tcsetattr(self.stdin_fd, termios.TCSADRAIN, self.term_attrs)
+            self.stdin_fd = None
+        if self.sighup:
+            self.loop.remove_signal_handler(signal.SIGHUP)
+            self.sighup = False
+        for task in self.tasks:
+            task.cancel()
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        self.servers = []
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    # ==================== 通道 ====================
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """一行一个命令; 首行是 HTTP 请求行时按 HTTP 处理"""
+        try:
+            line = (await reader.readline()).decode("utf-8", "replace").strip()
+            words = line.split()
+            if len(words) == 3 and words[2].startswith("HTTP/"):
+                has_origin = False
+                while True:
+                    header = await reader.readline()
+                    if not header or header in (b"\r\n", b"\n"):
+                        break
+                    if header.split(b":", 1)[0].strip().lower() == b"origin":
+                        has_origin = True
+                if words[0] != "POST":
+                    status, text = "405 Method Not Allowed", "只接受 POST"
+                elif has_origin:
+                    logger.warning("拒绝带 Origin 的控制请求: %s", line)
+                    status, text = "403 Forbidden", "拒绝浏览器跨站请求"
+                else:
+                    path = words[1].split("?", 1)[0]
+                    command = " ".join(unquote(p) for p in path.split("/") if p)
+                    status, text = "200 OK", await self.execute(command or "help")
+                body = text.encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n".encode() +
+                    b"Content-Type: text/plain; charset=utf-8\r\n"
+                    b"Content-Length: " + str(len(body) + 1).encode() + b"\r\n"
+                    b"Connection: close\r\n\r\n" + body + b"\n"
+                )
+                await writer.drain()
+                return
+            while line:
+                writer.write((await self.execute(line)).encode("utf-8") + b"\n")
+                await writer.drain()
+                line = (await reader.readline()).decode("utf-8", "replace").strip()
+        except Exception as e:
+            logger.error(f"控制连接处理失败: {e}")
+        finally:
+            writer.close()
+
+    def _start_keys(self) -> bool:
+        if not sys.stdin or not sys.stdin.isatty():
+            return False
+        if sys.platform == "win32":
+            import msvcrt
+
+            def read_keys():
+                # getwch 阻塞到有按键为止
+                while True:
+                    key = msvcrt.getwch()
+                    self.loop.call_soon_threadsafe(self._on_key, key)
+
+            threading.Thread(target=read_keys, name="control-keys", daemon=True).start()
+            return True
+
+        import termios
+        import tty
+        self.stdin_fd = sys.stdin.fileno()
+        self.term_attrs = termios.tcgetattr(self.stdin_fd)
+        # cbreak: 单键即时可读、不回显，Ctrl+C 仍然有效
+        tty.setcbreak(self.stdin_fd)
+        self.loop.add_reader(self.stdin_fd, self._on_stdin)
+        return True
+
+    def _on_stdin(self):
+        data = os.read(self.stdin_fd, 64)
+        if not data:
+            self.loop.remove_reader(self.stdin_fd)
+            return
+        for key in data.decode("utf-8", "ignore"):
+            self._on_key(key)
+
+    def _on_key(self, key: str):
+        command = self.keys.get(key.lower())
+        if command:
+            self.submit(command)
+
+    async def _watch_stop_file(self):
+        """兜底: 每秒检查一次 STOP 文件 (不在交易循环里)"""
+        while True:
+            await asyncio.sleep(1.0)
+            if os.path.exists(self.stop_file):
+                await self.execute("stop")
+                return
@@ -0,0 +1,204 @@
+"""
+限价 IOC 下单 (ORDER_MODE = "ioc") 和按下单方式的执行统计
+
+市价单两腿都直接吃价差，speed bump 期间价格走多远就成交多远。IOC 模式下:
+1. 限价 = 吃完本单数量要触及的最差价位 (L2 盘口有效时，否则取对手价一档)，
+   再让出 LIMIT_TOLERANCE_BPS，按价格步长向有利方向取整 (买单向下、卖单向上)，滑点不超过容忍度
+2. 限价内吃不到的部分由交易所立即取消; 下单响应里订单仍是 NEW，
+   成交数量以 GET /orders/<id> 结束状态的 remaining_size 为准 (超时未结束则主动撤单后再查)
+3. ExecutionStats 按下单方式 (market / ioc) 统计请求数量、成交数量、零成交和部分成交次数，
+   以及成交价相对触发中间价的成本 (来自 fills 频道)，用于比较成交率和成本
+"""
+
+import asyncio
+import logging
+import time
+from decimal import Decimal, ROUND_FLOOR, ROUND_CEILING
+from typing import Optional, Dict, Any, List
+
+from book_top import BookTop
+from order_book import OrderBook
+from metrics import Families, sample
+
+logger = logging.getLogger(__name__)
+
+# 订单结束状态的轮询间隔 (秒)
+SETTLE_POLL_SEC = 0.05
+
+
+def limit_price(side: str, bbo: BookTop, book: Optional[OrderBook], size: float,
+                tolerance_bps: float, tick: Decimal) -> Decimal:
+    """IOC 限价: 参考价 (L2 扫单最差价位或对手价一档) 让出 tolerance_bps 后按步长取整"""
+    ref = book.sweep_price(side, size) if book is not None and book.valid else None
+    if ref is None:
+        ref = bbo.ask if side == "BUY" else bbo.bid
+    if ref <= 0:
+        raise RuntimeError(f"{bbo.market} 无盘口，无法给 IOC 单定价")
+    if side == "BUY":
+        price = Decimal(str(ref * (1 + tolerance_bps / 10000)))
+        return (price / tick).to_integral_value(ROUND_FLOOR) * tick
+    price = Decimal(str(ref * (1 - tolerance_bps / 10000)))
+    return (price / tick).to_integral_value(ROUND_CEILING) * tick
+
+
+def filled_size(order: Dict[str, Any], size: float) -> float:
+    """订单已成交数量 (size - remaining_size)，缺少 remaining_size 时成交数量未知，抛出异常"""
+    remaining = order.get("remaining_size")
+    if remaining is None or remaining == "":
+        raise RuntimeError(f"订单 {order.get('id')} 缺少 remaining_size，成交数量未知")
+    total = Decimal(str(order.get("size") or size))
+    return float(total - Decimal(str(remaining)))
+
+
+async def _poll_closed(gateway, order: Dict[str, Any], timeout_sec: float) -> Dict[str, Any]:
+    deadline = time.perf_counter() + timeout_sec
+    while order.get("status") != "CLOSED" and time.perf_counter() < deadline:
+        await asyncio.sleep(SETTLE_POLL_SEC)
+        order = await gateway.call(gateway.api_client.fetch_order, order["id"])
+    return order
+
+
+async def settle_order(gateway, order: Dict[str, Any], timeout_sec: float) -> Dict[str, Any]:
+    """在网关线程中轮询订单直到 CLOSED (IOC 撮合后立即结束)
+
+    超时仍未结束时主动撤单再查，拿到结束状态才返回; 撤单后仍查不到结束状态则抛出异常,
+    不按 remaining_size 猜测成交 (未结束订单的 remaining_size 之后还可能变化)。
+    """
+    order = await _poll_closed(gateway, order, timeout_sec)
+    if order.get("status") == "CLOSED":
+        return order
+    order_id = order.get("id")
+    logger.warning("IOC 订单 %s 超时未结束 (状态 %s)，撤单后重新查询", order_id, order.get("status"))
+    try:
+        await gateway.call(gateway.api_client.cancel_order, order_id)
+    except Exception as e:
+        # 撤单前已结束时交易所会拒绝撤单，以下面的查询为准
+        logger.warning("撤销 IOC 订单 %s 失败: %s", order_id, e)
+    order = await gateway.call(gateway.api_client.fetch_order, order_id)
+    order = await _poll_closed(gateway, order, timeout_sec)
+    if order.get("status") != "CLOSED":
+        raise RuntimeError(f"IOC 订单 {order_id} 撤单后仍未结束 (状态 {order.get('status')})，成交数量未知")
+    return order
+
+
+class ModeStats:
+    """单个下单方式的累计"""
+
+    __slots__ = ("orders", "requested", "filled", "zero_fills", "partial_fills", "cost", "notional")
+
+    def __init__(self):
+        self.orders = 0
+        self.requested = 0.0
+        self.filled = 0.0
+        self.zero_fills = 0
+        self.partial_fills = 0
+        self.cost = 0.0        # 相对触发中间价的成本 (USD，正数表示成本)
+        self.notional = 0.0
+
+    @property
+    def fill_rate(self) -> float:
+        return self.filled / self.requested if self.requested > 0 else 0.0
+
+    @property
+    def cost_bps(self) -> float:
+        return self.cost / self.notional * 10000 if self.notional > 0 else 0.0
+
+
+class ExecutionStats:
+    """按下单方式统计成交率和成本 (订单 ID → 方式，成交 O(1) 归类)"""
+
+    def __init__(self):
+        self.modes: Dict[str, ModeStats] = {}
+        self.order_index: Dict[str, tuple[ModeStats, float]] = {}   # order_id → (统计, 参考中间价)
+        self.unmatched_fills: Dict[str, List[Dict[str, Any]]] = {}
+        self.close_retries = 0   # 平仓剩余量的 IOC 重试次数
+        self.fallbacks = 0       # 重试后仍有剩余，改用市价补齐的次数
+        self.missed = 0          # 开仓零成交、放弃的循环数
+
+    def mode(self, name: str) -> ModeStats:
+        stats = self.modes.get(name)
+        if stats is None:
+            stats = self.modes[name] = ModeStats()
+        return stats
+
+    def register(self, order_id: Optional[str], mode: str, size: float, ref_mid: float):
+        """登记已提交的订单 (成交推送可能先到，在此补记)"""
+        stats = self.mode(mode)
+        stats.orders += 1
+        stats.requested += size
+        if not order_id:
+            return
+        self.order_index[order_id] = (stats, ref_mid)
+        for fill in self.unmatched_fills.pop(order_id, ()):
+            self._apply(fill, stats, ref_mid)
+
+    def record_result(self, mode: str, size: float, filled: float):
+        """记录 IOC 订单结束时的成交情况"""
+        stats = self.mode(mode)
+        if filled <= 0:
+            stats.zero_fills += 1
+        elif filled < size - 1e-12:
+            stats.partial_fills += 1
+
+    def on_fill(self, fill: Dict[str, Any]):
+        """fills 频道回调"""
+        order_id = fill.get("order_id")
+        entry = self.order_index.get(order_id)
+        if entry is None:
+            if len(self.unmatched_fills) > 1000:
+                # 非本策略订单的成交不会被取走，定期清理
+                self.unmatched_fills.clear()
+            self.unmatched_fills.setdefault(order_id, []).append(fill)
+            return
+        self._apply(fill, *entry)
+
+    def _apply(self, fill: Dict[str, Any], stats: ModeStats, ref_mid: float):
+        price = float(fill.get("price", 0))
+        size = float(fill.get("size", 0))
+        stats.filled += size
+        stats.notional += price * size
+        if str(fill.get("side", "")).upper() == "BUY":
+            stats.cost += (price - ref_mid) * size
+        else:
+            stats.cost += (ref_mid - price) * size
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "orders": s.orders, "requested": s.requested, "filled": s.filled,
+                "fill_rate": s.fill_rate, "zero_fills": s.zero_fills, "partial_fills": s.partial_fills,
+                "cost": s.cost, "cost_bps": s.cost_bps,
+            }
+            for name, s in self.modes.items()
+        }
+
+    def families(self, prefix: str = "scalper", labels: str = "") -> Families:
+        """Prometheus 指标: 按下单方式的请求/成交数量、成本，以及 IOC 重试和放弃计数"""
+        extra = f",{labels}" if labels else ""
+
+        def per_mode(name: str, attr: str, digits: int = 8):
+            return [sample(name, round(getattr(s, attr), digits), f'mode="{mode}"{extra}')
+                    for mode, s in self.modes.items()]
+
+        return {
+            f"{prefix}_exec_orders_total": ("counter", "按下单方式的订单数",
+                                            per_mode(f"{prefix}_exec_orders_total", "orders")),
+            f"{prefix}_exec_requested_size_total": ("counter", "按下单方式的请求数量",
+                                                    per_mode(f"{prefix}_exec_requested_size_total", "requested")),
+            f"{prefix}_exec_filled_size_total": ("counter", "按下单方式的成交数量",
+                                                 per_mode(f"{prefix}_exec_filled_size_total", "filled")),
+            f"{prefix}_exec_zero_fills_total": ("counter", "IOC 零成交订单数",
+                                                per_mode(f"{prefix}_exec_zero_fills_total", "zero_fills")),
+            f"{prefix}_exec_partial_fills_total": ("counter", "IOC 部分成交订单数",
+                                                   per_mode(f"{prefix}_exec_partial_fills_total", "partial_fills")),
+            f"{prefix}_exec_cost_usd_total": ("counter", "成交价相对触发中间价的成本 (USD)",
+                                              per_mode(f"{prefix}_exec_cost_usd_total", "cost", 6)),
+            f"{prefix}_exec_notional_usd_total": ("counter", "按下单方式的成交额 (USD)",
+                                                  per_mode(f"{prefix}_exec_notional_usd_total", "notional", 2)),
+            f"{prefix}_ioc_close_retries_total": ("counter", "平仓剩余量 IOC 重试次数", [
+                sample(f"{prefix}_ioc_close_retries_total", self.close_retries, labels)]),
+            f"{prefix}_ioc_fallbacks_total": ("counter", "平仓剩余量改用市价补齐次数", [
+                sample(f"{prefix}_ioc_fallbacks_total", self.fallbacks, labels)]),
+            f"{prefix}_ioc_missed_cycles_total": ("counter", "开仓零成交放弃的循环数", [
+                sample(f"{prefix}_ioc_missed_cycles_total", self.missed, labels)]),
+        }
@@ -0,0 +1,619 @@
+"""
+本地模拟 Paradex 交易所 (REST + WebSocket)
+
+只实现本项目用到的子集，用于离线端到端测试和延迟基准:
+1. REST: auth (token_usage=interactive)、orders (市价 / 限价 IOC)、orders/<id> (查询 / 撤单)、account、fills (分页)、
+   positions、balance、account/info、account/profile、bbo、system/config、system/time、
+   markets (价格步长)、orderbook (L2 快照，带 seq_no)
+2. WebSocket (JSON-RPC): auth、subscribe，推送 bbo / order_book.<市场>.deltas@15@<间隔> / trades / account / positions / fills 频道
+   (订阅 order_book 增量频道时先推送一条快照)
+3. 合成盘口: 随机游走中间价，价差和深度随机，可配置 tick 频率
+4. 可配置 speed bump (仅 interactive token)、网络延迟和抖动
+5. 可模拟交易所时钟偏差 (所有时间戳和 system/time 一起偏移) 和行情丢包 (seq_no 跳号)
+
+用法:
+    python fake_exchange.py --port 8880 --speed-bump 0.5 --latency 0.02 --jitter 0.01
+然后在 .env 中设置 PARADEX_ENV=LOCAL 运行 scalper.py (密钥可填任意值)。
+同进程测试/基准可用 FakeExchange(...).start_in_thread() 在后台线程启动。
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from typing import Optional, Dict, Any, List
+from urllib.parse import urlsplit, parse_qs
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+
+# 交易所时钟相对本机的偏差 (毫秒)，由 FakeExchange(clock_skew=...) 设置
+CLOCK_SKEW_MS = 0
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000) + CLOCK_SKEW_MS
+
+
+class SyntheticBook:
+    """合成盘口 - 随机游走中间价 + 随机价差/深度"""
+
+    def __init__(self, market: str, mid: float = 100000.0, tick: float = 0.1,
+                 tight_prob: float = 0.3, vol_bps: float = 0.2, levels: int = 10,
+                 rng: Optional[random.Random] = None):
+        """
+        Args:
+            market: 市场
+            mid: 初始中间价
+            tick: 最小价格变动
+            tight_prob: 价差为 1 tick 的概率
+            vol_bps: 每个 tick 中间价波动 (bp)
+            levels: 每边档位数
+        """
+        self.market = market
+        self.mid = mid
+        self.tick = tick
+        self.tight_prob = tight_prob
+        self.vol_bps = vol_bps
+        self.levels = levels
+        self.rng = rng or random.Random()
+        self.bids: List[list[float]] = []
+        self.asks: List[list[float]] = []
+        self.prev_bids: List[list[float]] = []
+        self.prev_asks: List[list[float]] = []
+        self.seq_no = 0
+        self.updated_at = 0
+        self.step()
+
+    def _size(self) -> float:
+        return round(self.rng.lognormvariate(-2.0, 1.0), 4)
+
+    def step(self):
+        """推进一个 tick"""
+        self.mid *= 1 + self.rng.gauss(0, self.vol_bps / 10000)
+        spread_ticks = 1 if self.rng.random() < self.tight_prob else self.rng.randint(2, 20)
+        best_bid = round(round(self.mid / self.tick) * self.tick - (spread_ticks // 2) * self.tick, 8)
+        best_ask = round(best_bid + spread_ticks * self.tick, 8)
+        self.prev_bids, self.prev_asks = self.bids, self.asks
+        self.bids = [[round(best_bid - i * self.tick, 8), self._size()] for i in range(self.levels)]
+        self.asks = [[round(best_ask + i * self.tick, 8), self._size()] for i in range(self.levels)]
+        self.seq_no += 1
+        self.updated_at = now_ms()
+
+    def bbo(self) -> Dict[str, Any]:
+        return {
+            "market": self.market,
+            "bid": str(self.bids[0][0]),
+            "bid_size": str(self.bids[0][1]),
+            "ask": str(self.asks[0][0]),
+            "ask_size": str(self.asks[0][1]),
+            "last_updated_at": self.updated_at,
+            "seq_no": self.seq_no,
+        }
+
+    def _levels(self, side: str, levels: List[list[float]]) -> List[Dict[str, str]]:
+        return [{"side": side, "price": str(price), "size": str(size)} for price, size in levels]
+
+    def book_snapshot(self) -> Dict[str, Any]:
+        """order_book 频道快照 (update_type=s)"""
+        return {
+            "market": self.market, "seq_no": self.seq_no, "last_updated_at": self.updated_at,
+            "update_type": "s", "deletes": [], "updates": [],
+            "inserts": self._levels("BUY", self.bids) + self._levels("SELL", self.asks),
+        }
+
+    def book_delta(self) -> Dict[str, Any]:
+        """order_book 频道增量 (update_type=d)，相对上一个 tick"""
+        delta = {"market": self.market, "seq_no": self.seq_no, "last_updated_at": self.updated_at,
+                 "update_type": "d", "deletes": [], "inserts": [], "updates": []}
+        for side, old, new in (("BUY", self.prev_bids, self.bids), ("SELL", self.prev_asks, self.asks)):
+            before = {price: size for price, size in old}
+            after = {price: size for price, size in new}
+            delta["deletes"] += self._levels(side, [[p, 0] for p in before if p not in after])
+            delta["inserts"] += self._levels(side, [[p, s] for p, s in after.items() if p not in before])
+            delta["updates"] += self._levels(side, [[p, s] for p, s in after.items() if p in before and before[p] != s])
+        return delta
+
+    def rest_book(self) -> Dict[str, Any]:
+        """GET /orderbook/<市场> 格式的快照"""
+        return {
+            "market": self.market, "seq_no": self.seq_no, "last_updated_at": self.updated_at,
+            "bids": [[str(p), str(s)] for p, s in self.bids],
+            "asks": [[str(p), str(s)] for p, s in self.asks],
+        }
+
+    def trade(self, side: str, price: float, size: float) -> Dict[str, Any]:
+        """trades 频道消息 (side 为主动方)"""
+        return {
+            "id": uuid.uuid4().hex, "market": self.market, "side": side,
+            "price": str(price), "size": str(size), "trade_type": "FILL", "created_at": now_ms(),
+        }
+
+    def random_trade(self) -> Dict[str, Any]:
+        """合成一笔吃对手价的公开成交"""
+        side = "BUY" if self.rng.random() < 0.5 else "SELL"
+        price = self.asks[0][0] if side == "BUY" else self.bids[0][0]
+        return self.trade(side, price, self._size())
+
+    def take(self, side: str, size: float, limit: Optional[float] = None) -> List[tuple[float, float]]:
+        """吃单，逐档成交，返回 [(价格, 数量)]; 给定 limit 时只吃限价以内的档位，其余不成交"""
+        levels = self.asks if side == "BUY" else self.bids
+        remaining = size
+        fills = []
+        for price, level_size in levels:
+            if limit is not None and (price > limit if side == "BUY" else price < limit):
+                return fills
+            qty = min(remaining, level_size)
+            if qty > 0:
+                fills.append((price, round(qty, 8)))
+                remaining -= qty
+            if remaining <= 1e-12:
+                break
+        if remaining > 1e-12 and limit is None:
+            # 市价单深度不足的部分按最后一档再偏 1 tick 成交
+            last = levels[-1][0] + (self.tick if side == "BUY" else -self.tick)
+            fills.append((round(last, 8), round(remaining, 8)))
+        return fills
+
+
+class FakeExchange:
+    """本地模拟交易所"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8880,
+                 markets: tuple = ("BTC-USD-PERP",), speed_bump: float = 0.5,
+                 latency: float = 0.0, jitter: float = 0.0, tick_hz: float = 20.0,
+                 initial_balance: float = 1000.0, tight_prob: float = 0.3,
+                 clock_skew: float = 0.0, drop_prob: float = 0.0,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            host: 监听地址
+            port: REST 端口 (WebSocket 使用 port + 1)
+            markets: 市场列表
+            speed_bump: interactive token 下单延迟 (秒)
+            latency: 每个请求/推送的网络延迟 (秒)
+            jitter: 延迟抖动上限 (秒，均匀分布)
+            tick_hz: 盘口更新频率
+            initial_balance: 初始 USDC 余额
+            tight_prob: 价差为 1 tick 的概率
+            clock_skew: 交易所时钟比本机快多少 (秒，可为负)
+            drop_prob: 每条 BBO / 盘口增量推送被丢弃的概率 (用于测试跳号检测和盘口重建)
+            seed: 随机种子
+        """
+        global CLOCK_SKEW_MS
+        CLOCK_SKEW_MS = int(clock_skew * 1000)
+        self.host = host
+        self.port = port
+        self.speed_bump = speed_bump
+        self.latency = latency
+        self.jitter = jitter
+        self.tick_hz = tick_hz
+        self.drop_prob = drop_prob
+        self.rng = random.Random(seed)
+        self.books = {m: SyntheticBook(m, tight_prob=tight_prob, rng=self.rng) for m in markets}
+
+        self.account = "0x" + "0" * 63 + "1"
+        self.cash = initial_balance
+        self.positions: Dict[str, Dict[str, float]] = {}
+        self.fills: List[Dict[str, Any]] = []
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.tokens: Dict[str, bool] = {}   # jwt → interactive
+
+        self.ws_clients: Dict[Any, set] = {}
+        self.http_server = None
+        self.ws_server = None
+        self.tick_task: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def api_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port + 1}/v1"
+
+    # ==================== 生命周期 ====================
+
+    async def start(self):
+        self.http_server = await asyncio.start_server(self._handle_http, self.host, self.port)
+        self.ws_server = await websockets.serve(self._handle_ws, self.host, self.port + 1)
+        self.tick_task = asyncio.create_task(self._tick_loop())
+        logger.info(f"模拟交易所已启动: {self.api_url} | {self.ws_url}")
+
+    async def stop(self):
+        if self.tick_task:
+            self.tick_task.cancel()
+        if self.ws_server:
+            self.ws_server.close()
+            await self.ws_server.wait_closed()
+        if self.http_server:
+            self.http_server.close()
+            await self.http_server.wait_closed()
+
+    def start_in_thread(self):
+        """在后台线程的独立事件循环中运行 (同进程测试用，同步客户端调用不会互相阻塞)"""
+        started = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            self.loop.run_until_complete(self.start())
+            started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, name="fake-exchange", daemon=True)
+        self.thread.start()
+        started.wait()
+
+    def stop_thread(self):
+        if not self.loop:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+    async def _delay(self):
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _tick_loop(self):
+        interval = 1.0 / self.tick_hz
+        while True:
+            await asyncio.sleep(interval)
+            for market, book in self.books.items():
+                book.step()
+                if not self.drop_prob or self.rng.random() >= self.drop_prob:
+                    await self._publish(f"bbo.{market}", book.bbo())
+                if not self.drop_prob or self.rng.random() >= self.drop_prob:
+                    await self._publish_book(market, book.book_delta())
+                if self.rng.random() < 0.5:
+                    await self._publish(f"trades.{market}", book.random_trade())
+
+    # ==================== 账户 ====================
+
+    def _mark_price(self, market: str) -> float:
+        book = self.books[market]
+        return (book.bids[0][0] + book.asks[0][0]) / 2
+
+    def account_summary(self) -> Dict[str, Any]:
+        unrealized = sum(
+            pos["size"] * (self._mark_price(m) - pos["entry_price"])
+            for m, pos in self.positions.items() if pos["size"]
+        )
+        value = self.cash + unrealized
+        return {
+            "account": self.account,
+            "account_value": f"{value:.6f}",
+            "total_collateral": f"{self.cash:.6f}",
+            "free_collateral": f"{value:.6f}",
+            "initial_margin_requirement": "0",
+            "maintenance_margin_requirement": "0",
+            "margin_cushion": f"{value:.6f}",
+            "settlement_asset": "USDC",
+            "updated_at": now_ms(),
+            "status": "ACTIVE",
+            "seq_no": now_ms(),
+        }
+
+    def position_dict(self, market: str) -> Dict[str, Any]:
+        pos = self.positions.get(market, {"size": 0.0, "entry_price": 0.0})
+        unrealized = pos["size"] * (self._mark_price(market) - pos["entry_price"]) if pos["size"] else 0.0
+        return {
+            "market": market,
+            "side": "LONG" if pos["size"] >= 0 else "SHORT",
+            "size": f"{pos['size']:.8f}",
+            "average_entry_price": f"{pos['entry_price']:.8f}",
+            "unrealized_pnl": f"{unrealized:.6f}",
+            "status": "OPEN" if pos["size"] else "CLOSED",
+            "last_updated_at": now_ms(),
+        }
+
+    def _apply_fill(self, market: str, side: str, price: float, size: float) -> float:
+        """更新持仓，返回已实现盈亏"""
+        pos = self.positions.setdefault(market, {"size": 0.0, "entry_price": 0.0})
+        signed = size if side == "BUY" else -size
+        realized = 0.0
+        if pos["size"] == 0 or (pos["size"] > 0) == (signed > 0):
+            total = pos["size"] + signed
+            pos["entry_price"] = (pos["entry_price"] * abs(pos["size"]) + price * size) / abs(total)
+            pos["size"] = total
+        else:
+            closed = min(abs(pos["size"]), size)
+            direction = 1 if pos["size"] > 0 else -1
+            realized = closed * (price - pos["entry_price"]) * direction
+            pos["size"] = round(pos["size"] + signed, 12)
+            if abs(pos["size"]) < 1e-12:
+                pos["size"] = 0.0
+                pos["entry_price"] = 0.0
+            elif (pos["size"] > 0) != (direction > 0):
+                pos["entry_price"] = price
+        self.cash += realized
+        return realized
+
+    # ==================== 下单 ====================
+
+    async def submit_order(self, payload: Dict[str, Any], interactive: bool) -> Dict[str, Any]:
+        market = payload.get("market")
+        side = payload.get("side")
+        if market not in self.books:
+            return {"error": "MARKET_NOT_FOUND", "message": f"unknown market {market}"}
+        size = float(payload.get("size", 0))
+        order_id = uuid.uuid4().hex
+        order = {
+            "id": order_id,
+            "account": self.account,
+            "market": market,
+            "side": side,
+            "type": payload.get("type", "MARKET"),
+            "size": payload.get("size"),
+            "price": payload.get("price", "0"),
+            "remaining_size": payload.get("size"),
+            "client_id": payload.get("client_id", ""),
+            "instruction": payload.get("instruction", "GTC"),
+            "status": "NEW",
+            "created_at": now_ms(),
+        }
+        self.orders[order_id] = order
+
+        if interactive and self.speed_bump > 0:
+            await asyncio.sleep(self.speed_bump)
+
+        book = self.books[market]
+        # 限价单未成交的部分按 IOC 处理，直接取消
+        limit = float(payload["price"]) if order["type"] == "LIMIT" else None
+        filled = 0.0
+        for price, qty in book.take(side, size, limit):
+            filled += qty
+            realized = self._apply_fill(market, side, price, qty)
+            fill = {
+                "id": uuid.uuid4().hex,
+                "order_id": order_id,
+                "client_id": order["client_id"],
+                "market": market,
+                "side": side,
+                "price": str(price),
+                "size": str(qty),
+                "fee": "0",
+                "fee_currency": "USDC",
+                "liquidity": "TAKER",
+                "realized_pnl": f"{realized:.8f}",
+                "created_at": now_ms(),
+            }
+            self.fills.append(fill)
+            await self._publish(f"fills.{market}", fill)
+            await self._publish(f"trades.{market}", book.trade(side, price, qty))
+        order["remaining_size"] = str(round(max(0.0, size - filled), 8))
+        order["status"] = "CLOSED"
+        await self._publish("positions", self.position_dict(market))
+        await self._publish("account", self.account_summary())
+        return dict(order, status="NEW")
+
+    def fetch_fills(self, params: Dict[str, str]) -> Dict[str, Any]:
+        market = params.get("market")
+        start_at = int(params.get("start_at") or 0)
+        end_at = int(params.get("end_at") or 2 ** 62)
+        page_size = int(params.get("page_size") or 100)
+        offset = int(params.get("cursor") or 0)
+        selected = [
+            f for f in reversed(self.fills)
+            if (not market or f["market"] == market) and start_at <= f["created_at"] <= end_at
+        ]
+        page = selected[offset:offset + page_size]
+        nxt = str(offset + page_size) if offset + page_size < len(selected) else None
+        return {"next": nxt, "prev": str(max(offset - page_size, 0)) if offset else None, "results": page}
+
+    # ==================== REST ====================
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                body = b""
+                if int(headers.get("content-length", 0) or 0):
+                    body = await reader.readexactly(int(headers["content-length"]))
+
+                await self._delay()
+                status, payload = await self._route(method, target, headers, body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status < 400 else 'ERROR'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _token(self, headers: Dict[str, str]) -> Optional[str]:
+        auth = headers.get("authorization", "")
+        token = auth[7:] if auth.startswith("Bearer ") else ""
+        return token if token in self.tokens else None
+
+    async def _route(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> tuple[int, Any]:
+        url = urlsplit(target)
+        path = url.path[len("/v1/"):] if url.path.startswith("/v1/") else url.path.lstrip("/")
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        payload = json.loads(body) if body else {}
+
+        if method == "GET" and path == "system/config":
+            return 200, {"starknet_chain_id": "LOCAL", "paraclear_decimals": 8, "markets": list(self.books)}
+        if method == "GET" and path == "system/time":
+            return 200, {"server_time": str(now_ms())}
+        if method == "GET" and path.startswith("bbo/"):
+            market = path[len("bbo/"):]
+            if market not in self.books:
+                return 404, {"error": "MARKET_NOT_FOUND"}
+            return 200, self.books[market].bbo()
+        if method == "GET" and path.startswith("orderbook/"):
+            market = path[len("orderbook/"):]
+            if market not in self.books:
+                return 404, {"error": "MARKET_NOT_FOUND"}
+            return 200, self.books[market].rest_book()
+        if method == "GET" and path == "markets":
+            return 200, {"results": [
+                {"symbol": m, "price_tick_size": str(b.tick), "order_size_increment": "0.0001"}
+                for m, b in self.books.items()
+            ]}
+        if method == "POST" and path.startswith("auth/"):
+            token = "local-" + uuid.uuid4().hex
+            self.tokens[token] = params.get("token_usage") == "interactive"
+            return 200, {"jwt_token": token}
+
+        token = self._token(headers)
+        if token is None:
+            return 401, {"error": "UNAUTHORIZED", "message": "invalid bearer token"}
+
+        if method == "POST" and path == "orders":
+            result = await self.submit_order(payload, self.tokens[token])
+            return (400 if "error" in result else 201), result
+        if method == "GET" and path.startswith("orders/"):
+            order = self.orders.get(path[len("orders/"):])
+            if order is None:
+                return 404, {"error": "ORDER_NOT_FOUND"}
+            return 200, order
+        if method == "DELETE" and path.startswith("orders/"):
+            order = self.orders.get(path[len("orders/"):])
+            if order is None:
+                return 404, {"error": "ORDER_NOT_FOUND"}
+            if order["status"] == "CLOSED":
+                return 400, {"error": "ORDER_IS_CLOSED", "message": "order already closed"}
+            order["status"] = "CLOSED"
+            order["cancel_reason"] = "USER_CANCELED"
+            return 200, {}
+        if method == "GET" and path == "account":
+            return 200, self.account_summary()
+        if method == "GET" and path == "account/info":
+            return 200, {"account": self.account}
+        if method == "GET" and path == "account/profile":
+            return 200, {"fee_tier": "retail" if self.tokens[token] else "default"}
+        if method == "GET" and path == "balance":
+            return 200, {"results": [{"token": "USDC", "size": f"{self.cash:.6f}"}]}
+        if method == "GET" and path == "positions":
+            return 200, {"results": [self.position_dict(m) for m in self.positions]}
+        if method == "GET" and path == "fills":
+            return 200, self.fetch_fills(params)
+        return 404, {"error": "NOT_FOUND", "message": f"{method} {path}"}
+
+    # ==================== WebSocket ====================
+
+    async def _handle_ws(self, ws, path: Optional[str] = None):
+        self.ws_clients[ws] = set()
+        try:
+            async for raw in ws:
+                msg = json.loads(raw)
+                method = msg.get("method")
+                params = msg.get("params", {})
+                if method == "auth":
+                    ok = params.get("bearer") in self.tokens
+                    reply = {"result": {}} if ok else {"error": {"code": 40110, "message": "invalid bearer jwt"}}
+                elif method == "subscribe":
+                    self.ws_clients[ws].add(params.get("channel"))
+                    reply = {"result": {"channel": params.get("channel")}}
+                elif method == "unsubscribe":
+                    self.ws_clients[ws].discard(params.get("channel"))
+                    reply = {"result": {"channel": params.get("channel")}}
+                else:
+                    reply = {"error": {"code": -32601, "message": "method not found"}}
+                await ws.send(json.dumps({"jsonrpc": "2.0", "id": msg.get("id"), **reply}))
+                channel = params.get("channel", "")
+                if method == "subscribe" and channel.startswith("order_book.") and ".deltas@" in channel:
+                    # 增量频道先推送一条完整快照
+                    book = self.books.get(channel.split(".deltas@", 1)[0][len("order_book."):])
+                    if book:
+                        await self._send(ws, json.dumps({
+                            "jsonrpc": "2.0", "method": "subscription",
+                            "params": {"channel": channel, "data": book.book_snapshot()},
+                        }))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.ws_clients.pop(ws, None)
+
+    async def _publish_book(self, market: str, data: Dict[str, Any]):
+        """L2 增量推送到该市场已订阅的各个 order_book.<市场>.deltas@... 频道 (不区分刷新间隔)"""
+        prefix = f"order_book.{market}.deltas@"
+        channels = {c for channels in self.ws_clients.values() for c in channels if c.startswith(prefix)}
+        for channel in channels:
+            await self._publish(channel, data)
+
+    async def _publish(self, channel: str, data: Dict[str, Any]):
+        targets = [ws for ws, channels in self.ws_clients.items() if channel in channels]
+        if not targets:
+            return
+        message = json.dumps({
+            "jsonrpc": "2.0",
+            "method": "subscription",
+            "params": {"channel": channel, "data": data},
+        })
+        if self.latency or self.jitter:
+            asyncio.get_running_loop().call_later(
+                self.latency + self.rng.uniform(0, self.jitter),
+                lambda: [asyncio.ensure_future(self._send(ws, message)) for ws in targets]
+            )
+        else:
+            for ws in targets:
+                await self._send(ws, message)
+
+    async def _send(self, ws, message: str):
+        try:
+            await ws.send(message)
+        except websockets.ConnectionClosed:
+            pass
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="本地模拟 Paradex 交易所")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8880, help="REST 端口，WebSocket 为 port+1")
+    parser.add_argument("--markets", default="BTC-USD-PERP", help="逗号分隔的市场列表")
+    parser.add_argument("--speed-bump", type=float, default=0.5, help="interactive token 下单延迟 (秒)")
+    parser.add_argument("--latency", type=float, default=0.0, help="网络延迟 (秒)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟抖动上限 (秒)")
+    parser.add_argument("--tick-hz", type=float, default=20.0, help="盘口更新频率")
+    parser.add_argument("--tight-prob", type=float, default=0.3, help="价差为 1 tick 的概率")
+    parser.add_argument("--balance", type=float, default=1000.0, help="初始 USDC 余额")
+    parser.add_argument("--clock-skew", type=float, default=0.0, help="交易所时钟偏差 (秒)")
+    parser.add_argument("--drop-prob", type=float, default=0.0, help="BBO / 盘口增量推送丢弃概率")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    exchange = FakeExchange(
+        host=args.host, port=args.port, markets=tuple(args.markets.split(",")),
+        speed_bump=args.speed_bump, latency=args.latency, jitter=args.jitter,
+        tick_hz=args.tick_hz, initial_balance=args.balance,
+        tight_prob=args.tight_prob, clock_skew=args.clock_skew, drop_prob=args.drop_prob,
+        seed=args.seed,
+    )
+    await exchange.start()
+    print(f"🧪 模拟交易所: REST {exchange.api_url} | WS {exchange.ws_url}")
+    try:
+        await asyncio.Future()
+    finally:
+        await exchange.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n⏹️ 已停止")
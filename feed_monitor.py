@@ -0,0 +1,159 @@
+"""
+行情延迟与连续性监控 (基于交易所时间戳)
+
+BBO 的 last_update 是本地收到消息的时刻，面板上原来的 "WS 延迟" 只是距上一条消息过了多久,
+反映不了网络和推送本身的延迟，也发现不了丢消息。这里:
+1. ClockSync: 多次请求 GET /system/time，取往返时间最短的一次，
+   时钟偏差 = 服务器时间 - 本地往返中点 (NTP 思路，误差不超过 RTT/2)
+2. FeedMonitor: 用消息自带的 last_updated_at 扣除时钟偏差换算到本地时钟 (exchange_ts),
+   单向延迟 = 本地收到时刻 - exchange_ts，记入对数直方图;
+   按市场检查 seq_no 是否连续，统计跳号 (丢消息) 次数，序号回退的旧消息直接丢弃
+3. feed_age_ms: 盘口按交易所时间戳算的年龄，触发器据此拒绝过期盘口
+   (时钟未同步时退回本地收到时刻)
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional, Dict, Any
+
+from book_top import BookTop
+from metrics import LogHistogram, Families, sample
+
+logger = logging.getLogger(__name__)
+
+# 序号回退超过该值视为服务端重置 (重连/重新订阅)，而不是乱序旧消息
+SEQ_RESET_GAP = 1000
+
+
+def feed_age_ms(bbo: BookTop, now: Optional[float] = None) -> float:
+    """盘口年龄 (毫秒): 优先按交易所时间戳，没有则按本地收到时刻; 未收到过盘口返回 inf"""
+    ts = bbo.exchange_ts or bbo.last_update
+    if ts <= 0:
+        return float("inf")
+    return ((time.time() if now is None else now) - ts) * 1000
+
+
+class ClockSync:
+    """本地时钟与交易所时钟的偏差估计"""
+
+    def __init__(self, samples: int = 5):
+        """
+        Args:
+            samples: 每次同步请求 system/time 的次数 (取 RTT 最小的一次)
+        """
+        self.samples = samples
+        self.offset_ms = 0.0   # 服务器时钟 - 本地时钟
+        self.rtt_ms = 0.0
+        self.synced_at = 0.0
+
+    @property
+    def synced(self) -> bool:
+        return self.synced_at > 0
+
+    def sync(self, api_client) -> float:
+        """同步请求，返回偏差 (毫秒)，在线程中调用"""
+        best: Optional[tuple[float, float]] = None
+        for _ in range(self.samples):
+            t0 = time.time()
+            result = api_client.fetch_system_time()
+            t1 = time.time()
+            server_ms = float(result["server_time"])
+            rtt_ms = (t1 - t0) * 1000
+            if best is None or rtt_ms < best[0]:
+                best = (rtt_ms, server_ms - (t0 + t1) * 500)
+        self.rtt_ms, self.offset_ms = best
+        self.synced_at = time.time()
+        return self.offset_ms
+
+
+class FeedMonitor:
+    """行情单向延迟、跳号和新鲜度"""
+
+    def __init__(self, clock: Optional[ClockSync] = None):
+        self.clock = clock or ClockSync()
+        self.latency = LogHistogram()
+        self.last_seq: Dict[str, int] = {}
+        self.messages = 0
+        self.gaps = 0        # 跳号次数
+        self.missed = 0      # 跳过的序号总数 (估计丢失的消息数)
+        self.stale = 0       # 序号回退被丢弃的旧消息
+        self.resets = 0      # 序号大幅回退 (服务端重置)
+        self.last_latency_ms = 0.0
+
+    def accept(self, market: str, seq: Optional[int]) -> bool:
+        """检查序号 (在更新盘口之前调用); 返回 False 表示是应丢弃的旧消息"""
+        if seq is not None:
+            last = self.last_seq.get(market)
+            if last is not None:
+                if seq > last + 1:
+                    self.gaps += 1
+                    self.missed += seq - last - 1
+                elif seq <= last:
+                    if last - seq < SEQ_RESET_GAP:
+                        self.stale += 1
+                        return False
+                    self.resets += 1
+            self.last_seq[market] = seq
+        self.messages += 1
+        return True
+
+    def on_update(self, bbo: BookTop):
+        """盘口原地更新后调用: 写入 exchange_ts 并记录单向延迟"""
+        if bbo.exchange_ms and self.clock.synced:
+            exchange_ts = (bbo.exchange_ms - self.clock.offset_ms) / 1000
+            bbo.exchange_ts = exchange_ts
+            self.last_latency_ms = (bbo.last_update - exchange_ts) * 1000
+            # 偏差估计误差可能让个别样本略小于 0，按 0 计
+            self.latency.record(max(0.0, self.last_latency_ms))
+
+    async def sync(self, api_client) -> Optional[float]:
+        """同步时钟，失败返回 None (继续使用上一次的偏差)"""
+        try:
+            return await asyncio.to_thread(self.clock.sync, api_client)
+        except Exception as e:
+            logger.warning(f"时钟同步失败: {e}")
+            return None
+
+    async def run_periodic(self, api_client, interval_sec: float):
+        """定期重新同步 (本地时钟会漂移)"""
+        while True:
+            await asyncio.sleep(interval_sec)
+            offset = await self.sync(api_client)
+            if offset is not None:
+                logger.info(f"时钟偏差 {offset:+.1f}ms (RTT {self.clock.rtt_ms:.1f}ms)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        p50, p99, p999 = self.latency.percentiles((0.5, 0.99, 0.999))
+        return {
+            "messages": self.messages, "gaps": self.gaps, "missed": self.missed,
+            "stale": self.stale, "resets": self.resets,
+            "p50": p50, "p99": p99, "p999": p999, "max": self.latency.max_ms,
+            "offset": self.clock.offset_ms, "rtt": self.clock.rtt_ms, "synced": self.clock.synced,
+        }
+
+    def families(self, prefix: str = "scalper", labels: str = "") -> Families:
+        """Prometheus 指标: 单向延迟 summary、跳号计数、时钟偏差"""
+        name = f"{prefix}_feed_latency_ms"
+        h = self.latency
+        samples = [
+            sample(name, f"{v:.3f}", f'quantile="{q}"' + (f",{labels}" if labels else ""))
+            for q, v in zip(("0.5", "0.99", "0.999"), h.percentiles((0.5, 0.99, 0.999)))
+        ]
+        samples.append(sample(f"{name}_sum", f"{h.total_ms:.3f}", labels))
+        samples.append(sample(f"{name}_count", h.count, labels))
+        return {
+            name: ("summary", "行情单向延迟 (交易所时间戳 → 本地收到，毫秒)", samples),
+            f"{prefix}_feed_messages_total": ("counter", "收到的行情消息数", [
+                sample(f"{prefix}_feed_messages_total", self.messages, labels)]),
+            f"{prefix}_feed_seq_gaps_total": ("counter", "行情序号跳号次数", [
+                sample(f"{prefix}_feed_seq_gaps_total", self.gaps, labels)]),
+            f"{prefix}_feed_missed_total": ("counter", "跳号估计丢失的消息数", [
+                sample(f"{prefix}_feed_missed_total", self.missed, labels)]),
+            f"{prefix}_feed_stale_total": ("counter", "序号回退被丢弃的消息数", [
+                sample(f"{prefix}_feed_stale_total", self.stale, labels)]),
+            f"{prefix}_clock_offset_ms": ("gauge", "交易所时钟 - 本地时钟 (毫秒)", [
+                sample(f"{prefix}_clock_offset_ms", round(self.clock.offset_ms, 3), labels)]),
+            f"{prefix}_clock_rtt_ms": ("gauge", "时钟同步请求往返时间 (毫秒)", [
+                sample(f"{prefix}_clock_rtt_ms", round(self.clock.rtt_ms, 3), labels)]),
+        }
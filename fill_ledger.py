@@ -0,0 +1,239 @@
+"""
+成交账本 - 基于真实成交的逐循环盈亏归因
+
+按订单 ID 把成交归到所属循环，每笔成交 O(1) 更新:
+1. 已实现盈亏 (卖出金额 - 买入金额 - 手续费)
+2. 相对触发时中间价的滑点 (开仓腿 / 平仓腿分别统计)
+3. 每循环磨损 (每万 USD 成交的成本)
+并维护最近 N 个循环的滚动汇总，可导出 CSV 供离线分析。
+"""
+
+import csv
+import time
+from collections import deque
+from typing import Optional, Dict, Any, List
+
+
+class CycleRecord:
+    """单个循环的成交汇总"""
+
+    __slots__ = (
+        "cycle_id", "market", "direction", "trigger_mid", "size", "start_ts",
+        "buy_qty", "buy_notional", "sell_qty", "sell_notional", "fees",
+        "open_slippage", "close_slippage", "fill_count", "closed", "window_seq",
+    )
+
+    def __init__(self, cycle_id: int, direction: str, trigger_mid: float, size: float,
+                 market: str = ""):
+        self.cycle_id = cycle_id
+        self.market = market
+        self.direction = direction
+        self.trigger_mid = trigger_mid
+        self.size = size
+        self.start_ts = time.time()
+        self.buy_qty = 0.0
+        self.buy_notional = 0.0
+        self.sell_qty = 0.0
+        self.sell_notional = 0.0
+        self.fees = 0.0
+        self.open_slippage = 0.0   # USD, 正数表示成本
+        self.close_slippage = 0.0
+        self.fill_count = 0
+        self.closed = False
+        self.window_seq = -1
+
+    @property
+    def volume(self) -> float:
+        return self.buy_notional + self.sell_notional
+
+    @property
+    def realized_pnl(self) -> float:
+        return self.sell_notional - self.buy_notional - self.fees
+
+    @property
+    def wear_per_10k(self) -> float:
+        if self.volume == 0:
+            return 0.0
+        return -self.realized_pnl / self.volume * 10000
+
+    @property
+    def is_flat(self) -> bool:
+        return self.buy_qty > 0 and abs(self.buy_qty - self.sell_qty) < 1e-12
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cycle_id": self.cycle_id,
+            "market": self.market,
+            "direction": self.direction,
+            "start_ts": self.start_ts,
+            "trigger_mid": self.trigger_mid,
+            "size": self.size,
+            "buy_qty": self.buy_qty,
+            "buy_notional": self.buy_notional,
+            "sell_qty": self.sell_qty,
+            "sell_notional": self.sell_notional,
+            "fees": self.fees,
+            "open_slippage": self.open_slippage,
+            "close_slippage": self.close_slippage,
+            "realized_pnl": self.realized_pnl,
+            "wear_per_10k": self.wear_per_10k,
+            "fill_count": self.fill_count,
+        }
+
+
+class FillLedger:
+    """成交账本 (订单 ID → 循环，每笔成交 O(1) 更新)"""
+
+    EXPORT_FIELDS = [
+        "cycle_id", "market", "direction", "start_ts", "trigger_mid", "size",
+        "buy_qty", "buy_notional", "sell_qty", "sell_notional", "fees",
+        "open_slippage", "close_slippage", "realized_pnl", "wear_per_10k", "fill_count",
+    ]
+
+    def __init__(self, window: int = 100):
+        self.cycles: Dict[int, CycleRecord] = {}
+        self.order_index: Dict[str, tuple[int, str]] = {}   # order_id → (cycle_id, leg)
+        self.unmatched_fills: Dict[str, List[Dict[str, Any]]] = {}
+        self.next_cycle_id = 1
+
+        # 全局累计
+        self.total_volume = 0.0
+        self.total_pnl = 0.0
+        self.total_fees = 0.0
+        self.total_slippage = 0.0
+        self.fill_count = 0
+
+        # 滚动窗口 (最近 N 个已平仓循环)
+        self.window = deque(maxlen=window)
+        self.window_pushes = 0
+        self.window_volume = 0.0
+        self.window_pnl = 0.0
+        self.window_slippage = 0.0
+
+    def open_cycle(self, direction: str, trigger_mid: float, size: float, market: str = "") -> int:
+        """开始新循环，返回循环 ID"""
+        cycle_id = self.next_cycle_id
+        self.next_cycle_id += 1
+        self.cycles[cycle_id] = CycleRecord(cycle_id, direction, trigger_mid, size, market)
+        return cycle_id
+
+    def discard_cycle(self, cycle_id: int) -> bool:
+        """丢弃没有任何成交的循环 (IOC 开仓零成交放弃)，有成交的循环保留"""
+        cycle = self.cycles.get(cycle_id)
+        if cycle is None or cycle.fill_count:
+            return False
+        del self.cycles[cycle_id]
+        return True
+
+    def register_order(self, order_id: Optional[str], cycle_id: int, leg: str):
+        """登记订单所属循环 (leg: "open" / "close")
+
+        成交推送可能先于下单响应到达，先到的成交在此补记。
+        """
+        if not order_id:
+            return
+        self.order_index[order_id] = (cycle_id, leg)
+        for fill in self.unmatched_fills.pop(order_id, ()):
+            self._apply(fill, cycle_id, leg)
+
+    def on_fill(self, fill: Dict[str, Any]):
+        """处理一笔成交 (fills 频道或 REST fetch_fills 的单条记录)"""
+        order_id = fill.get("order_id")
+        entry = self.order_index.get(order_id)
+        if entry is None:
+            self.unmatched_fills.setdefault(order_id, []).append(fill)
+            return
+        self._apply(fill, *entry)
+
+    def _apply(self, fill: Dict[str, Any], cycle_id: int, leg: str):
+        cycle = self.cycles.get(cycle_id)
+        if cycle is None:
+            return
+        price = float(fill.get("price", 0))
+        size = float(fill.get("size", 0))
+        fee = float(fill.get("fee", 0) or 0)
+        notional = price * size
+        is_buy = str(fill.get("side", "")).upper() == "BUY"
+
+        was_flat = cycle.closed
+        pnl_before = cycle.realized_pnl if was_flat else 0.0
+        volume_before = cycle.volume if was_flat else 0.0
+        slippage_before = (cycle.open_slippage + cycle.close_slippage) if was_flat else 0.0
+
+        if is_buy:
+            cycle.buy_qty += size
+            cycle.buy_notional += notional
+            slippage = (price - cycle.trigger_mid) * size
+        else:
+            cycle.sell_qty += size
+            cycle.sell_notional += notional
+            slippage = (cycle.trigger_mid - price) * size
+        if leg == "open":
+            cycle.open_slippage += slippage
+        else:
+            cycle.close_slippage += slippage
+        cycle.fees += fee
+        cycle.fill_count += 1
+
+        self.total_volume += notional
+        self.total_fees += fee
+        self.total_slippage += slippage
+        self.fill_count += 1
+
+        # 循环平仓后计入已实现盈亏和滚动窗口; 已平仓循环的迟到成交按差量修正
+        if cycle.is_flat:
+            pnl_delta = cycle.realized_pnl - pnl_before
+            self.total_pnl += pnl_delta
+            if was_flat:
+                if self.window_pushes - cycle.window_seq < self.window.maxlen:
+                    self.window_pnl += pnl_delta
+                    self.window_volume += cycle.volume - volume_before
+                    self.window_slippage += cycle.open_slippage + cycle.close_slippage - slippage_before
+            else:
+                cycle.closed = True
+                self._push_window(cycle)
+
+    def _push_window(self, cycle: CycleRecord):
+        if len(self.window) == self.window.maxlen:
+            old = self.window[0]
+            self.window_volume -= old.volume
+            self.window_pnl -= old.realized_pnl
+            self.window_slippage -= old.open_slippage + old.close_slippage
+        self.window.append(cycle)
+        self.window_pushes += 1
+        cycle.window_seq = self.window_pushes
+        self.window_volume += cycle.volume
+        self.window_pnl += cycle.realized_pnl
+        self.window_slippage += cycle.open_slippage + cycle.close_slippage
+
+    def get_cycle(self, cycle_id: int) -> Optional[CycleRecord]:
+        return self.cycles.get(cycle_id)
+
+    def get_stats(self) -> dict:
+        def per_10k(cost: float, volume: float) -> float:
+            return cost / volume * 10000 if volume > 0 else 0.0
+
+        return {
+            "fills": self.fill_count,
+            "volume": self.total_volume,
+            "pnl": self.total_pnl,
+            "fees": self.total_fees,
+            "slippage": self.total_slippage,
+            "per_10k": per_10k(-self.total_pnl, self.total_volume),
+            "slippage_bps": per_10k(self.total_slippage, self.total_volume),
+            "window_cycles": len(self.window),
+            "window_pnl": self.window_pnl,
+            "window_volume": self.window_volume,
+            "window_per_10k": per_10k(-self.window_pnl, self.window_volume),
+            "window_slippage_bps": per_10k(self.window_slippage, self.window_volume),
+            "unmatched": len(self.unmatched_fills),
+        }
+
+    def export_csv(self, path: str) -> int:
+        """导出所有循环到 CSV，返回导出行数"""
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=self.EXPORT_FIELDS)
+            writer.writeheader()
+            for cycle in self.cycles.values():
+                writer.writerow(cycle.to_dict())
+        return len(self.cycles)
@@ -0,0 +1,168 @@
+"""
+成交记录分页对账
+
+fetch_fills 单次最多返回一页, 一天 1000 单加上部分成交很容易超过一页。
+这里按 cursor 逐页拉取 (异步生成器, 在线程中执行同步请求),
+边拉边累计成交额/手续费/已实现盈亏, 不在内存中保留完整列表。
+
+对账按时间窗口增量进行: 每次运行覆盖 [上次结束时间, 现在],
+进度 (窗口、cursor、累计值) 每页落盘, 中断后可从 cursor 续拉。
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Optional, Dict, Any, List, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+
+async def iter_fill_pages(api_client, market: Optional[str], start_at: int, end_at: int,
+                          cursor: Optional[str] = None,
+                          page_size: int = 100) -> AsyncIterator[tuple[List[Dict[str, Any]], Optional[str]]]:
+    """按 cursor 逐页拉取成交
+
+    Yields:
+        (本页成交列表, 下一页 cursor); cursor 为 None 表示已到最后一页
+    """
+    while True:
+        params = {"start_at": start_at, "end_at": end_at, "page_size": page_size}
+        if market:
+            params["market"] = market
+        if cursor:
+            params["cursor"] = cursor
+        page = await asyncio.to_thread(api_client.fetch_fills, params)
+        results = page.get("results", []) or []
+        cursor = page.get("next") or None
+        yield results, cursor
+        if not cursor or not results:
+            break
+
+
+class FillsReconciler:
+    """成交对账器 (流式分页 + 增量累计 + 进度落盘)"""
+
+    # 窗口边界附近的成交 ID 保留用于去重 (毫秒)
+    BOUNDARY_MS = 1000
+
+    def __init__(self, api_client, market: Optional[str], start_at: int,
+                 state_file: Optional[str] = None, page_size: int = 100):
+        """
+        Args:
+            api_client: paradex_py 的 ParadexApiClient
+            market: 市场，None 表示全部市场
+            start_at: 对账起始时间 (毫秒)
+            state_file: 进度文件，None 则不落盘
+            page_size: 每页条数
+        """
+        self.api_client = api_client
+        self.market = market
+        self.page_size = page_size
+        self.state_file = state_file
+        self.running = False
+
+        self.state: Dict[str, Any] = {
+            "market": market,
+            "start_at": start_at,
+            "window_start": start_at,   # 本轮窗口起点
+            "window_end": None,         # 本轮窗口终点 (进行中才有值)
+            "cursor": None,             # 本轮进行中的 cursor
+            "boundary_ids": [],
+            "boundary_pending": {},     # 本轮窗口末尾的成交 ID → created_at
+            "count": 0,
+            "volume": 0.0,
+            "fees": 0.0,
+            "realized_pnl": 0.0,
+            "pages": 0,
+        }
+
+    def load(self) -> bool:
+        """从进度文件恢复 (市场和起始时间一致才恢复)"""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return False
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except Exception as e:
+            logger.warning(f"读取成交对账进度失败: {e}")
+            return False
+        if saved.get("market") != self.market or saved.get("start_at") != self.state["start_at"]:
+            return False
+        self.state.update(saved)
+        logger.info(f"恢复成交对账进度: {self.state['count']} 笔, cursor={self.state['cursor']}")
+        return True
+
+    def save(self):
+        if not self.state_file:
+            return
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.state_file)
+
+    def _accumulate(self, fill: Dict[str, Any], window_end: int):
+        fill_id = fill.get("id")
+        if fill_id in self.state["boundary_ids"]:
+            return
+        self.state["count"] += 1
+        self.state["volume"] += float(fill.get("price", 0)) * float(fill.get("size", 0))
+        self.state["fees"] += float(fill.get("fee", 0) or 0)
+        self.state["realized_pnl"] += float(fill.get("realized_pnl", 0) or 0)
+        created_at = int(fill.get("created_at", 0) or 0)
+        if fill_id and created_at >= window_end - self.BOUNDARY_MS:
+            self.state["boundary_pending"][fill_id] = created_at
+
+    async def run(self) -> Dict[str, Any]:
+        """拉取上次对账之后的所有成交，返回累计结果"""
+        if self.running:
+            return self.get_stats()
+        self.running = True
+        try:
+            state = self.state
+            if state["window_end"] is None:
+                state["window_end"] = int(time.time() * 1000)
+                state["cursor"] = None
+                state["boundary_pending"] = {}
+            window_end = state["window_end"]
+
+            async for results, cursor in iter_fill_pages(
+                self.api_client, self.market, state["window_start"], window_end,
+                cursor=state["cursor"], page_size=self.page_size
+            ):
+                for fill in results:
+                    self._accumulate(fill, window_end)
+                state["cursor"] = cursor
+                state["pages"] += 1
+                self.save()
+
+            # 本轮完成，下一轮从本轮终点开始
+            state["boundary_ids"] = list(state["boundary_pending"])
+            state["boundary_pending"] = {}
+            state["window_start"] = window_end
+            state["window_end"] = None
+            state["cursor"] = None
+            self.save()
+            return self.get_stats()
+        finally:
+            self.running = False
+
+    async def run_periodic(self, interval_sec: float):
+        """会话期间定期对账"""
+        while True:
+            await asyncio.sleep(interval_sec)
+            try:
+                await self.run()
+            except Exception as e:
+                logger.error(f"定期成交对账失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "count": self.state["count"],
+            "volume": self.state["volume"],
+            "fees": self.state["fees"],
+            "realized_pnl": self.state["realized_pnl"],
+            "pages": self.state["pages"],
+            "synced_to": self.state["window_start"],
+        }
@@ -0,0 +1,188 @@
+"""
+本地模拟交易所客户端 (PARADEX_ENV=LOCAL)
+
+提供与 ParadexSubkey 相同的属性和方法子集 (api_client / ws_client / account),
+通过真实的 HTTP 和 WebSocket 连接 fake_exchange.py，不做 Starknet 签名。
+ParadexSession 在 LOCAL 环境下用它代替 ParadexSubkey。
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+from types import SimpleNamespace
+from typing import Optional, Dict, Any, Callable
+
+import httpx
+import websockets
+
+try:
+    import orjson
+    json_loads = orjson.loads     # 直接解析 bytes/str，比 json.loads 快数倍
+except ImportError:
+    json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+
+class LocalAccount:
+    """模拟账户 (固定公钥，签名为占位值)"""
+
+    def __init__(self, l2_address: str):
+        self.l2_address = l2_address
+        self.l2_public_key = 1
+        self.jwt_token: Optional[str] = None
+
+    def auth_headers(self) -> Dict[str, str]:
+        return {"PARADEX-STARKNET-ACCOUNT": self.l2_address}
+
+    def set_jwt_token(self, jwt_token: str):
+        self.jwt_token = jwt_token
+
+    def sign_order(self, order) -> str:
+        return '["0x0","0x0"]'
+
+
+class LocalApiClient:
+    """模拟 REST 客户端 (同步 httpx，与 paradex_py 一致)"""
+
+    def __init__(self, api_url: str, account: LocalAccount):
+        self.api_url = api_url
+        self.account = account
+        self.client = httpx.Client(timeout=10.0)
+        self.auth_timestamp = 0
+
+    def _check(self, res: httpx.Response) -> Any:
+        data = res.json()
+        if res.status_code >= 400:
+            raise RuntimeError(f"{res.status_code} {data}")
+        return data
+
+    def get(self, api_url: str, path: str, params: Optional[dict] = None) -> Any:
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        return self._check(self.client.get(f"{api_url}/{path}", params=params))
+
+    def post(self, api_url: str, path: str, payload: Optional[dict] = None,
+             params: Optional[dict] = None, headers: Optional[dict] = None) -> Any:
+        return self._check(self.client.post(f"{api_url}/{path}", json=payload, params=params, headers=headers))
+
+    def delete(self, api_url: str, path: str) -> Any:
+        return self._check(self.client.delete(f"{api_url}/{path}"))
+
+    def submit_order(self, order) -> Dict[str, Any]:
+        order.signature = self.account.sign_order(order)
+        return self.post(api_url=self.api_url, path="orders", payload=order.dump_to_dict())
+
+    def fetch_order(self, order_id: str) -> dict:
+        return self.get(self.api_url, f"orders/{order_id}")
+
+    def cancel_order(self, order_id: str) -> None:
+        self.delete(self.api_url, f"orders/{order_id}")
+
+    def fetch_markets(self, params: Optional[dict] = None) -> dict:
+        return self.get(self.api_url, "markets", params)
+
+    def fetch_account_summary(self) -> SimpleNamespace:
+        return SimpleNamespace(**self.get(self.api_url, "account"))
+
+    def fetch_account_info(self) -> dict:
+        return self.get(self.api_url, "account/info")
+
+    def fetch_account_profile(self) -> dict:
+        return self.get(self.api_url, "account/profile")
+
+    def fetch_balances(self) -> dict:
+        return self.get(self.api_url, "balance")
+
+    def fetch_positions(self) -> dict:
+        return self.get(self.api_url, "positions")
+
+    def fetch_fills(self, params: Optional[dict] = None) -> dict:
+        return self.get(self.api_url, "fills", params=params)
+
+    def fetch_bbo(self, market: str) -> dict:
+        return self.get(self.api_url, f"bbo/{market}")
+
+    def fetch_orderbook(self, market: str, params: Optional[dict] = None) -> dict:
+        return self.get(self.api_url, f"orderbook/{market}", params)
+
+    def fetch_system_time(self) -> dict:
+        return self.get(self.api_url, "system/time")
+
+
+class LocalWsClient:
+    """模拟 WebSocket 客户端 (JSON-RPC，回调签名与 paradex_py 相同)"""
+
+    def __init__(self, ws_url: str, account: LocalAccount):
+        self.api_url = ws_url
+        self.account = account
+        self.ws = None
+        self.callbacks: Dict[str, Callable] = {}
+        self.reader_task: Optional[asyncio.Task] = None
+        self._ids = itertools.count(1)
+
+    async def connect(self) -> bool:
+        self.ws = await websockets.connect(self.api_url, max_size=None)
+        if self.account.jwt_token:
+            await self._send("auth", {"bearer": self.account.jwt_token})
+        self.reader_task = asyncio.create_task(self._read_messages())
+        return True
+
+    async def _send(self, method: str, params: dict):
+        await self.ws.send(json.dumps({"jsonrpc": "2.0", "method": method, "params": params, "id": next(self._ids)}))
+
+    async def subscribe(self, channel, callback: Callable, params: Optional[dict] = None):
+        params = dict(params or {})
+        if channel.name == "ORDER_BOOK":
+            # 与 paradex_py 相同: feed_type/refresh_rate 取默认值，price_tick 为空时省略
+            params.setdefault("feed_type", "snapshot")
+            params.setdefault("refresh_rate", "100ms")
+            fmt = "order_book.{market}.{feed_type}@15@{refresh_rate}" + ("@{price_tick}" if params.get("price_tick") else "")
+            channel_name = fmt.format(**params)
+        else:
+            channel_name = channel.value.format(**params)
+        self.callbacks[channel_name] = callback
+        await self._send("subscribe", {"channel": channel_name})
+
+    async def _read_messages(self):
+        try:
+            async for raw in self.ws:
+                message = json_loads(raw)
+                if message.get("method") != "subscription":
+                    continue
+                channel_name = message["params"]["channel"]
+                callback = self.callbacks.get(channel_name)
+                if callback:
+                    await callback(channel_name, message)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def close(self):
+        if self.reader_task:
+            self.reader_task.cancel()
+        if self.ws:
+            await self.ws.close()
+
+
+class LocalParadex:
+    """ParadexSubkey 的本地替身"""
+
+    def __init__(self, api_url: str, ws_url: str, l2_address: str):
+        self.account = LocalAccount(l2_address or "0x1")
+        self.api_client = LocalApiClient(api_url, self.account)
+        self.ws_client = LocalWsClient(ws_url, self.account)
+
+    async def init_account(self):
+        """默认认证 (非 interactive token)，与 ParadexSubkey.init_account 一致"""
+        res = await asyncio.to_thread(
+            self.api_client.post,
+            api_url=self.api_client.api_url,
+            path=f"auth/{hex(self.account.l2_public_key)}",
+            headers=self.account.auth_headers()
+        )
+        self.account.set_jwt_token(res["jwt_token"])
+        self.api_client.client.headers["Authorization"] = f"Bearer {res['jwt_token']}"
+
+    async def close(self):
+        await self.ws_client.close()
+        self.api_client.client.close()
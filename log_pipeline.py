@@ -0,0 +1,114 @@
+"""
+异步日志管道 (队列 + 后台写线程)
+
+原来 scalper.py 的 logger 直接挂同步 FileHandler，每条日志在事件循环里格式化并写盘,
+磁盘抖动会直接拖慢 BBO 回调和下单。这里:
+1. 根 logger 只挂一个 QueueHandler: 调用方只创建 LogRecord 并入队，
+   消息格式化 (msg % args)、异常堆栈和写盘全部在 QueueListener 后台线程完成
+2. 文本日志和结构化事件日志都按大小轮转 (RotatingFileHandler)
+3. 结构化事件 (cycle / order / fill) 用 log_event 记录，写入 JSON Lines 文件，
+   文本日志中显示为 key=value; 级别未开启时直接返回，不构造任何字符串
+
+热路径日志请用 %s 惰性参数 (logger.info("...%s", x))，不要用 f-string。
+"""
+
+import atexit
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional, Dict, Any
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """入队时不格式化 (同进程队列，record 原样交给后台线程)"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _Listener(QueueListener):
+    """可重复调用 stop 的 QueueListener (atexit 和调用方都可能停止它)"""
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+
+class _Fields:
+    """事件字段的惰性 key=value 表示，只在后台线程输出文本日志时才拼接"""
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: Dict[str, Any]):
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return " ".join(f"{k}={v}" for k, v in self.fields.items())
+
+
+class _EventFilter(logging.Filter):
+    """只放行 log_event 产生的记录"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return hasattr(record, "event")
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """结构化事件 → 一行 JSON: {"ts", "level", "event", 字段...}"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {"ts": round(record.created, 6), "level": record.levelname, "event": record.event}
+        data.update(record.fields)
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO, **fields):
+    """记录结构化事件 (写入事件日志，并以 key=value 出现在文本日志)"""
+    if logger.isEnabledFor(level):
+        logger.log(level, "%s %s", event, _Fields(fields), extra={"event": event, "fields": fields})
+
+
+def setup_logging(log_file: str, level: str = "INFO", event_file: Optional[str] = None,
+                  max_bytes: int = 50 * 1024 * 1024, backup_count: int = 5,
+                  console_level: int = logging.WARNING) -> QueueListener:
+    """配置根 logger 走队列，返回已启动的 QueueListener (退出时自动 flush)
+
+    Args:
+        log_file: 文本日志文件
+        level: 根 logger 级别 (低于该级别的调用在入队前就被丢弃)
+        event_file: 结构化事件 JSON Lines 文件，留空则不单独输出
+        max_bytes / backup_count: 单个文件大小上限和保留的轮转文件数
+        console_level: 控制台输出级别
+    """
+    handlers = []
+    text_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                       encoding="utf-8", delay=True)
+    text_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    handlers.append(text_handler)
+
+    if event_file:
+        event_handler = RotatingFileHandler(event_file, maxBytes=max_bytes, backupCount=backup_count,
+                                            encoding="utf-8", delay=True)
+        event_handler.addFilter(_EventFilter())
+        event_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(event_handler)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(console_level)
+    console_handler.setFormatter(logging.Formatter("%(message)s"))
+    handlers.append(console_handler)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+    listener = _Listener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,202 @@
+"""
+分阶段延迟直方图与 Prometheus 指标
+
+每个阶段一个 HDR 风格的对数分桶直方图: 以微秒计整数，每个 2 的幂区间再线性细分
+32 份，相对误差 ≤ 3%，1µs ~ 60s 只需约 700 个计数，记录 O(1)、不保存原始样本。
+
+阶段 (毫秒):
+    trigger    tick 到达 → 执行器被唤醒
+    sign       取预签名订单 (未命中时为现签)
+    queue      交给下单线程 → 线程开始执行
+    open_ack   开仓发出 → 下单响应 (含 speed bump)
+    close_ack  平仓发出 → 下单响应
+    fill       下单发出 → fills 频道收到成交
+    cycle      执行器唤醒 → 平仓确认
+    total      tick 到达 → 平仓确认
+
+MetricsServer 在本地端口以 Prometheus 文本格式 (0.0.4) 暴露这些直方图和计数器。
+"""
+
+import asyncio
+import logging
+from typing import Optional, Dict, Callable, List
+
+# 指标族: 名称 → (类型, 说明, 样本行)
+Families = Dict[str, tuple[str, str, List[str]]]
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("trigger", "sign", "queue", "open_ack", "close_ack", "fill", "cycle", "total")
+
+SUB_BITS = 5
+SUB_BUCKETS = 1 << SUB_BITS
+
+
+class LogHistogram:
+    """HDR 风格对数分桶直方图 (值以毫秒传入，内部按微秒分桶)"""
+
+    __slots__ = ("counts", "count", "total_ms", "min_ms", "max_ms", "max_index")
+
+    def __init__(self, max_ms: float = 60000.0):
+        self.max_index = self._index(int(max_ms * 1000))
+        self.counts = [0] * (self.max_index + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = 0.0
+        self.max_ms = 0.0
+
+    @staticmethod
+    def _index(us: int) -> int:
+        shift = max(0, us.bit_length() - SUB_BITS - 1)
+        return SUB_BUCKETS * shift + (us >> shift)
+
+    @staticmethod
+    def _bounds(index: int) -> tuple[int, int]:
+        """桶对应的微秒区间 [low, high)"""
+        shift = max(0, index // SUB_BUCKETS - 1)
+        low = (index - SUB_BUCKETS * shift) << shift
+        return low, low + (1 << shift)
+
+    def record(self, value_ms: float):
+        if value_ms < 0:
+            return
+        index = min(self._index(int(value_ms * 1000)), self.max_index)
+        self.counts[index] += 1
+        if self.count == 0 or value_ms < self.min_ms:
+            self.min_ms = value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+        self.count += 1
+        self.total_ms += value_ms
+
+    def percentile(self, q: float) -> float:
+        """分位数 (0~1)，返回所在桶的中点 (毫秒)"""
+        if self.count == 0:
+            return 0.0
+        target = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index, c in enumerate(self.counts):
+            if c:
+                seen += c
+                if seen >= target:
+                    low, high = self._bounds(index)
+                    return min((low + high) / 2000, self.max_ms)
+        return self.max_ms
+
+    def percentiles(self, qs: tuple = (0.5, 0.99, 0.999)) -> List[float]:
+        """一次遍历求多个分位数 (qs 升序)"""
+        result = []
+        if self.count == 0:
+            return [0.0] * len(qs)
+        targets = [max(1, int(q * self.count + 0.5)) for q in qs]
+        seen = 0
+        i = 0
+        for index, c in enumerate(self.counts):
+            if not c:
+                continue
+            seen += c
+            while i < len(targets) and seen >= targets[i]:
+                low, high = self._bounds(index)
+                result.append(min((low + high) / 2000, self.max_ms))
+                i += 1
+            if i == len(targets):
+                break
+        return result
+
+    @property
+    def mean(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class StageLatency:
+    """各阶段延迟直方图"""
+
+    def __init__(self, stages: tuple = STAGES):
+        self.histograms: Dict[str, LogHistogram] = {stage: LogHistogram() for stage in stages}
+
+    def record(self, stage: str, value_ms: float):
+        histogram = self.histograms.get(stage)
+        if histogram is not None:
+            histogram.record(value_ms)
+
+    def get(self, stage: str) -> LogHistogram:
+        return self.histograms[stage]
+
+    def summary(self, stage: str) -> Dict[str, float]:
+        h = self.histograms[stage]
+        p50, p99, p999 = h.percentiles((0.5, 0.99, 0.999))
+        return {"count": h.count, "mean": h.mean, "p50": p50, "p99": p99, "p999": p999, "max": h.max_ms}
+
+    def families(self, prefix: str = "scalper", labels: str = "") -> Families:
+        """Prometheus summary 格式 (quantile 标签 + _sum/_count)"""
+        name = f"{prefix}_stage_latency_ms"
+        samples = []
+        for stage, h in self.histograms.items():
+            base = f'stage="{stage}"' + (f",{labels}" if labels else "")
+            for q, v in zip(("0.5", "0.99", "0.999"), h.percentiles((0.5, 0.99, 0.999))):
+                samples.append(f'{name}{{{base},quantile="{q}"}} {v:.3f}')
+            samples.append(f"{name}_sum{{{base}}} {h.total_ms:.3f}")
+            samples.append(f"{name}_count{{{base}}} {h.count}")
+        return {name: ("summary", "各阶段延迟 (毫秒)", samples)}
+
+
+def sample(name: str, value: float, labels: str = "") -> str:
+    """单条样本行"""
+    return f"{name}{{{labels}}} {value}" if labels else f"{name} {value}"
+
+
+def render_prometheus(all_families: List[Families]) -> str:
+    """合并多组指标族 (如多个账户) 并输出文本，同名指标的样本放在同一组"""
+    merged: Families = {}
+    for families in all_families:
+        for name, (kind, help_text, samples) in families.items():
+            merged.setdefault(name, (kind, help_text, []))[2].extend(samples)
+    lines = []
+    for name, (kind, help_text, samples) in merged.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """本地 Prometheus 文本指标端点 (GET 任意路径返回全部指标)"""
+
+    def __init__(self, render: Callable[[], str], host: str = "127.0.0.1", port: int = 9108):
+        """
+        Args:
+            render: 返回 Prometheus 文本的回调 (在事件循环中调用)
+        """
+        self.render = render
+        self.host = host
+        self.port = port
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # 只读请求头，忽略方法和路径
+            while True:
+                line = await reader.readline()
+                if not line or line in (b"\r\n", b"\n"):
+                    break
+            body = self.render().encode("utf-8")
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                b"Connection: close\r\n\r\n" + body
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.error(f"指标请求处理失败: {e}")
+        finally:
+            writer.close()
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
@@ -0,0 +1,222 @@
+"""
+本地 L2 盘口 (order_book 快照 + 增量)
+
+BBO 只有买一/卖一，MIN_DEPTH_BTC 和价差阈值看不到市价单吃穿一档之后的成本。
+这里按 order_book.<市场>.deltas 频道维护完整 L2 盘口:
+1. 每边两个平行的有序数组 (价格键、数量)，价格键升序、最优价在数组末尾
+   (买盘键 = 价格，卖盘键 = -价格)，增删改用 bisect 定位;
+   盘口变化大多发生在最优价附近，即数组尾部，list.insert/del 几乎不用搬移元素
+2. 从最差价一端累计的数量/名义金额前缀和，同样只需从改动位置重算到尾部 (查询时惰性重算);
+   给定数量的预期成交均价 = 一次 bisect，O(log n)
+3. 增量按 seq_no 校验连续性: 跳号后盘口失效，后续增量先缓存，
+   由调用方用 REST 快照 (load_snapshot) 重建后按序补上
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Optional, Dict, Any, Iterable
+
+# 失效期间最多缓存的增量条数
+MAX_PENDING = 1000
+
+
+class BookSide:
+    """盘口的一边 (有序数组 + 前缀和)"""
+
+    __slots__ = ("sign", "keys", "sizes", "cum_size", "cum_notional", "dirty")
+
+    def __init__(self, is_bid: bool):
+        self.sign = 1.0 if is_bid else -1.0
+        self.keys: list[float] = []          # 升序，最优价在末尾
+        self.sizes: list[float] = []
+        self.cum_size = [0.0]                # cum_size[i] = sizes[:i] 之和
+        self.cum_notional = [0.0]            # 同上，数量 × 价格键
+        self.dirty = 0                       # 前缀和从该下标起需要重算
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def clear(self):
+        self.keys.clear()
+        self.sizes.clear()
+        del self.cum_size[1:]
+        del self.cum_notional[1:]
+        self.dirty = 0
+
+    def load(self, levels: Iterable[tuple[float, float]]):
+        """整体替换 (快照)"""
+        sign = self.sign
+        pairs = sorted((price * sign, size) for price, size in levels if size > 0)
+        self.keys = [k for k, _ in pairs]
+        self.sizes = [s for _, s in pairs]
+        self.cum_size = [0.0] * (len(pairs) + 1)
+        self.cum_notional = [0.0] * (len(pairs) + 1)
+        self.dirty = 0
+
+    def set(self, price: float, size: float):
+        """设置某一价位的数量，size <= 0 表示删除该价位"""
+        keys = self.keys
+        key = price * self.sign
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if size > 0:
+                self.sizes[i] = size
+            else:
+                del keys[i]
+                del self.sizes[i]
+                del self.cum_size[i + 1]
+                del self.cum_notional[i + 1]
+        elif size > 0:
+            keys.insert(i, key)
+            self.sizes.insert(i, size)
+            self.cum_size.insert(i + 1, 0.0)
+            self.cum_notional.insert(i + 1, 0.0)
+        else:
+            return
+        if i < self.dirty:
+            self.dirty = i
+
+    def _refresh(self):
+        n = len(self.keys)
+        i = self.dirty
+        if i < n:
+            keys, sizes = self.keys, self.sizes
+            cum_size, cum_notional = self.cum_size, self.cum_notional
+            total, notional = cum_size[i], cum_notional[i]
+            for j in range(i, n):
+                size = sizes[j]
+                total += size
+                notional += size * keys[j]
+                cum_size[j + 1] = total
+                cum_notional[j + 1] = notional
+        self.dirty = n
+
+    def best(self) -> tuple[float, float]:
+        """最优价和数量，空盘口返回 (0, 0)"""
+        if not self.keys:
+            return 0.0, 0.0
+        return self.keys[-1] * self.sign, self.sizes[-1]
+
+    def total(self) -> float:
+        self._refresh()
+        return self.cum_size[-1]
+
+    def depth(self, levels: int) -> float:
+        """最优的 levels 档合计数量"""
+        self._refresh()
+        n = len(self.keys)
+        return self.cum_size[-1] - self.cum_size[max(0, n - levels)]
+
+    def fill_price(self, size: float) -> Optional[float]:
+        """从最优价开始吃 size 的预期成交均价; 深度不足返回 None"""
+        self._refresh()
+        cum_size = self.cum_size
+        total = cum_size[-1]
+        if size <= 0 or size > total:
+            return None
+        # 吃掉下标 j+1 之后的全部档位，并在第 j 档部分成交
+        j = bisect_right(cum_size, total - size) - 1
+        full = total - cum_size[j + 1]
+        notional = self.cum_notional[-1] - self.cum_notional[j + 1] + (size - full) * self.keys[j]
+        return notional * self.sign / size
+
+    def sweep_price(self, size: float) -> Optional[float]:
+        """从最优价开始吃 size 要触及的最差价位; 深度不足返回 None"""
+        self._refresh()
+        cum_size = self.cum_size
+        total = cum_size[-1]
+        if size <= 0 or size > total:
+            return None
+        return self.keys[bisect_right(cum_size, total - size) - 1] * self.sign
+
+
+class OrderBook:
+    """单个市场的 L2 盘口"""
+
+    def __init__(self, market: str = ""):
+        self.market = market
+        self.bids = BookSide(True)
+        self.asks = BookSide(False)
+        self.seq_no: Optional[int] = None
+        self.valid = False          # 收到快照且增量连续
+        self.last_update = 0.0      # 本地收到时刻
+        self.exchange_ms = 0.0      # 交易所时间戳 (毫秒)
+        self.pending: deque = deque(maxlen=MAX_PENDING)   # 失效期间缓存的增量
+        self.updates = 0
+        self.gaps = 0
+        self.resyncs = 0
+
+    def _side(self, side: str) -> BookSide:
+        return self.bids if side == "BUY" else self.asks
+
+    def apply(self, data: Dict[str, Any], now: float) -> bool:
+        """应用 order_book 频道消息 (update_type: s 快照 / d 增量)，返回盘口是否已更新且有效"""
+        seq = data.get("seq_no")
+        seq = int(seq) if seq is not None else None
+        if data.get("update_type") == "s":
+            self.bids.load((float(l["price"]), float(l["size"])) for l in data.get("inserts") or () if l["side"] == "BUY")
+            self.asks.load((float(l["price"]), float(l["size"])) for l in data.get("inserts") or () if l["side"] != "BUY")
+            self.pending.clear()
+            self.valid = True
+        else:
+            if not self.valid:
+                self.pending.append(data)
+                return False
+            if seq is not None and self.seq_no is not None:
+                if seq <= self.seq_no:
+                    return False
+                if seq != self.seq_no + 1:
+                    # 丢了增量，盘口已不可信
+                    self.gaps += 1
+                    self.valid = False
+                    self.pending.append(data)
+                    return False
+            for level in data.get("deletes") or ():
+                self._side(level["side"]).set(float(level["price"]), 0.0)
+            for key in ("inserts", "updates"):
+                for level in data.get(key) or ():
+                    self._side(level["side"]).set(float(level["price"]), float(level["size"]))
+        self.seq_no = seq
+        self.last_update = now
+        self.exchange_ms = float(data.get("last_updated_at") or 0)
+        self.updates += 1
+        return True
+
+    def load_snapshot(self, snapshot: Dict[str, Any], now: float) -> bool:
+        """用 REST 快照 (GET /orderbook/<市场>) 重建，并补上缓存中更新的增量，返回是否恢复有效"""
+        self.bids.load((float(p), float(s)) for p, s in snapshot.get("bids") or ())
+        self.asks.load((float(p), float(s)) for p, s in snapshot.get("asks") or ())
+        self.seq_no = int(snapshot["seq_no"])
+        self.last_update = now
+        self.exchange_ms = float(snapshot.get("last_updated_at") or 0)
+        self.valid = True
+        self.resyncs += 1
+        pending = list(self.pending)
+        self.pending.clear()
+        for data in pending:
+            # 快照之后仍有跳号时 apply 会重新缓存，等下一次重建
+            self.apply(data, now)
+        return self.valid
+
+    def fill_price(self, side: str, size: float) -> Optional[float]:
+        """市价单 side 成交 size 的预期均价 (BUY 吃卖盘，SELL 吃买盘); 深度不足返回 None"""
+        return (self.asks if side == "BUY" else self.bids).fill_price(size)
+
+    def sweep_price(self, side: str, size: float) -> Optional[float]:
+        """side 成交 size 要触及的最差价位 (限价单按此定价可一次成交); 深度不足返回 None"""
+        return (self.asks if side == "BUY" else self.bids).sweep_price(size)
+
+    def round_trip_pct(self, size: float) -> Optional[float]:
+        """按深度加权的开平往返成本 (相对中间价 %): 买入 size 的均价 - 卖出 size 的均价"""
+        buy = self.asks.fill_price(size)
+        sell = self.bids.fill_price(size)
+        if buy is None or sell is None:
+            return None
+        mid = (self.asks.best()[0] + self.bids.best()[0]) * 0.5
+        return (buy - sell) / mid * 100
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "valid": self.valid, "levels": len(self.bids) + len(self.asks),
+            "updates": self.updates, "gaps": self.gaps, "resyncs": self.resyncs,
+        }
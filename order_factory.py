@@ -0,0 +1,127 @@
+"""
+预签名订单工厂
+
+每次下单都要构造 Order、Decimal(str(size)) 转换、Starknet 签名，
+同一市场/数量/方向每天重复上千次。这里为开/平两腿各准备一张已签名的
+市价单，触发时直接取出提交，用掉后在线程中补签下一张。
+
+签名带时间戳，模板超过 TTL 会被后台任务重新签名；取用时若已过期则
+退回到现签 (慢路径，计数可在面板/日志中观察)。
+
+限价 IOC 单 (ORDER_MODE = "ioc") 的价格随盘口变化、是签名内容的一部分，
+不能预签名，由 build_ioc 构造后交给网关线程现签。
+"""
+
+import asyncio
+import logging
+import time
+from decimal import Decimal
+from typing import Dict, Optional
+
+from paradex_py.common.order import Order, OrderType, OrderSide
+
+logger = logging.getLogger(__name__)
+
+
+class OrderFactory:
+    """预签名市价单工厂 (每个方向保留一张已签名订单)"""
+
+    def __init__(self, account, market: str, size: float, ttl_sec: float = 30.0):
+        """
+        Args:
+            account: paradex_py 账户 (提供 sign_order)
+            market: 市场
+            size: 每单大小
+            ttl_sec: 预签名订单有效期 (秒)
+        """
+        self.account = account
+        self.market = market
+        self.ttl_sec = ttl_sec
+
+        # 不变部分只计算一次
+        self.size = Decimal(str(size))
+        self.sides = {"BUY": OrderSide.Buy, "SELL": OrderSide.Sell}
+
+        self.ready: Dict[str, Order] = {}
+        self.ready_at: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.tasks: set[asyncio.Task] = set()   # 进行中的补签任务 (持有引用，完成后移除)
+
+    def build(self, side: str) -> Order:
+        return Order(
+            market=self.market,
+            order_type=OrderType.Market,
+            order_side=self.sides[side],
+            size=self.size,
+        )
+
+    def build_ioc(self, side: str, size: Decimal, price: Decimal) -> Order:
+        """限价 IOC 单 (未签名)"""
+        return Order(
+            market=self.market,
+            order_type=OrderType.Limit,
+            order_side=self.sides[side],
+            size=size,
+            limit_price=price,
+            instruction="IOC",
+        )
+
+    def build_signed(self, side: str) -> Order:
+        order = self.build(side)
+        order.signature = self.account.sign_order(order)
+        return order
+
+    def prepare(self, side: str):
+        """签好一张订单备用 (同步，可在线程中调用)"""
+        order = self.build_signed(side)
+        self.ready[side] = order
+        self.ready_at[side] = time.time()
+
+    def prepare_all(self):
+        for side in self.sides:
+            self.prepare(side)
+
+    def take(self, side: str) -> Order:
+        """取出已签名订单; 没有或已过期则现签"""
+        order = self.ready.pop(side, None)
+        if order is not None and order.size == self.size and time.time() - self.ready_at[side] < self.ttl_sec:
+            self.hits += 1
+            return order
+        self.misses += 1
+        return self.build_signed(side)
+
+    async def resize(self, size: float):
+        """修改每单大小: 丢弃旧大小的预签名订单并重新签名 (重签完成前取用会现签)"""
+        self.size = Decimal(str(size))
+        self.ready.clear()
+        self.ready_at.clear()
+        await asyncio.to_thread(self.prepare_all)
+
+    async def replenish(self, side: str):
+        """在线程中补签 (提交后调用，不占用触发路径)"""
+        try:
+            await asyncio.to_thread(self.prepare, side)
+        except Exception as e:
+            logger.error(f"预签名失败 ({side}): {e}")
+
+    def replenish_soon(self, side: str) -> asyncio.Task:
+        """安排后台补签，不等待 (任务由工厂持有，close 时取消)"""
+        task = asyncio.create_task(self.replenish(side))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def close(self):
+        for task in list(self.tasks):
+            task.cancel()
+
+    async def keep_warm(self):
+        """后台任务: 在过期前重新签名模板"""
+        while True:
+            await asyncio.sleep(self.ttl_sec / 2)
+            now = time.time()
+            for side in self.sides:
+                ready_at: Optional[float] = self.ready_at.get(side)
+                if side not in self.ready or ready_at is None or now - ready_at >= self.ttl_sec / 2:
+                    await self.replenish(side)
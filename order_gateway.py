@@ -0,0 +1,76 @@
+"""
+异步下单网关
+
+paradex_py 的 submit_order 是同步 HTTP 调用, Retail 模式下每单要等 500ms speed bump。
+直接在事件循环里调用会冻结整个 loop, BBO 回调全部堆积。
+这里把同步调用放进专用线程池执行, 调用方 await 即可, 事件循环保持流动。
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class OrderGateway:
+    """异步下单网关 (专用线程执行同步 HTTP 请求)"""
+
+    def __init__(self, api_client, max_workers: int = 2, stages=None):
+        """
+        Args:
+            api_client: paradex_py 的 ParadexApiClient (httpx.Client 线程安全)
+            max_workers: 下单线程数，开平两腿并发时需要 2 个
+            stages: metrics.StageLatency，记录交给线程 → 线程开始执行的排队延迟
+        """
+        self.api_client = api_client
+        self.stages = stages
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="order-gw")
+        self.in_flight = 0
+        self.last_submit_ms = 0.0
+
+    async def submit(self, order) -> Dict[str, Any]:
+        """提交订单，不阻塞事件循环
+
+        Returns:
+            订单响应 (与 api_client.submit_order 相同)
+        """
+        return await self._run(self.api_client.submit_order, order)
+
+    async def submit_signed(self, order) -> Dict[str, Any]:
+        """提交已签名订单 (跳过 submit_order 内部的重新签名)"""
+        return await self._run(self._post_order, order)
+
+    def _post_order(self, order) -> Dict[str, Any]:
+        api_client = self.api_client
+        return api_client.post(api_url=api_client.api_url, path="orders", payload=order.dump_to_dict())
+
+    async def _run(self, func, order) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        start = time.perf_counter()
+        started = []
+
+        def job():
+            started.append(time.perf_counter())
+            return func(order)
+
+        try:
+            return await loop.run_in_executor(self.executor, job)
+        finally:
+            self.in_flight -= 1
+            self.last_submit_ms = (time.perf_counter() - start) * 1000
+            # 在事件循环线程中记录，直方图不需要加锁
+            if started and self.stages is not None:
+                self.stages.record("queue", (started[0] - start) * 1000)
+
+    async def call(self, func, *args) -> Any:
+        """在网关线程中执行任意同步 API 调用"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def close(self):
+        """关闭线程池 (不等待未完成的请求)"""
+        self.executor.shutdown(wait=False)
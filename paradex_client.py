@@ -14,13 +14,13 @@ from decimal import Decimal
 from typing import Optional, Dict, Any
 
 from paradex_py import ParadexSubkey
-from paradex_py.environment import Environment
 from paradex_py.common.order import Order, OrderType, OrderSide
 
 from config import (
     PARADEX_ENV, L2_ADDRESS, L2_PRIVATE_KEY,
     MARKET, ORDER_SIZE_BTC
 )
+from session import ParadexSession
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +29,15 @@ class ParadexClient:
     """Paradex API 客户端 (L2-Only 认证)"""
     
     def __init__(self):
+        self.session: Optional[ParadexSession] = None
         self.paradex: Optional[ParadexSubkey] = None
         self.connected = False
         self.use_interactive = True
-        self.last_auth_time = 0  # 跟踪上次认证时间
+    
+    @property
+    def last_auth_time(self) -> float:
+        """上次认证时间"""
+        return self.session.last_auth_time if self.session else 0
         
     async def connect(self, use_interactive_token: bool = True) -> bool:
         """连接并初始化 Paradex 客户端
@@ -41,29 +46,21 @@ class ParadexClient:
             use_interactive_token: 使用 interactive token 实现免费交易 (有 500ms 延迟)
         """
         try:
-            # 确定环境 - paradex-py 使用字符串: 'prod', 'testnet', 'nightly'
-            env = "prod" if PARADEX_ENV == "MAINNET" else "testnet"
-            
-            logger.info(f"正在连接 Paradex ({env})...")
+            logger.info(f"正在连接 Paradex ({PARADEX_ENV})...")
             logger.info(f"L2 地址: {L2_ADDRESS[:10]}...{L2_ADDRESS[-6:]}")
             
             if use_interactive_token:
                 logger.info("🆓 使用 Interactive Token (免费交易, 500ms 延迟)")
             
-            # 使用 L2-Only 认证 (Subkey)
-            # 注意: 设置 auto_auth=False，我们手动调用带 token_usage 参数的 auth
-            self.paradex = ParadexSubkey(
-                env=env,
-                l2_private_key=L2_PRIVATE_KEY,
-                l2_address=L2_ADDRESS
+            # 认证和 token 后台刷新由共享会话负责
+            self.use_interactive = use_interactive_token
+            self.session = ParadexSession(
+                PARADEX_ENV, L2_PRIVATE_KEY, L2_ADDRESS,
+                use_interactive_token=use_interactive_token
             )
-            
-            # 初始化账户 (这会调用默认的 auth)
-            await self.paradex.init_account()
-            
-            # 如果需要 interactive token，重新认证
-            if use_interactive_token:
-                self._auth_with_interactive_token()
+            await self.session.connect()
+            self.session.start_refresh()
+            self.paradex = self.session.paradex
             
             # 验证连接 - 获取账户信息
             account_info = self.paradex.api_client.fetch_account_info()
@@ -85,39 +82,8 @@ class ParadexClient:
             self.connected = False
             return False
     
-    def _auth_with_interactive_token(self):
-        """使用 interactive token 重新认证 (免费交易)"""
-        import time as time_module
-        from paradex_py.api.models import AuthSchema
-        
-        if not self.paradex or not self.paradex.account:
-            raise RuntimeError("Account not initialized")
-        
-        api_client = self.paradex.api_client
-        account = self.paradex.account
-        
-        # 构建带 token_usage=interactive 参数的认证请求
-        headers = account.auth_headers()
-        
-        # 关键: 添加 token_usage=interactive 查询参数
-        path = f"auth/{hex(account.l2_public_key)}?token_usage=interactive"
-        
-        logger.info(f"🔑 发送 interactive token 认证请求...")
-        res = api_client.post(api_url=api_client.api_url, path=path, headers=headers)
-        
-        # 解析响应
-        data = AuthSchema().load(res, unknown="exclude", partial=True)
-        api_client.auth_timestamp = int(time_module.time())
-        account.set_jwt_token(data.jwt_token)
-        api_client.client.headers.update({"Authorization": f"Bearer {data.jwt_token}"})
-        
-        # 记录认证时间
-        self.last_auth_time = time_module.time()
-        
-        logger.info("✅ Interactive Token 认证成功!")
-    
     def refresh_token_if_needed(self, max_age_seconds: int = 240) -> bool:
-        """检查并刷新 token (每4分钟刷新一次，token 5分钟过期)
+        """检查并刷新 token (兜底用，正常情况下由会话后台任务提前刷新)
         
         Args:
             max_age_seconds: 最大 token 年龄（秒），默认240秒（4分钟）
@@ -125,17 +91,15 @@ class ParadexClient:
         Returns:
             是否进行了刷新
         """
-        import time as time_module
-        
-        if not self.use_interactive:
+        if not self.use_interactive or not self.session:
             return False
         
-        elapsed = time_module.time() - self.last_auth_time
+        elapsed = self.session.token_age()
         
         if elapsed >= max_age_seconds:
             logger.info(f"🔄 Token 已使用 {elapsed:.0f}s，正在刷新...")
             try:
-                self._auth_with_interactive_token()
+                self.session.authenticate()
                 return True
             except Exception as e:
                 logger.error(f"❌ Token 刷新失败: {e}")
@@ -271,6 +235,8 @@ class ParadexClient:
     
     async def close(self):
         """关闭客户端"""
+        if self.session:
+            await self.session.close()
         if self.paradex:
             try:
                 await self.paradex.close()
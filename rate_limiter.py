@@ -0,0 +1,136 @@
+"""
+分桶滑动窗口限速器
+
+Paradex Retail 限额为 30 单/分、300 单/时、1000 单/24h。原实现为每级保存全部下单时间戳
+(日窗口最多 1000 个 float) 并在每次检查时从队首逐个弹出。这里每级改为固定长度的计数环:
+    分钟窗口: 61 个 1 秒桶
+    小时窗口: 61 个 1 分钟桶
+    日窗口:   1441 个 1 分钟桶
+时间前进时只清理过期的桶并从累计值中扣除，检查/记录都是摊还 O(1)，内存固定。
+窗口多覆盖最多一个桶宽 (偏保守，不会超限)。
+
+除了能否下单，还回答:
+1. next_slot: 还要等多久才有下一个额度 (n > 1 时为同时容纳 n 单，一个循环开平两单)
+2. pace_ratio: 最近一小时的下单速度相对于把日额度均匀摊满 24 小时的倍数，
+   触发器据此在超前时收紧价差阈值，把额度留给价差更好的时段
+"""
+
+import time
+from typing import Optional
+
+
+class BucketWindow:
+    """固定长度计数环 (一个滑动窗口)"""
+
+    __slots__ = ("bucket_sec", "size", "counts", "total", "head")
+
+    def __init__(self, window_sec: float, bucket_sec: float):
+        self.bucket_sec = bucket_sec
+        # 多一个桶，保证覆盖完整窗口
+        self.size = int(round(window_sec / bucket_sec)) + 1
+        self.counts = [0] * self.size
+        self.total = 0
+        self.head = 0   # 最新桶的绝对编号
+
+    def advance(self, now: float):
+        """把窗口推进到 now，清理过期桶"""
+        bucket = int(now // self.bucket_sec)
+        elapsed = bucket - self.head
+        if elapsed <= 0:
+            return
+        if elapsed >= self.size:
+            self.counts = [0] * self.size
+            self.total = 0
+        else:
+            for b in range(self.head + 1, bucket + 1):
+                i = b % self.size
+                self.total -= self.counts[i]
+                self.counts[i] = 0
+        self.head = bucket
+
+    def add(self, now: float, count: int = 1):
+        self.advance(now)
+        self.counts[self.head % self.size] += count
+        self.total += count
+
+    def count(self, now: float) -> int:
+        self.advance(now)
+        return self.total
+
+    def wait_below(self, now: float, limit: int) -> float:
+        """计数降到 limit 以下还需等待的秒数 (按最旧的桶依次过期计算)"""
+        total = self.count(now)
+        if total < limit:
+            return 0.0
+        oldest = self.head - self.size + 1
+        for b in range(oldest, self.head + 1):
+            total -= self.counts[b % self.size]
+            if total < limit:
+                # 桶 b 在 (b + size) 个桶宽时刻移出窗口
+                return max(0.0, (b + self.size) * self.bucket_sec - now)
+        return self.size * self.bucket_sec
+
+    def reset(self):
+        self.counts = [0] * self.size
+        self.total = 0
+        self.head = 0
+
+
+class RateLimiter:
+    """三级速率限制器 (分桶滑动窗口)"""
+
+    def __init__(self, per_minute: int, per_hour: int, per_day: int):
+        self.per_minute = per_minute
+        self.per_hour = per_hour
+        self.per_day = per_day
+        self.minute_window = BucketWindow(60, 1)
+        self.hour_window = BucketWindow(3600, 60)
+        self.day_window = BucketWindow(86400, 60)
+        self.levels = (
+            (self.minute_window, per_minute, "分钟"),
+            (self.hour_window, per_hour, "小时"),
+            (self.day_window, per_day, "24h"),
+        )
+
+    def can_place_order(self, now: Optional[float] = None, n: int = 1) -> tuple[bool, float, str]:
+        """
+        Args:
+            n: 需要同时容纳的单数
+        Returns:
+            (能否下单, 需等待秒数, 受限级别)
+        """
+        now = time.time() if now is None else now
+        for window, limit, reason in self.levels:
+            if window.count(now) + n > limit:
+                return False, self.next_slot(now, n), reason
+        return True, 0, ""
+
+    def next_slot(self, now: Optional[float] = None, n: int = 1) -> float:
+        """距离有 n 个可用额度的秒数 (0 表示现在即可)"""
+        now = time.time() if now is None else now
+        return max(window.wait_below(now, limit - n + 1) for window, limit, _ in self.levels)
+
+    def record_order(self, now: Optional[float] = None, count: int = 1):
+        now = time.time() if now is None else now
+        for window, _, _ in self.levels:
+            window.add(now, count)
+
+    def get_counts(self, now: Optional[float] = None) -> tuple[int, int, int]:
+        now = time.time() if now is None else now
+        return (self.minute_window.count(now), self.hour_window.count(now),
+                self.day_window.count(now))
+
+    def pace_ratio(self, now: Optional[float] = None) -> float:
+        """最近一小时下单数 / 日额度均摊到每小时的数量 (>1 表示用得比均匀节奏快)"""
+        now = time.time() if now is None else now
+        return self.hour_window.count(now) / (self.per_day / 24)
+
+    def pace_factor(self, now: Optional[float] = None) -> float:
+        """价差阈值的收紧系数: 节奏正常时为 1，超前 r 倍时为 1/r"""
+        ratio = self.pace_ratio(now)
+        return 1.0 if ratio <= 1.0 else 1.0 / ratio
+
+    def remaining(self, now: Optional[float] = None) -> int:
+        """当前滑动 24 小时窗口内剩余的日额度"""
+        now = time.time() if now is None else now
+        return max(0, self.per_day - self.day_window.count(now))
@@ -3,7 +3,7 @@ Paradex BTC 秒开关脚本 v6 - 双向智能版 (WebSocket 实时推送)
 
 特点:
 1. WebSocket 实时接收 BBO 价格 (~10-50ms 延迟)
-2. 双向开平仓：根据买一/卖一厚度决定方向
+2. 双向开平仓：由方向模型决定方向和是否交易 (默认按买一/卖一厚度，见 signals.py)
 3. 通过账户余额变化计算真实盈亏
 4. 速率限制:每分钟30单, 每小时300单, 每24小时1000单
 5. 延迟监控：实时延迟 + 近5单延迟统计
@@ -50,12 +50,18 @@ if sys.platform == "win32":
     except Exception:
         pass
 from collections import deque
-from typing import Optional, Dict, Any
+from decimal import Decimal
+from typing import Optional, Dict, Any, Callable
 
 from config import (
-    ORDER_SIZE_BTC, MAX_SPREAD_PERCENT, MAX_CYCLES,
-    CYCLE_INTERVAL_SEC, LOG_FILE, LOG_LEVEL,
+    MARKET, MARKETS, ORDER_SIZE_BTC, MAX_ORDER_SIZE_BTC, MAX_SPREAD_PERCENT, MIN_DEPTH_BTC, MAX_CYCLES, DIRECTION_MODEL, SIGNAL_PARAMS,
+    CYCLE_INTERVAL_SEC, CLOSE_LEG_MODE, CLOSE_LEG_DELAY_SEC, LOG_FILE,
+    ORDER_MODE, LIMIT_TOLERANCE_BPS, IOC_CLOSE_RETRIES, IOC_SETTLE_TIMEOUT_SEC, LOG_LEVEL, LEDGER_EXPORT_FILE,
+    EVENT_LOG_FILE, LOG_MAX_MB, LOG_BACKUP_COUNT,
+    TICK_RECORD_FILE,
     MAX_CONSECUTIVE_FAILURES, EMERGENCY_STOP_FILE,
+    MIN_BALANCE_USD, MAX_FEED_AGE_MS, ORDER_BOOK_ENABLED, HEADLESS, PANEL_REFRESH_SEC, ACCOUNT_RECONCILE_SEC, CLOCK_SYNC_SEC, PACING_ENABLED,
+    FILLS_RECONCILE_SEC, FILLS_STATE_FILE, STATE_JOURNAL_FILE, METRICS_PORT, CONTROL_SOCKET, CONTROL_PORT,
     L2_ADDRESS, L2_PRIVATE_KEY, PARADEX_ENV
 )
 
@@ -63,91 +69,80 @@ from paradex_py import ParadexSubkey
 from paradex_py.api.ws_client import ParadexWebsocketChannel
 from paradex_py.common.order import Order, OrderType, OrderSide
 
-# ==================== 日志配置 ====================
-file_handler = logging.FileHandler(LOG_FILE, encoding='utf-8')
-file_handler.setLevel(logging.DEBUG)
-file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+from session import ParadexSession
+from order_gateway import OrderGateway
+from order_factory import OrderFactory
+from rate_limiter import RateLimiter
+from trigger_engine import TriggerEngine, ORDERS_PER_CYCLE
+from account_stream import AccountStream
+from fill_ledger import FillLedger
+from fills_reconciler import FillsReconciler
+from tick_recorder import TickRecorder
+from state_journal import StateJournal
+from metrics import StageLatency, MetricsServer, Families, render_prometheus, sample
+from feed_monitor import FeedMonitor, feed_age_ms
+from book_top import BookTop, bbo_data
+from order_book import OrderBook
+from signals import create_model
+from execution import ExecutionStats, limit_price, filled_size, settle_order
+from log_pipeline import setup_logging, log_event
+from control import ControlPlane, reload_config
 
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.WARNING)
-console_handler.setFormatter(logging.Formatter('%(message)s'))
+# ==================== 日志配置 ====================
+# 所有模块的日志经队列交给后台线程格式化和写盘，事件循环只负责入队
+setup_logging(LOG_FILE, LOG_LEVEL, EVENT_LOG_FILE, max_bytes=LOG_MAX_MB * 1024 * 1024,
+              backup_count=LOG_BACKUP_COUNT)
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
 
 logging.getLogger('websockets').setLevel(logging.WARNING)
 logging.getLogger('paradex_py').setLevel(logging.WARNING)
+logging.getLogger('httpx').setLevel(logging.WARNING)
 
 
 # ==================== 配置 ====================
-MARKET = "BTC-USD-PERP"
 MAX_ORDERS_PER_MINUTE = 30
 MAX_ORDERS_PER_HOUR = 300
 MAX_ORDERS_PER_DAY = 1000
-MIN_DEPTH_BTC = 0.006
-
+BOOK_RESYNC_INTERVAL_SEC = 1.0   # L2 盘口失效后两次 REST 重建的最小间隔
+BOOK_REFRESH_RATE = "100ms"      # L2 增量推送间隔 (50ms / 100ms)
+POSITION_SETTLE_SEC = 1.0        # 并发模式补发前等待持仓推送跟上的最长时间
 
-class RateLimiter:
-    """三级速率限制器"""
-    def __init__(self, per_minute: int, per_hour: int, per_day: int):
-        self.per_minute = per_minute
-        self.per_hour = per_hour
-        self.per_day = per_day
-        self.minute_orders = deque()
-        self.hour_orders = deque()
-        self.day_orders = deque()
-    
-    def can_place_order(self) -> tuple[bool, float, str]:
-        now = time.time()
-        while self.minute_orders and now - self.minute_orders[0] > 60:
-            self.minute_orders.popleft()
-        while self.hour_orders and now - self.hour_orders[0] > 3600:
-            self.hour_orders.popleft()
-        while self.day_orders and now - self.day_orders[0] > 86400:
-            self.day_orders.popleft()
-        
-        if len(self.minute_orders) >= self.per_minute:
-            return False, 60 - (now - self.minute_orders[0]), "分钟"
-        if len(self.hour_orders) >= self.per_hour:
-            return False, 3600 - (now - self.hour_orders[0]), "小时"
-        if len(self.day_orders) >= self.per_day:
-            return False, 86400 - (now - self.day_orders[0]), "24h"
-        return True, 0, ""
-    
-    def record_order(self):
-        now = time.time()
-        self.minute_orders.append(now)
-        self.hour_orders.append(now)
-        self.day_orders.append(now)
-    
-    def get_counts(self) -> tuple[int, int, int]:
-        return len(self.minute_orders), len(self.hour_orders), len(self.day_orders)
+# 面板显示的延迟阶段
+PANEL_STAGES = (("sign", "签名"), ("open_ack", "开仓"), ("close_ack", "平仓"), ("fill", "成交"), ("total", "tick→平仓"))
 
 
 class LatencyTracker:
     """延迟追踪器"""
     def __init__(self, max_records: int = 5):
         self.recent_latencies = deque(maxlen=max_records)
+        self.recent_exposures = deque(maxlen=100)
         self.current_ws_latency = 0.0
     
     def record_cycle_latency(self, latency_ms: float):
         self.recent_latencies.append(latency_ms)
     
+    def record_exposure(self, exposure_ms: float):
+        """记录持仓暴露窗口 (开仓发出 → 平仓确认)"""
+        self.recent_exposures.append(exposure_ms)
+    
     def update_ws_latency(self, latency_ms: float):
         self.current_ws_latency = latency_ms
     
     def get_stats(self) -> dict:
         if not self.recent_latencies:
-            return {"recent": [], "avg": 0, "min": 0, "max": 0, "ws": self.current_ws_latency}
+            return {"recent": [], "avg": 0, "min": 0, "max": 0, "ws": self.current_ws_latency,
+                    "exposure_avg": 0, "exposure_max": 0}
         latencies = list(self.recent_latencies)
+        exposures = list(self.recent_exposures) or [0]
         return {
             "recent": latencies,
             "avg": sum(latencies) / len(latencies),
             "min": min(latencies),
             "max": max(latencies),
-            "ws": self.current_ws_latency
+            "ws": self.current_ws_latency,
+            "exposure_avg": sum(exposures) / len(exposures),
+            "exposure_max": max(exposures),
         }
     
     def format_recent(self) -> str:
@@ -181,8 +176,11 @@ class BalancePnLTracker:
         self.last_valid_balance = balance
         return True
     
-    def record_cycle_volume(self, price: float, size: float, direction: str):
-        self.total_volume_usd += price * size * 2
+    def record_cycle_volume(self, price: float, size: float, direction: str,
+                            close_price: Optional[float] = None):
+        if close_price is None:
+            close_price = price
+        self.total_volume_usd += price * size + close_price * size
         if direction == "LONG":
             self.long_count += 1
         else:
@@ -212,46 +210,135 @@ class BalancePnLTracker:
 
 
 class FixedPanel:
-    """固定面板显示器 - 不滚动"""
+    """固定面板显示器 - 不滚动，与上一帧比较只重写变化的行"""
     
-    PANEL_LINES = 11  # 面板行数
+    PANEL_LINES = 13  # 面板行数
+    FULL_REDRAW_EVERY = 20  # 每 N 帧整屏重画一次 (修复被日志等其他输出打乱的画面)
     
-    def __init__(self):
+    def __init__(self, panel_lines: int = PANEL_LINES):
+        self.panel_lines = panel_lines
         self.initialized = False
+        self.frame: list[str] = []  # 上一帧 (已输出的各行)
+        self.frames = 0
     
     def init_panel(self):
         """初始化面板（打印空行占位）"""
         if not self.initialized:
-            print("\n" * self.PANEL_LINES, end="")
+            print("\n" * self.panel_lines, end="")
             self.initialized = True
     
     def update(self, lines: list[str]):
-        """更新整个面板"""
-        # 移动光标到面板顶部
-        sys.stdout.write(f"\033[{self.PANEL_LINES}A")  # 向上移动N行
-        sys.stdout.write("\033[J")  # 清除从光标到屏幕底部
+        """更新面板: 未变化的行只移动光标，变化的行覆盖写并清除行尾，整帧一次写出"""
+        lines = (lines + [""] * self.panel_lines)[:self.panel_lines]
+        self.frames += 1
+        if self.frames % self.FULL_REDRAW_EVERY == 0:
+            self.frame = []
         
-        # 打印所有行
+        parts = []
+        skip = 0
         for i, line in enumerate(lines):
-            if i < self.PANEL_LINES:
-                print(line)
-        
-        # 补足剩余行
-        for _ in range(self.PANEL_LINES - len(lines)):
-            print()
-        
+            if i < len(self.frame) and self.frame[i] == line:
+                skip += 1
+                continue
+            if skip:
+                parts.append(f"\033[{skip}B")  # 向下跳过未变化的行
+                skip = 0
+            parts.append(f"\r{line}\033[K\n")
+        self.frame = lines
+        if not parts:
+            return
+        if skip:
+            parts.append(f"\033[{skip}B")
+        # 从面板顶部开始，结束时光标回到面板下方
+        sys.stdout.write(f"\033[{self.panel_lines}A" + "".join(parts) + "\r")
         sys.stdout.flush()
 
 
+class MarketState:
+    """单个市场的盘口、参数、预签名订单和循环计数"""
+    
+    def __init__(self, market: str, size: float = ORDER_SIZE_BTC,
+                 max_spread: float = MAX_SPREAD_PERCENT, min_depth: float = MIN_DEPTH_BTC):
+        self.market = market
+        self.size = size
+        self.max_spread = max_spread
+        self.min_depth = min_depth
+        self.order_factory: Optional[OrderFactory] = None
+        self.tick_recorder: Optional[TickRecorder] = None
+        self.cycles = 0
+        
+        # 整个运行期间只有这一个对象，BBO 回调原地更新
+        self.bbo = BookTop(market)
+        self.book = OrderBook(market)
+        self.book_resync_at = 0.0
+        self.signal = create_model(DIRECTION_MODEL, SIGNAL_PARAMS)
+        self.order_mode = ORDER_MODE
+        self.price_tick: Optional[Decimal] = None   # IOC 限价的价格步长 (连接时从市场信息获取)
+
+
+def account_path(path: str, name: str) -> str:
+    """多账户时给输出文件加上账户名后缀 (fills_state.json → fills_state.<name>.json)"""
+    if not path or not name:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{name}{ext}"
+
+
 class WebSocketScalper:
     """WebSocket 实时价格的 BTC 双向秒开关策略"""
     
-    def __init__(self):
+    def __init__(self, l2_address: str = L2_ADDRESS, l2_private_key: str = L2_PRIVATE_KEY,
+                 name: str = "", shared_feed: bool = False):
+        """
+        Args:
+            l2_address / l2_private_key: 账户密钥 (默认取 .env)
+            name: 账户名，多账户时用于区分日志和输出文件
+            shared_feed: 为 True 时不自行订阅 BBO，由 AccountSupervisor 推送共享行情
+        """
+        self.l2_address = l2_address
+        self.l2_private_key = l2_private_key
+        self.name = name
+        self.tag = f"{name} " if name else ""   # 输出前缀
+        self.shared_feed = shared_feed
+        # 共享行情由 AccountSupervisor 显示; 无终端 (nohup/systemd) 或 HEADLESS 时不渲染
+        self.show_panel = not shared_feed and not HEADLESS and sys.stdout.isatty()
+        self.session: Optional[ParadexSession] = None
         self.paradex: Optional[ParadexSubkey] = None
+        self.order_gateway: Optional[OrderGateway] = None
+        self.warm_tasks: list[asyncio.Task] = []
+        self.account_stream: Optional[AccountStream] = None
+        self.reconcile_task: Optional[asyncio.Task] = None
+        self.fills_reconciler: Optional[FillsReconciler] = None
+        self.fills_task: Optional[asyncio.Task] = None
+        self.journal: Optional[StateJournal] = None
         self.rate_limiter = RateLimiter(MAX_ORDERS_PER_MINUTE, MAX_ORDERS_PER_HOUR, MAX_ORDERS_PER_DAY)
         self.pnl_tracker = BalancePnLTracker()
+        self.fill_ledger = FillLedger()
+        self.execution = ExecutionStats()
         self.latency_tracker = LatencyTracker()
-        self.panel = FixedPanel()
+        self.stages = StageLatency()
+        self.metrics_server: Optional[MetricsServer] = None
+        self.control: Optional[ControlPlane] = None
+        self.order_sent: Dict[str, float] = {}    # 订单 ID → 发出时刻 (perf_counter)，用于成交延迟
+        self.early_fills: Dict[str, float] = {}   # 先于下单响应到达的成交
+        self.trigger_engine = TriggerEngine(self.rate_limiter, MAX_SPREAD_PERCENT, MIN_DEPTH_BTC,
+                                            max_feed_age_ms=MAX_FEED_AGE_MS, pacing=PACING_ENABLED)
+        self.feed_monitor = FeedMonitor()   # 共享行情时由 AccountSupervisor 统计
+        self.clock_task: Optional[asyncio.Task] = None
+        
+        # 各市场共用一个 WebSocket、触发器和限速器; 主市场用于面板和对账默认值
+        self.markets: Dict[str, MarketState] = {
+            market: MarketState(market, **params) for market, params in (MARKETS or {MARKET: {}}).items()
+        }
+        self.primary = self.markets.get(MARKET) or next(iter(self.markets.values()))
+        for state in self.markets.values():
+            self.trigger_engine.set_market(state.market, state.max_spread, state.min_depth, state.size)
+            if ORDER_BOOK_ENABLED:
+                self.trigger_engine.set_book(state.market, state.book)
+            self.trigger_engine.set_signal(state.market, state.signal)
+        
+        extra_lines = len(self.markets) - 2 if len(self.markets) > 1 else 0
+        self.panel = FixedPanel(FixedPanel.PANEL_LINES + extra_lines)
         
         self.cycle_count = 0
         self.successful_cycles = 0
@@ -259,101 +346,185 @@ class WebSocketScalper:
         self.consecutive_failures = 0
         self.running = False
         self.start_time = None
-        self.last_auth_time = 0
         self.last_direction = "-"
         
-        self.current_bbo: Dict[str, Any] = {
-            "bid": 0.0, "ask": 0.0,
-            "bid_size": 0.0, "ask_size": 0.0,
-            "spread": 100.0, "mid_price": 0.0,
-            "last_update": 0,
-        }
-        
+        self.max_order_size = MAX_ORDER_SIZE_BTC   # resize 的上限 (重载配置时更新)
+        self.on_idle: Optional[Callable[[], Any]] = None   # 共享行情时空闲回调 (AccountSupervisor 重新分发)
         self.recent_cycle_times = deque(maxlen=5)
-        self.last_display_update = 0  # 控制显示刷新频率
+        self.render_task: Optional[asyncio.Task] = None
+    
+    @property
+    def current_bbo(self) -> BookTop:
+        """主市场盘口"""
+        return self.primary.bbo
     
     def update_display(self, status: str = "监控中"):
         """更新固定面板显示"""
         bbo = self.current_bbo
         stats = self.pnl_tracker.get_stats()
-        latency = self.latency_tracker.get_stats()
+        trigger = self.trigger_engine.get_stats()
+        ledger = self.fill_ledger.get_stats()
         min_o, hr_o, day_o = self.rate_limiter.get_counts()
         
         now = time.time()
-        ws_age = (now - bbo["last_update"]) * 1000 if bbo["last_update"] > 0 else 0
+        feed_age = feed_age_ms(bbo, now) if bbo.last_update > 0 else 0
+        feed = self.feed_monitor.get_stats()
         elapsed = now - self.start_time if self.start_time else 0
         elapsed_min = elapsed / 60
         
-        direction = "🟢多" if bbo["bid_size"] >= bbo["ask_size"] else "🔴空"
+        sign = self.primary.signal.decide(now)
+        direction = "🟢多" if sign > 0 else ("🔴空" if sign < 0 else "⚪观望")
+        book_text = ""
+        if ORDER_BOOK_ENABLED:
+            cost = self.primary.book.round_trip_pct(self.primary.size) if self.primary.book.valid else None
+            book_text = f"  |  L2 往返 {cost:.5f}%" if cost is not None else "  |  L2 未同步"
+        stage_text = " | ".join(
+            "{} {:.0f}/{:.0f}".format(label, *self.stages.get(stage).percentiles((0.5, 0.99)))
+            for stage, label in PANEL_STAGES
+        )
         pnl_color = "+" if stats['pnl'] >= 0 else ""
         
+        if len(self.markets) == 1:
+            market_lines = [
+                f"  💰 价格: ${bbo.mid_price:.0f}  |  价差: {bbo.spread:.5f}%  |  方向: {direction}",
+                f"  📈 深度: 买一 {bbo.bid_size:.4f} BTC  |  卖一 {bbo.ask_size:.4f} BTC{book_text}",
+            ]
+        else:
+            market_lines = [
+                f"  💰 {s.market:<14} ${s.bbo.mid_price:<10.2f} 价差 {s.bbo.spread:.5f}%/{s.max_spread}%  "
+                f"深度 {s.bbo.bid_size:.4f}/{s.bbo.ask_size:.4f}  循环 {s.cycles}"
+                for s in self.markets.values()
+            ]
+        
         lines = [
             "═" * 70,
             f"  📊 Paradex BTC 双向秒开关 v6 | 状态: {status}",
             "═" * 70,
-            f"  💰 价格: ${bbo['mid_price']:.0f}  |  价差: {bbo['spread']:.5f}%  |  方向: {direction}",
-            f"  📈 深度: 买一 {bbo['bid_size']:.4f} BTC  |  卖一 {bbo['ask_size']:.4f} BTC",
+            *market_lines,
             f"  🔄 循环: {self.cycle_count}/{MAX_CYCLES} (多:{stats['long']} 空:{stats['short']})  |  上次: {self.last_direction}",
             f"  💵 盈亏: {pnl_color}{stats['pnl']:.4f} U  |  成交量: ${stats['volume']/1000:.1f}K",
-            f"  🚦 限速: {min_o}/{MAX_ORDERS_PER_MINUTE}分 | {hr_o}/{MAX_ORDERS_PER_HOUR}时 | {day_o}/{MAX_ORDERS_PER_DAY}日",
-            f"  ⏱️ 延迟: WS {ws_age:.0f}ms  |  近5单: [{self.latency_tracker.format_recent()}]ms",
-            f"  ⏰ 运行: {elapsed_min:.1f}分钟  |  磨损: ¥{stats['per_10k']:.2f}/万",
-            f"  按 Q 键停止策略",
+            f"  🚦 限速: {min_o}/{MAX_ORDERS_PER_MINUTE}分 | {hr_o}/{MAX_ORDERS_PER_HOUR}时 | {day_o}/{MAX_ORDERS_PER_DAY}日 | 节奏 {self.rate_limiter.pace_ratio():.1f}x",
+            f"  ⏱️ 延迟: 行情 {feed_age:.0f}ms  |  触发 {trigger['avg']:.1f}ms  |  近5单: [{self.latency_tracker.format_recent()}]ms",
+            f"  📡 行情: 单向 {feed['p50']:.0f}/{feed['p99']:.0f}ms  |  时钟偏差 {feed['offset']:+.0f}ms  |  跳号 {feed['gaps']} (丢 {feed['missed']})",
+            f"  📐 p50/p99: {stage_text} ms",
+            f"  ⏰ 运行: {elapsed_min:.1f}分钟  |  磨损: ¥{stats['per_10k']:.2f}/万  |  近{ledger['window_cycles']}循环: ¥{ledger['window_per_10k']:.2f}/万 滑点 {ledger['window_slippage_bps']:.2f}bp",
+            f"  按键: Q 停止 | P 暂停 | C 继续 | R 重载配置",
         ]
         
         self.panel.update(lines)
     
     async def on_bbo_update(self, channel, message):
+        tick_ts = time.perf_counter()
         try:
-            data = message.get("params", {}).get("data", {})
-            if data:
-                bid = float(data.get("bid", 0))
-                ask = float(data.get("ask", 0))
-                bid_size = float(data.get("bid_size", 0))
-                ask_size = float(data.get("ask_size", 0))
-                
-                if bid > 0 and ask > 0:
-                    mid = (bid + ask) / 2
-                    spread_pct = (ask - bid) / mid * 100
-                    
-                    self.current_bbo = {
-                        "bid": bid, "ask": ask,
-                        "bid_size": bid_size, "ask_size": ask_size,
-                        "spread": spread_pct, "mid_price": mid,
-                        "last_update": time.time(),
-                    }
+            data = bbo_data(message)
+            if data is None:
+                return
+            state = self.markets.get(data["market"])
+            if state is None or not self.feed_monitor.accept(state.market, data.get("seq_no")):
+                return
+            bbo = state.bbo
+            if not bbo.update(data, time.time()):
+                return
+            self.feed_monitor.on_update(bbo)
+            state.signal.update(bbo.last_update, bbo.bid, bbo.ask, bbo.bid_size, bbo.ask_size)
+            self.trigger_engine.on_tick(bbo, tick_ts)
+            if state.tick_recorder:
+                state.tick_recorder.append(bbo.last_update, bbo.bid, bbo.ask, bbo.bid_size, bbo.ask_size)
+        except Exception as e:
+            logger.error("BBO 解析错误: %s", e)
+    
+    async def on_book_update(self, channel, message):
+        tick_ts = time.perf_counter()
+        try:
+            data = message["params"]["data"]
+            state = self.markets.get(data.get("market"))
+            if state is not None and self.apply_book(state, data):
+                # 深度变化也可能让入场条件成立
+                self.trigger_engine.on_tick(state.bbo, tick_ts)
         except Exception as e:
-            logger.error(f"BBO 解析错误: {e}")
+            logger.error("盘口解析错误: %s", e)
+    
+    async def on_trade_update(self, channel, message):
+        """公开成交 → 方向模型的成交流"""
+        try:
+            data = message["params"]["data"]
+            state = self.markets.get(data.get("market"))
+            if state is not None:
+                state.signal.on_trade(time.time(), data["side"], float(data["size"]))
+        except Exception as e:
+            logger.error("成交解析错误: %s", e)
+    
+    def apply_book(self, state: MarketState, data: Dict[str, Any]) -> bool:
+        """应用 L2 盘口消息，返回盘口是否有效; 失效时 (跳号或未收到快照) 安排 REST 重建"""
+        book = state.book
+        now = time.time()
+        if book.apply(data, now):
+            return True
+        if not book.valid and now - state.book_resync_at >= BOOK_RESYNC_INTERVAL_SEC:
+            state.book_resync_at = now
+            asyncio.create_task(self.resync_book(state))
+        return False
+    
+    async def resync_book(self, state: MarketState):
+        """用 REST 快照重建 L2 盘口 (期间收到的增量由 OrderBook 缓存，重建后补上)"""
+        try:
+            snapshot = await asyncio.to_thread(self.paradex.api_client.fetch_orderbook, state.market)
+            if state.book.load_snapshot(snapshot, time.time()):
+                logger.info("%s L2 盘口已重建 (seq %s)", state.market, state.book.seq_no)
+            else:
+                logger.warning("%s L2 盘口重建后仍有跳号，等待下次重建", state.market)
+        except Exception as e:
+            logger.warning("%s L2 盘口重建失败: %s", state.market, e)
     
     async def connect(self) -> bool:
         try:
-            env = "prod" if PARADEX_ENV == "MAINNET" else "testnet"
-            print(f"🔌 连接 Paradex ({env})...")
+            self.session = ParadexSession(PARADEX_ENV, self.l2_private_key, self.l2_address)
+            print(f"🔌 {self.tag}连接 Paradex ({self.session.env})...")
             
-            self.paradex = ParadexSubkey(
-                env=env,
-                l2_private_key=L2_PRIVATE_KEY,
-                l2_address=L2_ADDRESS
-            )
+            await self.session.connect()
+            print("🆓 Interactive Token 获取成功")
+            # token 由会话后台任务提前刷新，主循环不再检查
+            self.session.start_refresh()
+            self.paradex = self.session.paradex
+            self.order_gateway = OrderGateway(self.paradex.api_client, stages=self.stages)
+            # 触发前为每个市场预先签好开/平两腿
+            for state in self.markets.values():
+                state.order_factory = OrderFactory(self.paradex.account, state.market, state.size)
+                state.order_factory.prepare_all()
+            if any(state.order_mode == "ioc" for state in self.markets.values()):
+                await self.load_price_ticks()
             
-            await self.paradex.init_account()
-            await self._auth_with_interactive_token()
+            if TICK_RECORD_FILE and not self.shared_feed:
+                # 主市场沿用 TICK_RECORD_FILE，其余市场写到 <文件名>.<市场><扩展名>
+                root, ext = os.path.splitext(TICK_RECORD_FILE)
+                for state in self.markets.values():
+                    path = TICK_RECORD_FILE if state is self.primary else f"{root}.{state.market}{ext}"
+                    state.tick_recorder = TickRecorder(path)
+                    print(f"📼 录制 {state.market} BBO → {path} (已有 {state.tick_recorder.count} 条)")
             
             print("📡 连接 WebSocket...")
             await self.paradex.ws_client.connect()
             
-            print(f"📊 订阅 {MARKET} BBO...")
-            await self.paradex.ws_client.subscribe(
-                ParadexWebsocketChannel.BBO,
-                callback=self.on_bbo_update,
-                params={"market": MARKET}
+            if not self.shared_feed:
+                await self.subscribe_bbo(self.on_bbo_update)
+            
+            print("👤 订阅账户/持仓/成交频道...")
+            self.account_stream = AccountStream(
+                self.paradex.ws_client, self.pnl_tracker, self.primary.market, tuple(self.markets)
             )
+            self.account_stream.fill_listeners.append(self.fill_ledger.on_fill)
+            self.account_stream.fill_listeners.append(self.execution.on_fill)
+            self.account_stream.fill_listeners.append(self.on_fill_timing)
+            self.account_stream.fill_listeners.append(self.log_fill)
+            await self.account_stream.subscribe()
             
+            if self.shared_feed:
+                return True
             print("⏳ 等待 BBO 数据...")
             for _ in range(50):
                 await asyncio.sleep(0.1)
-                if self.current_bbo["last_update"] > 0:
-                    print(f"✅ 收到 BBO: ${self.current_bbo['mid_price']:.0f}")
+                if self.current_bbo.last_update > 0:
+                    print(f"✅ 收到 BBO: ${self.current_bbo.mid_price:.0f}")
                     break
             
             return True
@@ -361,233 +532,703 @@ class WebSocketScalper:
             print(f"❌ 连接失败: {e}")
             return False
     
-    async def _auth_with_interactive_token(self):
-        import time as time_module
-        from paradex_py.api.models import AuthSchema
-        
-        api_client = self.paradex.api_client
-        account = self.paradex.account
-        
-        headers = account.auth_headers()
-        path = f"auth/{hex(account.l2_public_key)}?token_usage=interactive"
-        
-        res = api_client.post(api_url=api_client.api_url, path=path, headers=headers)
-        
-        data = AuthSchema().load(res, unknown="exclude", partial=True)
-        api_client.auth_timestamp = int(time_module.time())
-        account.set_jwt_token(data.jwt_token)
-        api_client.client.headers.update({"Authorization": f"Bearer {data.jwt_token}"})
-        
-        self.last_auth_time = time_module.time()
-        print("🆓 Interactive Token 获取成功")
+    async def load_price_ticks(self):
+        """IOC 模式: 获取各市场价格步长，取不到的市场退回市价单"""
+        try:
+            markets = await asyncio.to_thread(self.paradex.api_client.fetch_markets)
+            ticks = {m.get("symbol"): m.get("price_tick_size") for m in markets.get("results", [])}
+        except Exception as e:
+            logger.error(f"获取市场信息失败: {e}")
+            ticks = {}
+        for state in self.markets.values():
+            if state.order_mode != "ioc":
+                continue
+            tick = ticks.get(state.market)
+            if tick:
+                state.price_tick = Decimal(str(tick))
+                print(f"🎯 {state.market} 限价 IOC 下单 | 步长 {state.price_tick} | 容忍 {LIMIT_TOLERANCE_BPS}bp")
+            else:
+                state.order_mode = "market"
+                print(f"⚠️ {state.market} 未取到价格步长，改用市价单")
     
-    async def refresh_token_if_needed(self, max_age: int = 240):
-        elapsed = time.time() - self.last_auth_time
-        if elapsed >= max_age:
-            await self._auth_with_interactive_token()
+    async def subscribe_bbo(self, callback, book_callback=None):
+        """在本账户的 WebSocket 上订阅全部市场的 BBO (及 L2 盘口增量、方向模型需要的公开成交)"""
+        for market, state in self.markets.items():
+            print(f"📊 订阅 {market} BBO{' + L2 盘口' if ORDER_BOOK_ENABLED else ''}...")
+            await self.paradex.ws_client.subscribe(
+                ParadexWebsocketChannel.BBO,
+                callback=callback,
+                params={"market": market}
+            )
+            if ORDER_BOOK_ENABLED:
+                # 增量频道 order_book.<市场>.deltas@15@<刷新间隔> (paradex-py >= 0.6.0)
+                await self.paradex.ws_client.subscribe(
+                    ParadexWebsocketChannel.ORDER_BOOK,
+                    callback=book_callback or self.on_book_update,
+                    params={"market": market, "feed_type": "deltas", "refresh_rate": BOOK_REFRESH_RATE}
+                )
+            if state.signal.uses_trades:
+                await self.paradex.ws_client.subscribe(
+                    ParadexWebsocketChannel.TRADES,
+                    callback=self.on_trade_update,
+                    params={"market": market}
+                )
     
     def get_account_balance(self) -> float:
         try:
             summary = self.paradex.api_client.fetch_account_summary()
-            logger.debug(f"账户摘要: {summary}")
 
             # 尝试多个字段
             if hasattr(summary, 'account_value') and summary.account_value:
                 balance = float(summary.account_value)
-                logger.info(f"余额 (account_value): {balance}")
+                logger.debug("余额 (account_value): %s", balance)
                 return balance
             if hasattr(summary, 'equity') and summary.equity:
                 balance = float(summary.equity)
-                logger.info(f"余额 (equity): {balance}")
+                logger.debug("余额 (equity): %s", balance)
                 return balance
             if hasattr(summary, 'free_collateral') and summary.free_collateral:
                 balance = float(summary.free_collateral)
-                logger.info(f"余额 (free_collateral): {balance}")
+                logger.debug("余额 (free_collateral): %s", balance)
                 return balance
 
             # 打印所有可用字段
-            logger.warning(f"未找到余额字段。可用字段: {dir(summary)}")
+            logger.warning("未找到余额字段。可用字段: %s", dir(summary))
             return 0.0
         except Exception as e:
-            logger.error(f"获取余额失败: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            # 堆栈在日志线程中格式化
+            logger.error("获取余额失败: %s", e, exc_info=True)
             return -1
     
-    def place_market_order(self, side: str, size: float) -> dict:
-        from decimal import Decimal
-        order = Order(
-            market=MARKET,
-            order_type=OrderType.Market,
-            order_side=OrderSide.Buy if side == "BUY" else OrderSide.Sell,
-            size=Decimal(str(size))
-        )
-        return self.paradex.api_client.submit_order(order)
+    async def reconcile_loop(self):
+        """定期用 REST 对账 (在线程中执行，不阻塞事件循环)"""
+        while self.running:
+            await asyncio.sleep(ACCOUNT_RECONCILE_SEC)
+            if not self.running:
+                break
+            balance = await asyncio.to_thread(self.get_account_balance)
+            self.account_stream.reconcile(balance)
+    
+    async def place_market_order(self, side: str, size: float, market: Optional[str] = None) -> dict:
+        state = self.markets[market] if market else self.primary
+        if size != state.size:
+            order = Order(
+                market=state.market,
+                order_type=OrderType.Market,
+                order_side=OrderSide.Buy if side == "BUY" else OrderSide.Sell,
+                size=Decimal(str(size))
+            )
+            return await self.order_gateway.submit(order)
+        
+        # 使用预签名订单，在网关线程中提交，speed bump 期间 BBO 回调照常处理
+        sign_start = time.perf_counter()
+        order = state.order_factory.take(side)
+        self.stages.record("sign", (time.perf_counter() - sign_start) * 1000)
+        try:
+            return await self.order_gateway.submit_signed(order)
+        finally:
+            state.order_factory.replenish_soon(side)
     
-    def decide_direction(self, bid_size: float, ask_size: float) -> str:
-        return "LONG" if bid_size >= ask_size else "SHORT"
+    async def place_ioc_order(self, side: str, size: float, state: MarketState, tolerance_bps: float) -> dict:
+        """按最新盘口定价的限价 IOC 单 (价格是签名内容，在网关线程中现签)"""
+        book = state.book if ORDER_BOOK_ENABLED else None
+        price = limit_price(side, state.bbo, book, size, tolerance_bps, state.price_tick)
+        order = state.order_factory.build_ioc(side, Decimal(str(size)), price)
+        return await self.order_gateway.submit(order)
     
     async def start(self):
         print("=" * 70)
         print("🚀 Paradex BTC 秒开关策略 v6 - 双向智能版")
         print("=" * 70)
-        print(f"📊 配置: {ORDER_SIZE_BTC} BTC | 价差≤{MAX_SPREAD_PERCENT}%")
+        for state in self.markets.values():
+            print(f"📊 配置: {state.market} {state.size} | 价差≤{state.max_spread}% | 深度≥{state.min_depth} | "
+                  f"方向模型 {DIRECTION_MODEL} | 下单 {state.order_mode}")
         print(f"🚦 限速: {MAX_ORDERS_PER_MINUTE}/分 | {MAX_ORDERS_PER_HOUR}/时 | {MAX_ORDERS_PER_DAY}/24h")
         print("=" * 70)
         
-        if not L2_ADDRESS or not L2_PRIVATE_KEY:
+        if not self.l2_address or not self.l2_private_key:
             print("❌ 未配置 L2 密钥!")
             return
         
-        if not await self.connect():
-            return
-        
-        initial_balance = self.get_account_balance()
-        if initial_balance <= 0:
-            print(f"❌ 获取余额失败: {initial_balance}")
+        if not await self.prepare():
             return
-        if not self.pnl_tracker.set_initial_balance(initial_balance):
-            print("❌ 设置初始余额失败")
-            return
-        print(f"💰 初始余额: ${initial_balance:.4f} USDC")
         print()
+        if METRICS_PORT:
+            self.metrics_server = MetricsServer(lambda: render_prometheus([self.metric_families()]), port=METRICS_PORT)
+            await self.metrics_server.start()
+            print(f"📐 指标: http://127.0.0.1:{METRICS_PORT}/metrics")
         
-        self.running = True
-        self.start_time = time.time()
-        self.panel.init_panel()
-
-        import threading
-        import msvcrt
-
-        def keyboard_listener():
-            while self.running:
-                if msvcrt.kbhit():
-                    key = msvcrt.getwch()
-                    if key.lower() == 'q':
-                        self.running = False
-                        break
-                time.sleep(0.1)
-
-        t = threading.Thread(target=keyboard_listener, daemon=True)
-        t.start()
-
         try:
+            self.control = ControlPlane(self.control_commands(), CONTROL_SOCKET, CONTROL_PORT, EMERGENCY_STOP_FILE)
+            print(f"🎛️ 控制: {' | '.join(await self.control.start())}")
+            if self.show_panel:
+                self.panel.init_panel()
+                self.render_task = asyncio.create_task(self.render_loop())
             await self.main_loop()
         except KeyboardInterrupt:
             pass
         finally:
             await self.shutdown()
     
-    async def main_loop(self):
-        last_balance_check = 0
+    async def prepare(self) -> bool:
+        """连接、取初始余额并启动后台任务 (不含面板和键盘)"""
+        if not await self.connect():
+            return False
+        
+        initial_balance = self.get_account_balance()
+        if initial_balance <= 0:
+            print(f"❌ {self.tag}获取余额失败: {initial_balance}")
+            return False
+        if not self.pnl_tracker.set_initial_balance(initial_balance):
+            print(f"❌ {self.tag}设置初始余额失败")
+            return False
+        print(f"💰 {self.tag}初始余额: ${initial_balance:.4f} USDC")
+        
+        if not self.shared_feed:
+            offset = await self.feed_monitor.sync(self.paradex.api_client)
+            if offset is not None:
+                print(f"🕐 时钟偏差: {offset:+.1f}ms (RTT {self.feed_monitor.clock.rtt_ms:.1f}ms)")
+        
+        if STATE_JOURNAL_FILE:
+            await self.restore_state(initial_balance)
+        self.account_stream.reconcile(initial_balance)
+        
+        self.running = True
+        self.start_time = time.time()
+        self.reconcile_task = asyncio.create_task(self.reconcile_loop())
+        self.warm_tasks = [
+            asyncio.create_task(state.order_factory.keep_warm()) for state in self.markets.values()
+        ]
         
+        # 多市场时不按市场过滤，一次拉取全部成交。
+        # 起点用状态日志的会话开始时间 (同一会话内重启不变)，进度文件才能续上; 没有状态日志时从本次启动算
+        session_start = self.journal.baseline_ts if self.journal and self.journal.baseline_ts else self.start_time
+        self.fills_reconciler = FillsReconciler(
+            self.paradex.api_client, self.primary.market if len(self.markets) == 1 else None,
+            int(session_start * 1000), account_path(FILLS_STATE_FILE, self.name)
+        )
+        if self.fills_reconciler.load():
+            stats = self.fills_reconciler.get_stats()
+            print(f"🧾 {self.tag}成交对账续上: {stats['count']} 笔 | ${stats['volume']:,.2f}")
+        self.fills_task = asyncio.create_task(self.fills_reconciler.run_periodic(FILLS_RECONCILE_SEC))
+        if not self.shared_feed:
+            self.clock_task = asyncio.create_task(
+                self.feed_monitor.run_periodic(self.paradex.api_client, CLOCK_SYNC_SEC))
+        return True
+    
+    async def restore_state(self, current_balance: float):
+        """从状态日志恢复限速计数、循环数和盈亏基准 (日志缺失时用成交记录补下单时间)"""
+        started = time.perf_counter()
+        self.journal = StateJournal(account_path(STATE_JOURNAL_FILE, self.name))
+        if self.journal.load():
+            source = "状态日志"
+        else:
+            try:
+                seeded = await self.journal.seed_from_fills(self.paradex.api_client)
+                source = f"成交记录 ({seeded} 单)"
+            except Exception as e:
+                logger.error(f"从成交记录恢复下单时间失败: {e}")
+                source = "空状态"
+        
+        for ts in self.journal.orders:
+            self.rate_limiter.record_order(ts)
+        if self.journal.baseline is None:
+            self.journal.set_baseline(current_balance)
+        else:
+            # 同一会话内重启: 盈亏和循环数接着算
+            self.pnl_tracker.set_initial_balance(self.journal.baseline)
+            self.pnl_tracker.update_balance(current_balance)
+            self.pnl_tracker.total_volume_usd = self.journal.volume
+            self.pnl_tracker.long_count = self.journal.long_count
+            self.pnl_tracker.short_count = self.journal.short_count
+            self.cycle_count = self.journal.cycles
+            self.successful_cycles = self.journal.cycles
+        
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"💾 {self.tag}从{source}恢复: 24h 内 {len(self.journal.orders)} 单 | "
+              f"循环 {self.cycle_count} | 基准 ${self.pnl_tracker.initial_balance:.4f} | {elapsed_ms:.1f}ms")
+    
+    async def main_loop(self):
         while self.running and self.cycle_count < MAX_CYCLES:
-            if os.path.exists(EMERGENCY_STOP_FILE):
-                break
             if self.consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
                 break
             
             try:
-                await self.refresh_token_if_needed(240)
+                # 余额由 account 频道实时推送，这里只读内存
+                balance = self.pnl_tracker.current_balance
+                if 0 < balance < MIN_BALANCE_USD:
+                    print(f"\n⛔ 余额不足 ${MIN_BALANCE_USD} (当前 ${balance:.4f})，停止策略")
+                    self.running = False
+                    break
                 
                 now = time.time()
-                if now - last_balance_check > 10:
-                    balance = self.get_account_balance()
-                    if balance > 0:
-                        self.pnl_tracker.update_balance(balance)
-                        last_balance_check = now
-                        if balance < 10:
-                            print(f"\n⛔ 余额不足 $10 (当前 ${balance:.4f})，停止策略")
-                            self.running = False
-                            break
-                
-                can_trade, wait_sec, limit_reason = self.rate_limiter.can_place_order()
                 
                 bbo = self.current_bbo
-                spread = bbo["spread"]
-                price = bbo["mid_price"]
-                age = now - bbo["last_update"]
-                self.latency_tracker.update_ws_latency(age * 1000)
-                
-                # 更新显示 (每500ms刷新一次，减少闪烁)
-                now = time.time()
-                if now - self.last_display_update >= 0.5:
-                    if can_trade:
-                        self.update_display("监控中")
-                    else:
-                        self.update_display(f"{limit_reason}限速 {wait_sec:.0f}s")
-                    self.last_display_update = now
+                if bbo.last_update > 0:
+                    self.latency_tracker.update_ws_latency(feed_age_ms(bbo, now))
                 
-                if not can_trade:
-                    await asyncio.sleep(min(wait_sec, 2))
+                # 等待 BBO 回调触发 (超时用于检查停止条件，面板由 render_loop 刷新)
+                trigger_bbo = await self.trigger_engine.wait(timeout=0.5)
+                if trigger_bbo is None or not self.running:
                     continue
                 
-                if age > 1.0:
-                    await asyncio.sleep(0.05)
-                    continue
+                tick_ts = self.trigger_engine.pending_tick_ts
+                self.stages.record("trigger", self.trigger_engine.trigger_latencies[-1])
+                state = self.markets[trigger_bbo.market]
+                price = trigger_bbo.mid_price
+                direction = "LONG" if self.trigger_engine.pending_sign > 0 else "SHORT"
                 
-                if spread <= MAX_SPREAD_PERCENT:
-                    bid_size = bbo["bid_size"]
-                    ask_size = bbo["ask_size"]
-                    if bid_size < MIN_DEPTH_BTC or ask_size < MIN_DEPTH_BTC:
-                        await asyncio.sleep(0.05)
-                        continue
-                    
-                    direction = self.decide_direction(bid_size, ask_size)
-                    
-                    cycle_start = time.time()
-                    success = await self.execute_cycle(price, direction)
-                    cycle_time = time.time() - cycle_start
-                    cycle_latency_ms = cycle_time * 1000
+                cycle_start = time.time()
+                success = await self.execute_cycle(price, direction, state.market)
+                cycle_time = time.time() - cycle_start
+                cycle_latency_ms = cycle_time * 1000
+                
+                if success is None:
+                    # IOC 开仓零成交: 没有持仓，不计循环也不算失败
+                    pass
+                elif success:
+                    self.stages.record("cycle", cycle_latency_ms)
+                    self.stages.record("total", (time.perf_counter() - tick_ts) * 1000)
+                    self.successful_cycles += 1
+                    self.consecutive_failures = 0
+                    self.cycle_count += 1
+                    state.cycles += 1
+                    self.recent_cycle_times.append(cycle_time)
+                    self.latency_tracker.record_cycle_latency(cycle_latency_ms)
+                    self.last_direction = "多" if direction == "LONG" else "空"
                     
-                    if success:
-                        self.successful_cycles += 1
-                        self.consecutive_failures = 0
-                        self.cycle_count += 1
-                        self.recent_cycle_times.append(cycle_time)
-                        self.latency_tracker.record_cycle_latency(cycle_latency_ms)
-                        self.last_direction = "多" if direction == "LONG" else "空"
-                        
-                        await asyncio.sleep(0.2)
-                        balance = self.get_account_balance()
-                        if balance > 0:
-                            self.pnl_tracker.update_balance(balance)
-                            last_balance_check = time.time()
-                        
-                        logger.info(f"循环 {self.cycle_count} | {self.last_direction} | {cycle_latency_ms:.0f}ms")
-                    else:
-                        self.failed_cycles += 1
-                        self.consecutive_failures += 1
+                    log_event(logger, "cycle", account=self.name, n=self.cycle_count, market=state.market,
+                              direction=direction, price=price, ms=round(cycle_latency_ms, 1))
+                else:
+                    self.failed_cycles += 1
+                    self.consecutive_failures += 1
+                
+                self.rearm()
                 
             except Exception as e:
-                logger.error(f"错误: {e}")
+                logger.error("错误: %s", e)
                 self.consecutive_failures += 1
-            
-            await asyncio.sleep(0.05)
+                self.trigger_engine.rearm()
+                await asyncio.sleep(0.05)
     
-    async def execute_cycle(self, price: float, direction: str) -> bool:
+    def rearm(self):
+        """重新布防并按各市场当前盘口再判断一次
+
+        共享行情时只布防不自行判断: 由 AccountSupervisor (on_idle) 重新分发，
+        保证满足条件的盘口只交给一个账户。
+        """
+        if self.shared_feed:
+            self.trigger_engine.rearm()
+            if self.on_idle:
+                self.on_idle()
+        else:
+            self.trigger_engine.rearm(*(s.bbo for s in self.markets.values()))
+    
+    async def render_loop(self):
+        """低优先级面板刷新 (独立任务): 循环执行中推迟渲染，最多推迟 3 帧"""
+        deferred = 0
+        while self.running:
+            await asyncio.sleep(PANEL_REFRESH_SEC)
+            if not self.trigger_engine.armed and deferred < 3:
+                deferred += 1
+                continue
+            deferred = 0
+            can_trade, wait_sec, limit_reason = self.rate_limiter.can_place_order(n=ORDERS_PER_CYCLE)
+            if self.trigger_engine.paused:
+                self.update_display("已暂停")
+            elif can_trade:
+                self.update_display("监控中")
+            else:
+                self.update_display(f"{limit_reason}限速 {wait_sec:.0f}s")
+    
+    async def execute_cycle(self, price: float, direction: str, market: Optional[str] = None) -> Optional[bool]:
+        """执行一个开平循环; 返回 None 表示 IOC 开仓零成交、本次放弃"""
         try:
-            if direction == "LONG":
-                self.place_market_order("BUY", ORDER_SIZE_BTC)
-                self.rate_limiter.record_order()
-                await asyncio.sleep(0.1)
-                self.place_market_order("SELL", ORDER_SIZE_BTC)
-                self.rate_limiter.record_order()
+            state = self.markets[market] if market else self.primary
+            open_side, close_side = ("BUY", "SELL") if direction == "LONG" else ("SELL", "BUY")
+            cycle_id = self.fill_ledger.open_cycle(direction, price, state.size, state.market)
+            size = state.size
+            
+            if state.order_mode == "ioc":
+                result = await self._run_legs_ioc(open_side, close_side, cycle_id, price, state)
+                if result is None:
+                    self.execution.missed += 1
+                    self.fill_ledger.discard_cycle(cycle_id)
+                    return None
+                close_price, exposure_ms, size = result
+            elif CLOSE_LEG_MODE == "concurrent":
+                close_price, exposure_ms = await self._run_legs_concurrent(open_side, close_side, cycle_id, price, state)
             else:
-                self.place_market_order("SELL", ORDER_SIZE_BTC)
-                self.rate_limiter.record_order()
-                await asyncio.sleep(0.1)
-                self.place_market_order("BUY", ORDER_SIZE_BTC)
-                self.rate_limiter.record_order()
+                close_price, exposure_ms = await self._run_legs_sequential(open_side, close_side, cycle_id, price, state)
             
-            self.pnl_tracker.record_cycle_volume(price, ORDER_SIZE_BTC, direction)
+            self.latency_tracker.record_exposure(exposure_ms)
+            self.pnl_tracker.record_cycle_volume(price, size, direction, close_price)
+            if self.journal:
+                self.journal.record_cycle(state.market, direction, (price + close_price) * size)
             return True
         except Exception as e:
-            logger.error(f"循环失败: {e}")
+            logger.error("循环失败: %s", e)
             return False
     
+    async def _submit_leg(self, side: str, cycle_id: int, leg: str, state: MarketState,
+                          size: Optional[float] = None, tolerance_bps: Optional[float] = None) -> dict:
+        """发出一腿 (默认每单大小); 给定 tolerance_bps 时发限价 IOC 单，否则发市价单"""
+        size = state.size if size is None else size
+        mode = "market" if tolerance_bps is None else "ioc"
+        if leg != "open":
+            # 触发时已留出开平两单的额度，IOC 重试和补单等后续订单各自等待额度
+            await self._wait_order_slot(leg)
+        sent = time.perf_counter()
+        if mode == "ioc":
+            response = await self.place_ioc_order(side, size, state, tolerance_bps)
+        else:
+            response = await self.place_market_order(side, size, state.market)
+        ack_ms = (time.perf_counter() - sent) * 1000
+        self.stages.record("open_ack" if leg == "open" else "close_ack", ack_ms)
+        log_event(logger, "order", account=self.name, market=state.market, cycle=cycle_id, leg=leg,
+                  side=side, mode=mode, size=size, price=response.get("price"), id=response.get("id"),
+                  ms=round(ack_ms, 1))
+        self._track_fill_latency(response.get("id"), sent)
+        now = time.time()
+        self.rate_limiter.record_order(now)
+        if self.journal:
+            self.journal.record_order(now)
+        self.fill_ledger.register_order(response.get("id"), cycle_id, leg)
+        cycle = self.fill_ledger.get_cycle(cycle_id)
+        self.execution.register(response.get("id"), mode, size, cycle.trigger_mid if cycle else state.bbo.mid_price)
+        return response
+    
+    async def _wait_order_slot(self, leg: str):
+        """限速额度用完时等到下一个可用额度 (持仓必须平掉，不能跳过)"""
+        wait = self.rate_limiter.next_slot()
+        if wait > 0:
+            logger.warning("限速额度已用完，%s 腿等待 %.1fs", leg, wait)
+            await asyncio.sleep(wait)
+    
+    async def _ioc_leg(self, side: str, cycle_id: int, leg: str, state: MarketState,
+                       size: float, tolerance_bps: float) -> float:
+        """发一张 IOC 单并等它结束，返回实际成交数量"""
+        response = await self._submit_leg(side, cycle_id, leg, state, size, tolerance_bps)
+        order = await settle_order(self.order_gateway, response, IOC_SETTLE_TIMEOUT_SEC)
+        filled = filled_size(order, size)
+        self.execution.record_result("ioc", size, filled)
+        if filled < size - 1e-12:
+            log_event(logger, "ioc", account=self.name, market=state.market, cycle=cycle_id, leg=leg,
+                      side=side, size=size, filled=filled, id=response.get("id"))
+        return filled
+    
+    def _track_fill_latency(self, order_id: Optional[str], sent: float):
+        if not order_id:
+            return
+        filled = self.early_fills.pop(order_id, None)
+        if filled is not None:
+            self.stages.record("fill", (filled - sent) * 1000)
+        else:
+            self.order_sent[order_id] = sent
+    
+    def on_fill_timing(self, fill: Dict[str, Any]):
+        """fills 频道回调: 记录下单发出 → 收到成交的延迟 (每单只记第一笔成交)"""
+        now = time.perf_counter()
+        order_id = fill.get("order_id")
+        sent = self.order_sent.pop(order_id, None)
+        if sent is not None:
+            self.stages.record("fill", (now - sent) * 1000)
+            return
+        if len(self.early_fills) > 1000:
+            # 部分成交的后续记录不会被取走，定期清理
+            self.early_fills.clear()
+        self.early_fills[order_id] = now
+    
+    # ==================== 控制命令 ====================
+    
+    def control_commands(self) -> Dict[str, Any]:
+        return {
+            "stop": self.request_stop,
+            "pause": lambda: self.set_paused(True),
+            "resume": lambda: self.set_paused(False),
+            "threshold": self.set_threshold,
+            "size": self.resize,
+            "reload": self.reload,
+            "status": self.status_text,
+        }
+    
+    def _market_state(self, market: str) -> MarketState:
+        state = self.markets.get(market.upper())
+        if state is None:
+            raise ValueError(f"未监控的市场 {market}")
+        return state
+    
+    def request_stop(self) -> str:
+        self.running = False
+        # 立即唤醒等待触发的主循环
+        self.trigger_engine.event.set()
+        return f"{self.tag}正在停止"
+    
+    def set_paused(self, paused: bool) -> str:
+        self.trigger_engine.paused = paused
+        if not paused:
+            self.rearm()
+        return f"{self.tag}{'已暂停' if paused else '已继续'}"
+    
+    def set_threshold(self, market: str, max_spread: str, min_depth: Optional[str] = None) -> str:
+        state = self._market_state(market)
+        state.max_spread = float(max_spread)
+        if min_depth is not None:
+            state.min_depth = float(min_depth)
+        self.trigger_engine.set_market(state.market, state.max_spread, state.min_depth, state.size)
+        return f"{self.tag}{state.market} 价差≤{state.max_spread}% 深度≥{state.min_depth}"
+    
+    async def resize(self, market: str, size: str) -> str:
+        state = self._market_state(market)
+        new_size = float(size)
+        if new_size <= 0:
+            raise ValueError(f"无效大小 {size}")
+        if new_size > self.max_order_size:
+            raise ValueError(f"每单 {new_size} 超过上限 {self.max_order_size} (MAX_ORDER_SIZE_BTC)")
+        state.size = new_size
+        self.trigger_engine.set_market(state.market, state.max_spread, state.min_depth, new_size)
+        if state.order_factory:
+            await state.order_factory.resize(new_size)
+        return f"{self.tag}{state.market} 每单 {new_size}"
+    
+    async def apply_config(self, cfg) -> list[str]:
+        """把重新加载的配置应用到运行中的实例 (市场参数、节奏、行情年龄)"""
+        changes = []
+        self.max_order_size = cfg.MAX_ORDER_SIZE_BTC
+        for market, params in (cfg.MARKETS or {cfg.MARKET: {}}).items():
+            state = self.markets.get(market)
+            if state is None:
+                changes.append(f"{market} 未订阅 (新增市场需重启)")
+                continue
+            size = params.get("size", cfg.ORDER_SIZE_BTC)
+            if size != state.size:
+                changes.append(await self.resize(market, size))
+            max_spread = params.get("max_spread", cfg.MAX_SPREAD_PERCENT)
+            min_depth = params.get("min_depth", cfg.MIN_DEPTH_BTC)
+            if (max_spread, min_depth) != (state.max_spread, state.min_depth):
+                changes.append(self.set_threshold(market, max_spread, min_depth))
+        if cfg.PACING_ENABLED != self.trigger_engine.pacing:
+            self.trigger_engine.pacing = cfg.PACING_ENABLED
+            changes.append(f"{self.tag}节奏控制 {'开' if cfg.PACING_ENABLED else '关'}")
+        if cfg.MAX_FEED_AGE_MS != self.trigger_engine.max_feed_age_ms:
+            self.trigger_engine.max_feed_age_ms = cfg.MAX_FEED_AGE_MS
+            changes.append(f"{self.tag}行情最大年龄 {cfg.MAX_FEED_AGE_MS}ms")
+        return changes
+    
+    async def reload(self) -> str:
+        changes = await self.apply_config(reload_config())
+        return "; ".join(changes) if changes else "配置无变化"
+    
+    def status_text(self) -> str:
+        stats = self.pnl_tracker.get_stats()
+        min_o, hr_o, day_o = self.rate_limiter.get_counts()
+        state = "已暂停" if self.trigger_engine.paused else ("运行中" if self.running else "已停止")
+        return (f"{self.tag}{state} | 循环 {self.cycle_count}/{MAX_CYCLES} | 盈亏 {stats['pnl']:+.4f} | "
+                f"限速 {min_o}/{hr_o}/{day_o}")
+    
+    def log_fill(self, fill: Dict[str, Any]):
+        log_event(logger, "fill", account=self.name, market=fill.get("market"), order_id=fill.get("order_id"),
+                  side=fill.get("side"), price=fill.get("price"), size=fill.get("size"), fee=fill.get("fee"))
+    
+    def metric_families(self, labels: str = "") -> Families:
+        """本账户的 Prometheus 指标 (labels 如 'account="acct1"')"""
+        families = self.stages.families("scalper", labels)
+        stats = self.pnl_tracker.get_stats()
+        min_o, hr_o, day_o = self.rate_limiter.get_counts()
+        extra = f",{labels}" if labels else ""
+        families.update({
+            "scalper_cycles_total": ("counter", "成功循环数", [
+                sample("scalper_cycles_total", self.successful_cycles, labels)]),
+            "scalper_failed_cycles_total": ("counter", "失败循环数", [
+                sample("scalper_failed_cycles_total", self.failed_cycles, labels)]),
+            "scalper_orders_in_window": ("gauge", "限速窗口内下单数", [
+                sample("scalper_orders_in_window", n, f'window="{w}"{extra}')
+                for w, n in (("minute", min_o), ("hour", hr_o), ("day", day_o))]),
+            "scalper_pace_ratio": ("gauge", "下单速度 / 日额度均匀节奏", [
+                sample("scalper_pace_ratio", round(self.rate_limiter.pace_ratio(), 4), labels)]),
+            "scalper_trigger_rejected_total": ("counter", "满足价差条件但未触发的次数", [
+                sample("scalper_trigger_rejected_total", self.trigger_engine.rejected_rate_limit, f'reason="rate_limit"{extra}'),
+                sample("scalper_trigger_rejected_total", self.trigger_engine.rejected_pacing, f'reason="pacing"{extra}'),
+                sample("scalper_trigger_rejected_total", self.trigger_engine.rejected_stale, f'reason="stale"{extra}'),
+                sample("scalper_trigger_rejected_total", self.trigger_engine.rejected_depth, f'reason="depth"{extra}'),
+                sample("scalper_trigger_rejected_total", self.trigger_engine.rejected_signal, f'reason="signal"{extra}')]),
+            "scalper_pnl_usd": ("gauge", "余额盈亏 (USD)", [
+                sample("scalper_pnl_usd", round(stats["pnl"], 6), labels)]),
+            "scalper_volume_usd": ("gauge", "累计成交量 (USD)", [
+                sample("scalper_volume_usd", round(stats["volume"], 2), labels)]),
+        })
+        families.update(self.execution.families("scalper", labels))
+        if not self.shared_feed:
+            families.update(self.feed_monitor.families("scalper", labels))
+        return families
+    
+    async def _run_legs_ioc(self, open_side: str, close_side: str, cycle_id: int,
+                            price: float, state: MarketState) -> Optional[tuple[float, float, float]]:
+        """限价 IOC 两腿: 开仓零成交则放弃 (返回 None)，平仓只平实际成交量，剩余量由 _flatten 补平
+
+        某腿报错时 (如撤单后仍查不到结束状态) 成交数量未知，不按零成交猜测，以持仓推送确认的持仓作为剩余量补平。
+
+        Returns:
+            (平仓参考价, 暴露窗口 ms, 开仓成交数量)
+        """
+        sent = time.perf_counter()
+        if CLOSE_LEG_MODE == "concurrent":
+            position = self.account_stream.get_position_size(state.market) if self.account_stream else 0.0
+            if abs(position) >= state.size / 2:
+                raise RuntimeError(f"并发模式要求无持仓，当前持仓 {position}")
+            results = await asyncio.gather(
+                self._ioc_leg(open_side, cycle_id, "open", state, state.size, LIMIT_TOLERANCE_BPS),
+                self._ioc_leg(close_side, cycle_id, "close", state, state.size, LIMIT_TOLERANCE_BPS),
+                return_exceptions=True
+            )
+            errors = [r for r in results if isinstance(r, Exception)]
+            if errors:
+                for leg, r in zip(("open", "close"), results):
+                    if isinstance(r, Exception):
+                        logger.warning("并发模式 IOC %s 腿失败，按持仓补平: %s", leg, r)
+                await self._flatten(open_side, close_side, cycle_id, state,
+                                    await self._position_residual(open_side, state))
+                if len(errors) == len(results):
+                    raise errors[0]
+                # 报错的腿成交数量未知，成交量只按已确认的腿计
+                filled = max(r for r in results if not isinstance(r, Exception))
+                if filled <= 0:
+                    return None
+                return state.bbo.mid_price or price, (time.perf_counter() - sent) * 1000, filled
+            opened, closed = results
+        else:
+            try:
+                opened = await self._ioc_leg(open_side, cycle_id, "open", state, state.size, LIMIT_TOLERANCE_BPS)
+            except Exception as e:
+                logger.warning("IOC 开仓腿失败，按持仓补平: %s", e)
+                await self._flatten(open_side, close_side, cycle_id, state,
+                                    await self._position_residual(open_side, state))
+                raise
+            if opened <= 0:
+                return None
+            if CLOSE_LEG_MODE == "sequential" and CLOSE_LEG_DELAY_SEC > 0:
+                await asyncio.sleep(CLOSE_LEG_DELAY_SEC)
+            try:
+                closed = await self._ioc_leg(close_side, cycle_id, "close", state, opened, LIMIT_TOLERANCE_BPS)
+            except Exception as e:
+                logger.warning("IOC 平仓腿失败，按持仓补平: %s", e)
+                await self._flatten(open_side, close_side, cycle_id, state,
+                                    await self._position_residual(open_side, state))
+                return state.bbo.mid_price or price, (time.perf_counter() - sent) * 1000, opened
+        
+        await self._flatten(open_side, close_side, cycle_id, state, round(opened - closed, 8))
+        if opened <= 0 and closed <= 0:
+            return None
+        close_price = state.bbo.mid_price or price
+        return close_price, (time.perf_counter() - sent) * 1000, max(opened, closed)
+    
+    async def _position_residual(self, open_side: str, state: MarketState) -> float:
+        """按持仓推送确认的净持仓 (正数为开仓方向)，等推送跟上后读取"""
+        position = await self._settled_position(state, flat=1e-9)
+        return round(position if open_side == "BUY" else -position, 8)
+    
+    async def _flatten(self, open_side: str, close_side: str, cycle_id: int, state: MarketState, residual: float):
+        """补平本循环的净持仓 (正数为开仓方向): 逐次放宽容忍度重试 IOC，仍有剩余则市价补齐"""
+        for attempt in range(IOC_CLOSE_RETRIES):
+            if abs(residual) < 1e-9:
+                return
+            if self.rate_limiter.next_slot() > 0:
+                # 没有额度时不再用 IOC 试探，等额度直接市价补齐
+                break
+            side = close_side if residual > 0 else open_side
+            self.execution.close_retries += 1
+            try:
+                filled = await self._ioc_leg(side, cycle_id, "close", state, abs(residual),
+                                             LIMIT_TOLERANCE_BPS * (attempt + 2))
+            except Exception as e:
+                logger.warning("IOC 补平失败，按持仓重新确认剩余量: %s", e)
+                residual = await self._position_residual(open_side, state)
+                continue
+            residual = round(residual - filled if residual > 0 else residual + filled, 8)
+        if abs(residual) >= 1e-9:
+            self.execution.fallbacks += 1
+            side = close_side if residual > 0 else open_side
+            logger.warning("IOC 平仓剩余 %s 未成交，市价补齐 %s", abs(residual), side)
+            await self._submit_leg(side, cycle_id, "close", state, abs(residual))
+    
+    async def _run_legs_sequential(self, open_side: str, close_side: str, cycle_id: int,
+                                   price: float, state: MarketState) -> tuple[float, float]:
+        """开仓确认后再平仓 (ack 模式不等待)"""
+        open_sent = time.perf_counter()
+        await self._submit_leg(open_side, cycle_id, "open", state)
+        if CLOSE_LEG_MODE == "sequential" and CLOSE_LEG_DELAY_SEC > 0:
+            await asyncio.sleep(CLOSE_LEG_DELAY_SEC)
+        
+        # 开仓期间 BBO 持续更新，平仓按最新盘口计价
+        close_price = state.bbo.mid_price or price
+        await self._submit_leg(close_side, cycle_id, "close", state)
+        return close_price, (time.perf_counter() - open_sent) * 1000
+    
+    async def _run_legs_concurrent(self, open_side: str, close_side: str, cycle_id: int,
+                                   price: float, state: MarketState) -> tuple[float, float]:
+        """开平两腿同时发出，单腿失败时补发该腿使净持仓归零"""
+        position = self.account_stream.get_position_size(state.market) if self.account_stream else 0.0
+        if abs(position) >= state.size / 2:
+            raise RuntimeError(f"并发模式要求无持仓，当前持仓 {position}")
+        
+        legs = ((open_side, "open"), (close_side, "close"))
+        sent = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._submit_leg(side, cycle_id, leg, state) for side, leg in legs),
+            return_exceptions=True
+        )
+        
+        failed = [(side, leg) for (side, leg), r in zip(legs, results) if isinstance(r, Exception)]
+        if len(failed) == 2:
+            raise results[0]
+        if failed:
+            side, leg = failed[0]
+            # 超时类失败时订单可能已被交易所接受，先按持仓确认该腿是否真的没成交，避免补发后持仓翻倍
+            position = await self._settled_position(state)
+            if abs(position) < state.size / 2:
+                logger.warning("并发模式 %s 腿报错但持仓已归零，不补发: %s", leg, results[legs.index(failed[0])])
+            else:
+                side = "SELL" if position > 0 else "BUY"
+                logger.warning("并发模式 %s 腿失败，持仓 %s，补发 %s: %s", leg, position, side,
+                               results[legs.index(failed[0])])
+                await self._submit_leg(side, cycle_id, leg, state)
+        
+        close_price = state.bbo.mid_price or price
+        return close_price, (time.perf_counter() - sent) * 1000
+    
+    async def _settled_position(self, state: MarketState, flat: Optional[float] = None) -> float:
+        """等持仓推送跟上 (最多 POSITION_SETTLE_SEC，持仓绝对值小于 flat 即视为归零返回)，返回当前持仓
+
+        flat 默认半个每单大小 (整单腿是否成交); IOC 部分成交的剩余量更小，传入更小的值。
+        """
+        flat = state.size / 2 if flat is None else flat
+        deadline = time.perf_counter() + POSITION_SETTLE_SEC
+        position = self.account_stream.get_position_size(state.market)
+        while abs(position) >= flat and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+            position = self.account_stream.get_position_size(state.market)
+        return position
+    
     async def shutdown(self):
         self.running = False
+        if self.control:
+            # 先恢复终端模式再打印统计
+            await self.control.close()
+        if self.reconcile_task:
+            self.reconcile_task.cancel()
+        if self.fills_task:
+            self.fills_task.cancel()
+            # 等进行中的定期对账退出 (进度已落盘)，下面的最终对账才会真正拉取
+            await asyncio.gather(self.fills_task, return_exceptions=True)
+        if self.render_task:
+            self.render_task.cancel()
+        if self.clock_task:
+            self.clock_task.cancel()
+        for task in self.warm_tasks:
+            task.cancel()
+        for state in self.markets.values():
+            if state.order_factory:
+                state.order_factory.close()
         
         final_balance = self.get_account_balance()
         if final_balance > 0:
@@ -600,10 +1241,12 @@ class WebSocketScalper:
         # 清屏后打印最终统计
         print("\n" * 2)
         print("=" * 70)
-        print("📊 策略统计")
+        print(f"📊 {self.tag}策略统计")
         print("=" * 70)
         print(f"   循环: {self.cycle_count} (成功: {self.successful_cycles}, 失败: {self.failed_cycles})")
         print(f"   方向: 多{stats['long']}次 | 空{stats['short']}次")
+        if len(self.markets) > 1:
+            print("   市场: " + " | ".join(f"{s.market} {s.cycles}次" for s in self.markets.values()))
         print(f"   运行: {elapsed/60:.1f} 分钟")
         print("-" * 70)
         print(f"💰 余额:")
@@ -613,28 +1256,73 @@ class WebSocketScalper:
         print("-" * 70)
         print(f"📈 交易量: ${stats['volume']:,.2f} USD")
         print("-" * 70)
-        # 从 API 拉取真实成交额
-        try:
-            start_at = int(self.start_time * 1000) if self.start_time else None
-            fills = self.paradex.api_client.fetch_fills(params={
-                "market": MARKET,
-                "start_at": start_at,
-                "page_size": 1000
-            })
-            results = fills.get("results", [])
-            real_volume = sum(float(f.get("price", 0)) * float(f.get("size", 0)) for f in results)
-            print(f"💹 真实成交额: ${real_volume:,.2f} USDC ({len(results)} 笔)")
+        # 从 API 分页拉取真实成交额 (接着会话期间的定期对账继续)
+        if self.fills_reconciler:
+            try:
+                fills = await self.fills_reconciler.run()
+                print(f"💹 真实成交额: ${fills['volume']:,.2f} USDC ({fills['count']} 笔, {fills['pages']} 页)")
+                print(f"   手续费: ${fills['fees']:.4f} | 已实现盈亏: ${fills['realized_pnl']:+.4f}")
+                print("-" * 70)
+            except Exception as e:
+                logger.error(f"获取成交记录失败: {e}")
+        ledger = self.fill_ledger.get_stats()
+        if ledger["fills"]:
+            print(f"🧾 成交账本: {ledger['fills']} 笔 | 盈亏 ${ledger['pnl']:+.4f} | 磨损 ¥{ledger['per_10k']:.2f}/万 | 滑点 {ledger['slippage_bps']:.2f}bp")
+            ledger_file = account_path(LEDGER_EXPORT_FILE, self.name)
+            if ledger_file:
+                try:
+                    rows = self.fill_ledger.export_csv(ledger_file)
+                    print(f"   已导出 {rows} 个循环 → {ledger_file}")
+                except Exception as e:
+                    logger.error(f"导出成交账本失败: {e}")
             print("-" * 70)
-        except Exception as e:
-            logger.error(f"获取成交记录失败: {e}")
         if latency["recent"]:
             print(f"⏱️ 延迟: 平均 {latency['avg']:.0f}ms | 最小 {latency['min']:.0f}ms | 最大 {latency['max']:.0f}ms")
+            print(f"⏱️ 暴露窗口 ({CLOSE_LEG_MODE}): 平均 {latency['exposure_avg']:.0f}ms | 最大 {latency['exposure_max']:.0f}ms")
+        for mode, ex in self.execution.get_stats().items():
+            print(f"🎯 下单 {mode}: {ex['orders']} 单 | 成交率 {ex['fill_rate'] * 100:.1f}% "
+                  f"({ex['filled']:.4f}/{ex['requested']:.4f}) | 成本 {ex['cost_bps']:.2f}bp | "
+                  f"零成交 {ex['zero_fills']} | 部分成交 {ex['partial_fills']}")
+        if any(s.order_mode == "ioc" for s in self.markets.values()):
+            print(f"   开仓零成交放弃 {self.execution.missed} 次 | 平仓重试 {self.execution.close_retries} 次 | "
+                  f"市价补齐 {self.execution.fallbacks} 次")
+        trigger = self.trigger_engine.get_stats()
+        if trigger["count"]:
+            print(f"⚡ 触发: {trigger['count']} 次 | tick→触发 平均 {trigger['avg']:.2f}ms | 最大 {trigger['max']:.2f}ms")
+            print(f"   限速拒绝 {self.trigger_engine.rejected_rate_limit} 次 | 节奏收紧拒绝 {self.trigger_engine.rejected_pacing} 次 | "
+                  f"行情过期拒绝 {self.trigger_engine.rejected_stale} 次 | L2 深度拒绝 {self.trigger_engine.rejected_depth} 次 | "
+                  f"信号观望 {self.trigger_engine.rejected_signal} 次")
+        feed = self.feed_monitor.get_stats()
+        if feed["messages"]:
+            print(f"📡 行情: {feed['messages']} 条 | 单向延迟 p50 {feed['p50']:.1f}ms p99 {feed['p99']:.1f}ms "
+                  f"最大 {feed['max']:.1f}ms | 时钟偏差 {feed['offset']:+.1f}ms")
+            print(f"   跳号 {feed['gaps']} 次 (丢 {feed['missed']} 条) | 旧消息丢弃 {feed['stale']} 条 | 序号重置 {feed['resets']} 次")
+        if ORDER_BOOK_ENABLED and not self.shared_feed:
+            for state in self.markets.values():
+                book = state.book.get_stats()
+                print(f"📚 L2 盘口 {state.market}: {book['updates']} 次更新 | {book['levels']} 档 | "
+                      f"跳号 {book['gaps']} 次 | 重建 {book['resyncs']} 次")
+        if self.stages.get("cycle").count:
+            print("-" * 70)
+            print(f"📐 {'阶段':<10} {'次数':>6} {'p50':>8} {'p99':>8} {'p999':>8} {'最大':>8}  (ms)")
+            for stage in self.stages.histograms:
+                summary = self.stages.summary(stage)
+                if summary["count"]:
+                    print(f"   {stage:<10} {summary['count']:>6} {summary['p50']:>8.1f} {summary['p99']:>8.1f} "
+                          f"{summary['p999']:>8.1f} {summary['max']:>8.1f}")
         print("=" * 70)
         
-        try:
-            await self.paradex.ws_client.close()
-        except:
-            pass
+        if self.metrics_server:
+            await self.metrics_server.close()
+        if self.session:
+            await self.session.close()
+        if self.order_gateway:
+            self.order_gateway.close()
+        if self.journal:
+            self.journal.close()
+        for state in self.markets.values():
+            if state.tick_recorder:
+                state.tick_recorder.close()
         
         print("👋 已退出")
 
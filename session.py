@@ -0,0 +1,133 @@
+"""
+Paradex 会话管理 (L2-Only 认证)
+
+ParadexClient 和 WebSocketScalper 共用:
+1. 创建 ParadexSubkey 并初始化账户
+2. 使用 token_usage=interactive 获取 JWT (Retail 免费交易)
+3. 后台任务在 token 过期前提前刷新，刷新请求在线程中执行，
+   完成后一次性替换 Authorization 头，交易路径上不再同步检查/刷新
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from paradex_py import ParadexSubkey
+
+logger = logging.getLogger(__name__)
+
+
+class ParadexSession:
+    """Paradex 会话 (持有 HTTP/WS 客户端，负责 JWT 认证与后台刷新)"""
+
+    # JWT 有效期 5 分钟，提前 1 分钟刷新
+    TOKEN_TTL_SEC = 300
+    REFRESH_AFTER_SEC = 240
+    RETRY_DELAY_SEC = 5
+
+    def __init__(self, env: str, l2_private_key: str, l2_address: str,
+                 use_interactive_token: bool = True):
+        """
+        Args:
+            env: PARADEX_ENV 配置值 (MAINNET / TESTNET / LOCAL)
+            l2_private_key: L2 私钥
+            l2_address: 主账户 L2 地址
+            use_interactive_token: 使用 interactive token 实现免费交易 (有 500ms 延迟)
+        """
+        self.env = {"MAINNET": "prod", "LOCAL": "local"}.get(env, "testnet")
+        self.l2_private_key = l2_private_key
+        self.l2_address = l2_address
+        self.use_interactive = use_interactive_token
+
+        self.paradex: Optional[ParadexSubkey] = None
+        self.last_auth_time = 0.0
+        self.refresh_count = 0
+        self.refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def api_client(self):
+        return self.paradex.api_client
+
+    @property
+    def ws_client(self):
+        return self.paradex.ws_client
+
+    @property
+    def account(self):
+        return self.paradex.account
+
+    async def connect(self):
+        """创建客户端、初始化账户并认证"""
+        if self.env == "local":
+            from config import LOCAL_API_URL, LOCAL_WS_URL
+            from local_paradex import LocalParadex
+            self.paradex = LocalParadex(LOCAL_API_URL, LOCAL_WS_URL, self.l2_address)
+        else:
+            self.paradex = ParadexSubkey(
+                env=self.env,
+                l2_private_key=self.l2_private_key,
+                l2_address=self.l2_address
+            )
+        # 初始化账户 (这会调用默认的 auth)
+        await self.paradex.init_account()
+        self.last_auth_time = time.time()
+
+        if self.use_interactive:
+            self.authenticate()
+
+    def authenticate(self):
+        """使用 interactive token 重新认证 (免费交易)"""
+        from paradex_py.api.models import AuthSchema
+
+        if not self.paradex or not self.paradex.account:
+            raise RuntimeError("Account not initialized")
+
+        api_client = self.paradex.api_client
+        account = self.paradex.account
+
+        # 关键: 添加 token_usage=interactive 查询参数
+        headers = account.auth_headers()
+        path = f"auth/{hex(account.l2_public_key)}?token_usage=interactive"
+        res = api_client.post(api_url=api_client.api_url, path=path, headers=headers)
+
+        data = AuthSchema().load(res, unknown="exclude", partial=True)
+        # 新 token 准备好后一次性替换，在途请求继续使用旧 token
+        api_client.auth_timestamp = int(time.time())
+        account.set_jwt_token(data.jwt_token)
+        api_client.client.headers["Authorization"] = f"Bearer {data.jwt_token}"
+
+        self.last_auth_time = time.time()
+        logger.info("✅ Interactive Token 认证成功!")
+
+    def token_age(self) -> float:
+        return time.time() - self.last_auth_time
+
+    def start_refresh(self):
+        """启动后台刷新任务 (需在事件循环中调用)"""
+        if self.use_interactive and self.refresh_task is None:
+            self.refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(max(self.REFRESH_AFTER_SEC - self.token_age(), 0))
+            try:
+                await asyncio.to_thread(self.authenticate)
+                self.refresh_count += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # token 仍在有效期内，稍后重试
+                logger.error(f"❌ Token 刷新失败 (已使用 {self.token_age():.0f}s): {e}")
+                await asyncio.sleep(self.RETRY_DELAY_SEC)
+
+    async def close(self):
+        """停止刷新并关闭客户端"""
+        if self.refresh_task:
+            self.refresh_task.cancel()
+            self.refresh_task = None
+        if self.paradex and self.paradex.ws_client:
+            try:
+                await self.paradex.ws_client.close()
+            except:
+                pass
@@ -0,0 +1,186 @@
+"""
+方向信号 (可插拔，逐 tick 增量计算)
+
+原来的方向规则只比较买一/卖一数量 (bid_size >= ask_size 做多)，且每个满足价差条件的 tick 都交易。
+这里把 "做多/做空/不做" 交给可替换的信号模型，每个 BBO tick 和成交只做常数次运算，不回看历史:
+1. 盘口失衡: (买一量 - 卖一量) / (买一量 + 卖一量)，取值 [-1, 1]
+2. 微价格漂移: microprice = (买一 × 卖一量 + 卖一 × 买一量) / (买一量 + 卖一量)，
+   与其按时间衰减的 EMA (半衰期 half_life 秒) 之差，单位 bp
+3. 成交流: trades 频道的带符号成交量 (主动买为正) 按时间指数衰减累加 (半衰期 flow_half_life 秒)
+
+模型 (config.DIRECTION_MODEL):
+    size     原规则，始终交易
+    signal   三项加权打分 (漂移和成交流经 tanh 归一化)，|score| < min_score 时不交易
+
+上线前先在录制数据上离线评估，与原规则对比磨损:
+    python signals.py bbo_ticks.bin --spreads 0.0004,0.0008
+录制文件只有 BBO，离线评估中成交流一项恒为 0。
+"""
+
+import argparse
+import math
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any
+
+import numpy as np
+
+LN2 = math.log(2)
+
+
+class DirectionModel(ABC):
+    """方向模型接口: update/on_trade 喂数据，decide 返回 +1 做多 / -1 做空 / 0 不交易
+
+    update 和 decide 为抽象方法，缺少实现的模型在创建时就报错，不会等到 BBO 回调里才失败。
+    """
+
+    uses_trades = False   # 为 True 时需要订阅 trades 频道
+
+    @abstractmethod
+    def update(self, ts: float, bid: float, ask: float, bid_size: float, ask_size: float):
+        ...
+
+    def on_trade(self, ts: float, side: str, size: float):
+        pass
+
+    @abstractmethod
+    def decide(self, now: float) -> int:
+        ...
+
+
+class SizeRule(DirectionModel):
+    """原规则: 买一量 ≥ 卖一量做多"""
+
+    def __init__(self):
+        self.bid_size = 0.0
+        self.ask_size = 0.0
+
+    def update(self, ts: float, bid: float, ask: float, bid_size: float, ask_size: float):
+        self.bid_size = bid_size
+        self.ask_size = ask_size
+
+    def decide(self, now: float) -> int:
+        return 1 if self.bid_size >= self.ask_size else -1
+
+
+class CompositeSignal(DirectionModel):
+    """盘口失衡 + 微价格漂移 + 成交流加权打分"""
+
+    def __init__(self, w_imbalance: float = 1.0, w_drift: float = 1.0, w_flow: float = 0.5,
+                 half_life: float = 1.0, drift_scale_bps: float = 0.2,
+                 flow_half_life: float = 5.0, flow_scale: float = 0.05, min_score: float = 0.3):
+        """
+        Args:
+            w_imbalance / w_drift / w_flow: 三项权重
+            half_life: 微价格 EMA 半衰期 (秒)
+            drift_scale_bps: 漂移归一化尺度 (bp)，tanh(漂移 / 尺度)
+            flow_half_life: 成交流衰减半衰期 (秒)
+            flow_scale: 成交流归一化尺度 (基础币数量)
+            min_score: |打分| 低于该值时不交易
+        """
+        self.w_imbalance = w_imbalance
+        self.w_drift = w_drift
+        self.w_flow = w_flow
+        self.decay = LN2 / half_life
+        self.drift_scale_bps = drift_scale_bps
+        self.flow_decay = LN2 / flow_half_life
+        self.flow_scale = flow_scale
+        self.min_score = min_score
+        self.uses_trades = w_flow != 0
+
+        self.ts = 0.0
+        self.imbalance = 0.0
+        self.micro_ema: Optional[float] = None
+        self.drift_bps = 0.0
+        self.flow = 0.0
+        self.flow_ts = 0.0
+
+    def update(self, ts: float, bid: float, ask: float, bid_size: float, ask_size: float):
+        total = bid_size + ask_size
+        if total <= 0 or bid <= 0 or ask <= 0:
+            return
+        micro = (bid * ask_size + ask * bid_size) / total
+        if self.micro_ema is None:
+            self.micro_ema = micro
+        else:
+            alpha = 1.0 - math.exp(-max(0.0, ts - self.ts) * self.decay)
+            self.micro_ema += alpha * (micro - self.micro_ema)
+        self.imbalance = (bid_size - ask_size) / total
+        self.drift_bps = (micro - self.micro_ema) / ((bid + ask) * 0.5) * 10000
+        self.ts = ts
+
+    def on_trade(self, ts: float, side: str, size: float):
+        self.flow = self._flow_at(ts) + (size if side == "BUY" else -size)
+        self.flow_ts = ts
+
+    def _flow_at(self, now: float) -> float:
+        if not self.flow:
+            return 0.0
+        return self.flow * math.exp(-max(0.0, now - self.flow_ts) * self.flow_decay)
+
+    def score(self, now: float) -> float:
+        return (self.w_imbalance * self.imbalance
+                + self.w_drift * math.tanh(self.drift_bps / self.drift_scale_bps)
+                + self.w_flow * math.tanh(self._flow_at(now) / self.flow_scale))
+
+    def decide(self, now: float) -> int:
+        score = self.score(now)
+        if abs(score) < self.min_score:
+            return 0
+        return 1 if score > 0 else -1
+
+
+MODELS = {"size": SizeRule, "signal": CompositeSignal}
+
+
+def create_model(name: str, params: Optional[Dict[str, Any]] = None) -> DirectionModel:
+    """按名称创建方向模型 (params 为构造参数，size 规则忽略)"""
+    if name not in MODELS:
+        raise ValueError(f"未知方向模型 {name} (可选: {', '.join(MODELS)})")
+    cls = MODELS[name]
+    if cls is SizeRule:
+        return SizeRule()
+    return cls(**(params or {}))
+
+
+def model_signs(ticks: Dict[str, np.ndarray], name: str, params: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """按录制顺序逐 tick 喂给模型，返回每个 tick 上的决策 (+1 / -1 / 0)"""
+    model = create_model(name, params)
+    signs = np.zeros(len(ticks["ts"]), dtype=np.int64)
+    columns = zip(ticks["ts"].tolist(), ticks["bid"].tolist(), ticks["ask"].tolist(),
+                  ticks["bid_size"].tolist(), ticks["ask_size"].tolist())
+    for i, (ts, bid, ask, bid_size, ask_size) in enumerate(columns):
+        model.update(ts, bid, ask, bid_size, ask_size)
+        signs[i] = model.decide(ts)
+    return signs
+
+
+def main():
+    from config import MAX_SPREAD_PERCENT, ORDER_SIZE_BTC, CLOSE_LEG_DELAY_SEC, SIGNAL_PARAMS
+    from backtest import load_ticks, run_grid, format_results, parse_floats
+
+    parser = argparse.ArgumentParser(description="方向模型离线评估 (与原规则对比)")
+    parser.add_argument("path", help="tick_recorder 录制文件")
+    parser.add_argument("--models", default=",".join(MODELS), help="方向模型列表")
+    parser.add_argument("--spreads", default=str(MAX_SPREAD_PERCENT), help="价差阈值列表 (%%)")
+    parser.add_argument("--depths", default="0.006", help="最小深度列表 (BTC)")
+    parser.add_argument("--delays", default="0.5", help="每单成交延迟列表 (秒)")
+    parser.add_argument("--close-delay", type=float, default=CLOSE_LEG_DELAY_SEC, help="开仓确认后平仓等待 (秒)")
+    parser.add_argument("--size", type=float, default=ORDER_SIZE_BTC, help="每单大小")
+    args = parser.parse_args()
+
+    ticks = load_ticks(args.path)
+    models = [m for m in args.models.split(",") if m]
+    print(f"📼 {len(ticks['ts'])} 条 tick | 模型: {', '.join(models)}")
+    for name in models:
+        signs = model_signs(ticks, name, SIGNAL_PARAMS)
+        active = np.count_nonzero(signs)
+        print(f"   {name:<8} 交易 tick {active / max(len(signs), 1) * 100:.1f}% | "
+              f"做多 {np.count_nonzero(signs > 0)} | 做空 {np.count_nonzero(signs < 0)}")
+
+    results = run_grid(ticks, parse_floats(args.spreads), parse_floats(args.depths), models,
+                       parse_floats(args.delays), args.close_delay, args.size, SIGNAL_PARAMS)
+    print(format_results(results, len(results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+限速与会话状态持久化 (追加写日志 + 压缩)
+
+RateLimiter 和循环计数原来只在内存中，白天重启 scalper.py 会清零，
+要么超出 30/300/1000 限额被拒单，要么白白等待。这里把状态写成 JSON Lines 追加日志:
+    {"t": "order", "ts": ...}                             每笔下单
+    {"t": "cycle", "ts": ..., "market", "direction", "volume"}  每个成功循环
+    {"t": "baseline", "ts": ..., "balance": ...}          本轮会话的盈亏基准余额
+    {"t": "snapshot", ...}                                压缩后的完整状态
+启动时顺序重放 (几千行，毫秒级)，只保留最近 24 小时的下单时间戳;
+基准余额超过 24 小时则开始新会话。行数超过阈值时把内存状态写成一条 snapshot
+并原子替换文件。日志不存在时可从 fetch_fills 的最近 24 小时成交反推下单时间。
+写入只进文件缓冲区，由事件循环在 flush_interval 秒后合并刷盘一次，下单路径上不做逐行 flush。
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Optional, Dict, Any
+
+from fills_reconciler import iter_fill_pages
+
+logger = logging.getLogger(__name__)
+
+
+class StateJournal:
+    """追加写状态日志"""
+
+    def __init__(self, path: str, window_sec: float = 86400, compact_every: int = 2000,
+                 flush_interval: float = 1.0):
+        """
+        Args:
+            path: 日志文件
+            window_sec: 下单时间戳和会话基准的保留时长
+            compact_every: 追加多少行后压缩一次
+            flush_interval: 追加后最多隔多久刷盘 (秒)，异常退出最多丢这段时间的记录
+        """
+        self.path = path
+        self.window_sec = window_sec
+        self.compact_every = compact_every
+        self.flush_interval = flush_interval
+        self.file = None
+        self.lines = 0
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+
+        self.orders: deque = deque()
+        self.cycles = 0
+        self.long_count = 0
+        self.short_count = 0
+        self.volume = 0.0
+        self.baseline: Optional[float] = None
+        self.baseline_ts = 0.0
+
+    # ==================== 读取 ====================
+
+    def load(self, now: Optional[float] = None) -> bool:
+        """重放日志恢复状态，返回日志是否存在"""
+        now = time.time() if now is None else now
+        if not os.path.exists(self.path):
+            self._open()
+            return False
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 异常退出时最后一行可能不完整
+                    logger.warning(f"状态日志跳过损坏行: {line[:80]!r}")
+                    continue
+                self._apply(record)
+
+        self._expire(now)
+        # 启动时压缩一次，丢掉过期记录
+        self.compact()
+        return True
+
+    def _apply(self, record: Dict[str, Any]):
+        kind = record.get("t")
+        if kind == "order":
+            self.orders.append(record["ts"])
+        elif kind == "cycle":
+            self.cycles += 1
+            self.volume += record.get("volume", 0.0)
+            if record.get("direction") == "LONG":
+                self.long_count += 1
+            else:
+                self.short_count += 1
+        elif kind == "baseline":
+            self._reset_session()
+            self.baseline = record["balance"]
+            self.baseline_ts = record["ts"]
+        elif kind == "snapshot":
+            self.orders = deque(record.get("orders", []))
+            self.cycles = record.get("cycles", 0)
+            self.long_count = record.get("long", 0)
+            self.short_count = record.get("short", 0)
+            self.volume = record.get("volume", 0.0)
+            self.baseline = record.get("baseline")
+            self.baseline_ts = record.get("baseline_ts", 0.0)
+
+    def _reset_session(self):
+        self.cycles = 0
+        self.long_count = 0
+        self.short_count = 0
+        self.volume = 0.0
+        self.baseline = None
+        self.baseline_ts = 0.0
+
+    def _expire(self, now: float):
+        while self.orders and now - self.orders[0] > self.window_sec:
+            self.orders.popleft()
+        if self.baseline is not None and now - self.baseline_ts > self.window_sec:
+            self._reset_session()
+
+    async def seed_from_fills(self, api_client, now: Optional[float] = None) -> int:
+        """日志缺失时从最近 24 小时成交反推下单时间 (同一订单取最早成交时间)，返回订单数"""
+        now = time.time() if now is None else now
+        end_ms = int(now * 1000)
+        start_ms = end_ms - int(self.window_sec * 1000)
+        first_fill: Dict[str, int] = {}
+        async for results, _ in iter_fill_pages(api_client, None, start_ms, end_ms):
+            for fill in results:
+                order_id = fill.get("order_id") or fill.get("id")
+                created_at = int(fill.get("created_at", 0))
+                if order_id and (order_id not in first_fill or created_at < first_fill[order_id]):
+                    first_fill[order_id] = created_at
+        for created_at in sorted(first_fill.values()):
+            self.record_order(created_at / 1000)
+        return len(first_fill)
+
+    # ==================== 写入 ====================
+
+    def _open(self):
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+
+    def _append(self, record: Dict[str, Any]):
+        self._open()
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.lines += 1
+        if self.lines >= self.compact_every:
+            self.compact()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self.flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 不在事件循环中 (离线工具) 直接刷盘
+            self.flush()
+            return
+        self.flush_handle = loop.call_later(self.flush_interval, self.flush)
+
+    def flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if self.file is not None:
+            self.file.flush()
+
+    def record_order(self, ts: Optional[float] = None):
+        ts = time.time() if ts is None else ts
+        self.orders.append(ts)
+        self._append({"t": "order", "ts": ts})
+
+    def record_cycle(self, market: str, direction: str, volume: float, ts: Optional[float] = None):
+        self._apply({"t": "cycle", "direction": direction, "volume": volume})
+        self._append({"t": "cycle", "ts": time.time() if ts is None else ts,
+                      "market": market, "direction": direction, "volume": volume})
+
+    def set_baseline(self, balance: float, ts: Optional[float] = None):
+        """开始新会话 (清零循环统计并记录基准余额)"""
+        record = {"t": "baseline", "ts": time.time() if ts is None else ts, "balance": balance}
+        self._apply(record)
+        self._append(record)
+
+    def compact(self, now: Optional[float] = None):
+        """把当前状态写成一条 snapshot 并原子替换日志"""
+        self._expire(time.time() if now is None else now)
+        snapshot = {
+            "t": "snapshot",
+            "orders": list(self.orders),
+            "cycles": self.cycles,
+            "long": self.long_count,
+            "short": self.short_count,
+            "volume": self.volume,
+            "baseline": self.baseline,
+            "baseline_ts": self.baseline_ts,
+        }
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot, separators=(",", ":")) + "\n")
+        os.replace(tmp, self.path)
+        self.lines = 0
+        self._open()
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,339 @@
+"""
+多账户调度 (单进程)
+
+每个子账户一个 WebSocketScalper，各自持有会话、RateLimiter、盈亏追踪、成交账本和私有频道;
+行情只订阅一份: BBO、L2 盘口和公开成交由第一个账户的 WebSocket 接收，
+原地更新所有账户共用的 BookTop / OrderBook / 方向模型。
+满足入场条件的 tick 只交给一个空闲且有限速余量的账户 (当日下单最少者优先),
+避免多个账户在同一个 tick 上抢同一档深度，总吞吐随账户数增长。
+
+控制命令 (control.py) 作用于全部账户: stop / pause / resume / threshold / size / reload / status。
+
+用法:
+    .env 中配置 L2_ACCOUNTS=0x地址1:0x私钥1,0x地址2:0x私钥2
+    python supervisor.py
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import List, Dict, Any, Optional
+
+from config import (
+    L2_ACCOUNTS, L2_ADDRESS, L2_PRIVATE_KEY, TICK_RECORD_FILE, EMERGENCY_STOP_FILE, METRICS_PORT,
+    CLOCK_SYNC_SEC, CONTROL_SOCKET, CONTROL_PORT, HEADLESS, PANEL_REFRESH_SEC, ORDER_BOOK_ENABLED,
+)
+from control import ControlPlane, reload_config
+from book_top import BookTop, bbo_data
+from feed_monitor import FeedMonitor, feed_age_ms
+from metrics import MetricsServer, render_prometheus
+from order_book import OrderBook
+from signals import DirectionModel
+from scalper import (
+    WebSocketScalper, FixedPanel,
+    MAX_ORDERS_PER_MINUTE, MAX_ORDERS_PER_HOUR, MAX_ORDERS_PER_DAY,
+)
+from tick_recorder import TickRecorder
+
+logger = logging.getLogger(__name__)
+
+
+class AccountSupervisor:
+    """多账户调度器 (共享行情 + 按账户分发触发)"""
+
+    def __init__(self, accounts: List[tuple[str, str]]):
+        """
+        Args:
+            accounts: [(L2 地址, L2 私钥), ...]
+        """
+        self.scalpers = [
+            WebSocketScalper(address, key, name=f"acct{i + 1}", shared_feed=True)
+            for i, (address, key) in enumerate(accounts)
+        ]
+        first = self.scalpers[0]
+        self.bbos: Dict[str, BookTop] = {market: state.bbo for market, state in first.markets.items()}
+        self.books: Dict[str, OrderBook] = {market: state.book for market, state in first.markets.items()}
+        self.signals: Dict[str, DirectionModel] = {market: state.signal for market, state in first.markets.items()}
+        # 所有账户共用第一个账户的盘口对象
+        for scalper in self.scalpers[1:]:
+            for market, state in scalper.markets.items():
+                state.bbo = self.bbos[market]
+                state.book = self.books[market]
+                state.signal = self.signals[market]
+                if ORDER_BOOK_ENABLED:
+                    scalper.trigger_engine.set_book(market, state.book)
+                scalper.trigger_engine.set_signal(market, state.signal)
+        for scalper in self.scalpers:
+            scalper.on_idle = self.redispatch
+        self.recorders: Dict[str, TickRecorder] = {}
+        self.tasks: List[asyncio.Task] = []
+        self.metrics_server: Optional[MetricsServer] = None
+        self.feed_monitor = FeedMonitor()
+        self.clock_task: Optional[asyncio.Task] = None
+        self.control: Optional[ControlPlane] = None
+        self.stop_event = asyncio.Event()
+
+        self.tick_count = 0
+        self.dispatched: Dict[str, int] = {s.name: 0 for s in self.scalpers}
+        self.no_idle_account = 0   # 满足条件但所有账户都在执行或限速
+        self.running = False
+        self.start_time = None
+        self.panel = FixedPanel(5 + len(self.bbos) + len(self.scalpers))
+        self.show_panel = not HEADLESS and sys.stdout.isatty()
+
+    async def on_bbo_update(self, channel, message):
+        """共享行情回调: 原地更新共用的盘口并分发触发"""
+        tick_ts = time.perf_counter()
+        try:
+            data = bbo_data(message)
+            if data is None:
+                return
+            market = data["market"]
+            bbo = self.bbos.get(market)
+            if bbo is None or not self.feed_monitor.accept(market, data.get("seq_no")):
+                return
+            if not bbo.update(data, time.time()):
+                return
+            self.feed_monitor.on_update(bbo)
+            self.signals[market].update(bbo.last_update, bbo.bid, bbo.ask, bbo.bid_size, bbo.ask_size)
+            self.tick_count += 1
+            self.dispatch(bbo, tick_ts)
+            recorder = self.recorders.get(market)
+            if recorder:
+                recorder.append(bbo.last_update, bbo.bid, bbo.ask, bbo.bid_size, bbo.ask_size)
+        except Exception as e:
+            logger.error(f"BBO 分发错误: {e}")
+
+    async def on_book_update(self, channel, message):
+        """共享 L2 盘口回调: 由第一个账户应用 (含失效重建)，深度变化后按当前 BBO 再分发一次"""
+        tick_ts = time.perf_counter()
+        try:
+            data = message["params"]["data"]
+            first = self.scalpers[0]
+            state = first.markets.get(data.get("market"))
+            if state is not None and first.apply_book(state, data):
+                self.dispatch(state.bbo, tick_ts)
+        except Exception as e:
+            logger.error(f"盘口分发错误: {e}")
+
+    def dispatch(self, bbo: BookTop, tick_ts: float) -> Optional[WebSocketScalper]:
+        """把满足条件的 tick 交给一个空闲账户，返回被选中的账户"""
+        # 所有账户的入场阈值相同，只判断一次
+        if not self.scalpers[0].trigger_engine.check(bbo):
+            return None
+        idle = [s for s in self.scalpers if s.running and s.trigger_engine.armed]
+        for scalper in sorted(idle, key=lambda s: s.rate_limiter.get_counts()[2]):
+            if scalper.trigger_engine.on_tick(bbo, tick_ts):
+                self.dispatched[scalper.name] += 1
+                return scalper
+        self.no_idle_account += 1
+        return None
+
+    def redispatch(self):
+        """某个账户回到空闲: 按各市场当前盘口再分发一次 (执行期间盘口可能已满足条件)"""
+        tick_ts = time.perf_counter()
+        for bbo in self.bbos.values():
+            if bbo.last_update > 0 and self.dispatch(bbo, tick_ts):
+                return
+
+    def update_display(self):
+        now = time.time()
+        elapsed_min = (now - self.start_time) / 60 if self.start_time else 0
+        lines = [
+            "═" * 70,
+            f"  👥 Paradex 多账户调度 | {len(self.scalpers)} 账户 | 运行 {elapsed_min:.1f}分钟",
+            "═" * 70,
+        ]
+        for market, bbo in self.bbos.items():
+            age = feed_age_ms(bbo, now) if bbo.last_update > 0 else 0
+            lines.append(
+                f"  💰 {market:<14} ${bbo.mid_price:<10.2f} 价差 {bbo.spread:.5f}%  "
+                f"深度 {bbo.bid_size:.4f}/{bbo.ask_size:.4f}  行情 {age:.0f}ms"
+            )
+        feed = self.feed_monitor.get_stats()
+        lines.append(
+            f"  📡 行情单向 {feed['p50']:.0f}/{feed['p99']:.0f}ms | 时钟偏差 {feed['offset']:+.0f}ms | "
+            f"跳号 {feed['gaps']} (丢 {feed['missed']})"
+        )
+
+        total_cycles = 0
+        total_pnl = 0.0
+        total_volume = 0.0
+        for s in self.scalpers:
+            stats = s.pnl_tracker.get_stats()
+            min_o, hr_o, day_o = s.rate_limiter.get_counts()
+            if not s.running:
+                status = "已停止"
+            elif s.trigger_engine.paused:
+                status = "已暂停"
+            elif s.trigger_engine.armed:
+                status = "空闲"
+            else:
+                status = "执行中"
+            address = f"{s.l2_address[:6]}…{s.l2_address[-4:]}"
+            lines.append(
+                f"  👤 {s.name} {address} | 循环 {s.cycle_count} | "
+                f"限速 {min_o}/{MAX_ORDERS_PER_MINUTE} {hr_o}/{MAX_ORDERS_PER_HOUR} {day_o}/{MAX_ORDERS_PER_DAY} | "
+                f"盈亏 {stats['pnl']:+.4f} | {status}"
+            )
+            total_cycles += s.cycle_count
+            total_pnl += stats["pnl"]
+            total_volume += stats["volume"]
+        lines.append(
+            f"  📊 合计: 循环 {total_cycles} | 成交量 ${total_volume / 1000:.1f}K | 盈亏 {total_pnl:+.4f} U | "
+            f"无空闲账户 {self.no_idle_account} 次"
+        )
+        self.panel.update(lines)
+
+    def render_metrics(self) -> str:
+        """各账户指标按 account 标签合并"""
+        families = [s.metric_families(f'account="{s.name}"') for s in self.scalpers]
+        families.append(self.feed_monitor.families())
+        return render_prometheus(families)
+
+    # ==================== 控制命令 ====================
+
+    def control_commands(self) -> Dict[str, Any]:
+        return {
+            "stop": self.request_stop,
+            "pause": lambda: self._each(lambda s: s.set_paused(True)),
+            "resume": lambda: self._each(lambda s: s.set_paused(False)),
+            "threshold": lambda *args: self._each(lambda s: s.set_threshold(*args)),
+            "size": lambda *args: self._gather(lambda s: s.resize(*args)),
+            "reload": self.reload,
+            "status": lambda: self._each(lambda s: s.status_text()),
+        }
+
+    def _each(self, action) -> str:
+        return " / ".join(action(s) for s in self.scalpers)
+
+    async def _gather(self, action) -> str:
+        return " / ".join(await asyncio.gather(*(action(s) for s in self.scalpers)))
+
+    def request_stop(self) -> str:
+        self.running = False
+        self.stop_event.set()
+        for s in self.scalpers:
+            s.request_stop()
+        return "正在停止全部账户"
+
+    async def reload(self) -> str:
+        cfg = reload_config()
+        changes = []
+        for s in self.scalpers:
+            changes.extend(await s.apply_config(cfg))
+        return "; ".join(changes) if changes else "配置无变化"
+
+    async def _run_account(self, scalper: WebSocketScalper):
+        try:
+            await scalper.main_loop()
+        finally:
+            scalper.running = False
+
+    async def start(self):
+        print("=" * 70)
+        print(f"🚀 Paradex 多账户调度 - {len(self.scalpers)} 个账户")
+        print("=" * 70)
+
+        results = await asyncio.gather(*(s.prepare() for s in self.scalpers), return_exceptions=True)
+        failed = [s for s, ok in zip(self.scalpers, results) if ok is not True]
+        for s in failed:
+            print(f"⚠️ {s.name} 启动失败，跳过")
+            if s.session:
+                await s.session.close()
+            if s.order_gateway:
+                s.order_gateway.close()
+        self.scalpers = [s for s in self.scalpers if s not in failed]
+        if not self.scalpers:
+            print("❌ 没有可用账户")
+            return
+
+        api_client = self.scalpers[0].paradex.api_client
+        offset = await self.feed_monitor.sync(api_client)
+        if offset is not None:
+            print(f"🕐 时钟偏差: {offset:+.1f}ms (RTT {self.feed_monitor.clock.rtt_ms:.1f}ms)")
+        self.clock_task = asyncio.create_task(self.feed_monitor.run_periodic(api_client, CLOCK_SYNC_SEC))
+
+        if TICK_RECORD_FILE:
+            root, ext = os.path.splitext(TICK_RECORD_FILE)
+            for i, market in enumerate(self.bbos):
+                path = TICK_RECORD_FILE if i == 0 else f"{root}.{market}{ext}"
+                self.recorders[market] = TickRecorder(path)
+
+        # 行情只在第一个账户的连接上订阅一次
+        await self.scalpers[0].subscribe_bbo(self.on_bbo_update, self.on_book_update)
+
+        if METRICS_PORT:
+            self.metrics_server = MetricsServer(self.render_metrics, port=METRICS_PORT)
+            await self.metrics_server.start()
+            print(f"📐 指标: http://127.0.0.1:{METRICS_PORT}/metrics")
+
+        self.running = True
+        self.start_time = time.time()
+        self.tasks = [asyncio.create_task(self._run_account(s)) for s in self.scalpers]
+
+        try:
+            self.control = ControlPlane(self.control_commands(), CONTROL_SOCKET, CONTROL_PORT, EMERGENCY_STOP_FILE)
+            print(f"🎛️ 控制: {' | '.join(await self.control.start())}")
+            print()
+            if self.show_panel:
+                self.panel.init_panel()
+            while self.running and any(not t.done() for t in self.tasks):
+                if self.show_panel:
+                    self.update_display()
+                try:
+                    await asyncio.wait_for(self.stop_event.wait(), PANEL_REFRESH_SEC)
+                except asyncio.TimeoutError:
+                    pass
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass
+        finally:
+            await self.shutdown()
+
+    async def shutdown(self):
+        self.running = False
+        if self.control:
+            await self.control.close()
+        if self.clock_task:
+            self.clock_task.cancel()
+        for s in self.scalpers:
+            s.running = False
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        for s in self.scalpers:
+            await s.shutdown()
+        for recorder in self.recorders.values():
+            recorder.close()
+        if self.metrics_server:
+            await self.metrics_server.close()
+
+        print("=" * 70)
+        print(f"👥 多账户汇总: 行情 {self.tick_count} 条 | 无空闲账户 {self.no_idle_account} 次")
+        feed = self.feed_monitor.get_stats()
+        print(f"📡 行情单向延迟 p50 {feed['p50']:.1f}ms p99 {feed['p99']:.1f}ms | 时钟偏差 {feed['offset']:+.1f}ms | "
+              f"跳号 {feed['gaps']} 次 (丢 {feed['missed']} 条)")
+        if ORDER_BOOK_ENABLED:
+            for market, book in self.books.items():
+                stats = book.get_stats()
+                print(f"📚 L2 盘口 {market}: {stats['updates']} 次更新 | 跳号 {stats['gaps']} 次 | 重建 {stats['resyncs']} 次")
+        for s in self.scalpers:
+            stats = s.pnl_tracker.get_stats()
+            print(f"   {s.name}: 分发 {self.dispatched[s.name]} 次 | 循环 {s.cycle_count} | "
+                  f"成交量 ${stats['volume']:,.2f} | 盈亏 ${stats['pnl']:+.4f}")
+        print("=" * 70)
+
+
+async def main():
+    accounts = L2_ACCOUNTS or ([(L2_ADDRESS, L2_PRIVATE_KEY)] if L2_ADDRESS and L2_PRIVATE_KEY else [])
+    if not accounts:
+        print("❌ 未配置 L2_ACCOUNTS 或 L2 密钥!")
+        return
+    await AccountSupervisor(accounts).start()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n⏹️ 已中断")
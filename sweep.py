@@ -0,0 +1,138 @@
+"""
+参数扫描 (多进程 + 共享内存)
+
+把录制的 BBO 数据放进一块 SharedMemory，所有工作进程零拷贝映射同一份数组,
+用 ProcessPoolExecutor 在全部 CPU 核上并行评估参数组合:
+价差阈值 × 深度下限 × 平仓等待 × 方向规则 × 每单大小 × speed bump 延迟。
+
+任务按 (价差, 深度) 切分，入场掩码每个任务只算一次，
+其余参数在同一掩码上复用 backtest.simulate。结果按磨损排序写入 CSV。
+方向模型 (signals.MODELS，如 signal) 的逐 tick 决策在主进程算一次，作为额外的列放进共享内存。
+
+用法:
+    python sweep.py bbo_ticks.bin --spreads 0.0002,0.0004,0.0006,0.0008 \\
+        --depths 0.001,0.003,0.006,0.01 --close-delays 0,0.1,0.2 \\
+        --rules size,inverse,signal --sizes 0.001,0.003 --out sweep_results.csv
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from backtest import load_ticks, simulate, format_results, parse_floats, DIRECTION_RULES
+from signals import MODELS, model_signs
+
+COLUMNS = ("ts", "bid", "ask", "bid_size", "ask_size", "mid", "spread", "depth")
+
+# 工作进程内的共享数组视图
+_shm: Optional[shared_memory.SharedMemory] = None
+_ticks: Dict[str, np.ndarray] = {}
+
+
+def share_ticks(ticks: Dict[str, np.ndarray], columns: tuple = COLUMNS) -> shared_memory.SharedMemory:
+    """把 tick 列拷贝进共享内存 (只在主进程拷贝一次)"""
+    n = len(ticks["ts"])
+    shm = shared_memory.SharedMemory(create=True, size=max(n * len(columns) * 8, 1))
+    table = np.ndarray((len(columns), n), dtype=np.float64, buffer=shm.buf)
+    for i, col in enumerate(columns):
+        table[i] = ticks[col]
+    return shm
+
+
+def _init_worker(shm_name: str, n: int, columns: tuple = COLUMNS):
+    global _shm, _ticks
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    table = np.ndarray((len(columns), n), dtype=np.float64, buffer=_shm.buf)
+    _ticks = {col: table[i] for i, col in enumerate(columns)}
+
+
+def _run_task(max_spread: float, min_depth: float, rules: List[str], delays: List[float],
+              close_delays: List[float], sizes: List[float]) -> List[Dict[str, Any]]:
+    mask = (_ticks["spread"] <= max_spread) & (_ticks["depth"] >= min_depth)
+    results = []
+    for rule, delay, close_delay, size in itertools.product(rules, delays, close_delays, sizes):
+        results.append(simulate(_ticks, max_spread, min_depth, rule, delay, close_delay, size, mask=mask,
+                                directions=_ticks.get(f"direction_{rule}")))
+    return results
+
+
+def run_sweep(ticks: Dict[str, np.ndarray], spreads: List[float], depths: List[float],
+              rules: List[str], delays: List[float], close_delays: List[float],
+              sizes: List[float], workers: Optional[int] = None,
+              signal_params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """并行扫描全部组合，按磨损升序返回"""
+    n = len(ticks["ts"])
+    columns = COLUMNS
+    for rule in rules:
+        if rule not in DIRECTION_RULES:
+            ticks = dict(ticks, **{f"direction_{rule}": model_signs(ticks, rule, signal_params)})
+            columns += (f"direction_{rule}",)
+    shm = share_ticks(ticks, columns)
+    try:
+        results: List[Dict[str, Any]] = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name, n, columns)) as pool:
+            futures = [
+                pool.submit(_run_task, s, d, rules, delays, close_delays, sizes)
+                for s, d in itertools.product(spreads, depths)
+            ]
+            for future in as_completed(futures):
+                results.extend(future.result())
+    finally:
+        shm.close()
+        shm.unlink()
+    results.sort(key=lambda r: (r["cycles"] == 0, r["per_10k"]))
+    return results
+
+
+def write_csv(results: List[Dict[str, Any]], path: str):
+    fields = ["rank"] + list(results[0].keys()) if results else ["rank"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for rank, r in enumerate(results, 1):
+            writer.writerow({"rank": rank, **r})
+
+
+def main():
+    from config import MAX_SPREAD_PERCENT, ORDER_SIZE_BTC, CLOSE_LEG_DELAY_SEC, SIGNAL_PARAMS
+
+    parser = argparse.ArgumentParser(description="多进程参数扫描")
+    parser.add_argument("path", help="tick_recorder 录制文件")
+    parser.add_argument("--spreads", default=str(MAX_SPREAD_PERCENT), help="价差阈值列表 (%%)")
+    parser.add_argument("--depths", default="0.006", help="最小深度列表 (BTC)")
+    parser.add_argument("--rules", default=",".join(DIRECTION_RULES),
+                        help=f"方向规则列表 (也可用方向模型: {','.join(MODELS)})")
+    parser.add_argument("--delays", default="0.5", help="每单成交延迟列表 (秒)")
+    parser.add_argument("--close-delays", default=str(CLOSE_LEG_DELAY_SEC), help="平仓等待列表 (秒)")
+    parser.add_argument("--sizes", default=str(ORDER_SIZE_BTC), help="每单大小列表")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认全部 CPU")
+    parser.add_argument("--out", default="sweep_results.csv", help="结果 CSV")
+    parser.add_argument("--top", type=int, default=20, help="显示前 N 行")
+    args = parser.parse_args()
+
+    ticks = load_ticks(args.path)
+    spreads, depths = parse_floats(args.spreads), parse_floats(args.depths)
+    rules = [r for r in args.rules.split(",") if r]
+    delays, close_delays, sizes = parse_floats(args.delays), parse_floats(args.close_delays), parse_floats(args.sizes)
+    total = len(spreads) * len(depths) * len(rules) * len(delays) * len(close_delays) * len(sizes)
+    print(f"📼 {len(ticks['ts'])} 条 tick | {total} 组参数 | {args.workers or os.cpu_count()} 进程")
+
+    start = time.perf_counter()
+    results = run_sweep(ticks, spreads, depths, rules, delays, close_delays, sizes, args.workers, SIGNAL_PARAMS)
+    elapsed = time.perf_counter() - start
+
+    write_csv(results, args.out)
+    print(format_results(results, args.top))
+    print(f"⏱️ 用时 {elapsed:.1f}s → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""成交账本滚动窗口测试 (python -m pytest test_fill_ledger.py)"""
+
+from fill_ledger import FillLedger
+
+
+def fill(order_id: str, side: str, price: float, size: float = 1.0, fee: float = 0.0) -> dict:
+    return {"order_id": order_id, "side": side, "price": str(price), "size": str(size), "fee": str(fee)}
+
+
+def close_cycle(ledger: FillLedger, buy: float, sell: float) -> int:
+    """开一个循环并用一买一卖平掉，返回循环 ID"""
+    cycle_id = ledger.open_cycle("LONG", (buy + sell) / 2, 1.0)
+    ledger.register_order(f"{cycle_id}-open", cycle_id, "open")
+    ledger.register_order(f"{cycle_id}-close", cycle_id, "close")
+    ledger.on_fill(fill(f"{cycle_id}-open", "BUY", buy))
+    ledger.on_fill(fill(f"{cycle_id}-close", "SELL", sell))
+    return cycle_id
+
+
+def test_late_fill_in_window_updates_window():
+    ledger = FillLedger(window=2)
+    close_cycle(ledger, 100, 99)
+    second = close_cycle(ledger, 100, 99)
+    ledger.on_fill(fill(f"{second}-close", "SELL", 99, size=0.0, fee=5.0))
+    assert ledger.window_pnl == -7.0
+    assert ledger.total_pnl == -7.0
+
+
+def test_late_fill_on_evicted_cycle_skips_window():
+    ledger = FillLedger(window=2)
+    first = close_cycle(ledger, 100, 99)
+    close_cycle(ledger, 100, 99)
+    close_cycle(ledger, 100, 99)   # 第一个循环移出窗口
+    ledger.on_fill(fill(f"{first}-close", "SELL", 99, size=0.0, fee=5.0))
+    assert ledger.window_pnl == -2.0
+    assert ledger.total_pnl == -8.0
+    assert len(ledger.window) == 2
@@ -0,0 +1,90 @@
+"""本地 L2 盘口测试 (python -m pytest test_order_book.py)"""
+
+import pytest
+
+from order_book import OrderBook
+
+
+def level(side: str, price: float, size: float) -> dict:
+    return {"side": side, "price": str(price), "size": str(size)}
+
+
+def snapshot(seq: int) -> dict:
+    """order_book 频道快照: 卖盘 100×1 / 101×2 / 102×3，买盘 99×1 / 98×2"""
+    return {
+        "update_type": "s", "seq_no": seq,
+        "inserts": [level("SELL", 100, 1), level("SELL", 101, 2), level("SELL", 102, 3),
+                    level("BUY", 99, 1), level("BUY", 98, 2)],
+    }
+
+
+def delta(seq: int, inserts=(), updates=(), deletes=()) -> dict:
+    return {"update_type": "d", "seq_no": seq, "inserts": list(inserts),
+            "updates": list(updates), "deletes": list(deletes)}
+
+
+def rest_snapshot(seq: int, asks, bids) -> dict:
+    """GET /orderbook/<市场> 格式"""
+    return {"seq_no": seq, "asks": [[str(p), str(s)] for p, s in asks],
+            "bids": [[str(p), str(s)] for p, s in bids]}
+
+
+def test_fill_walks_several_levels():
+    book = OrderBook("BTC-USD-PERP")
+    assert book.apply(snapshot(1), 0.0)
+    # 吃满 100 一档，101 档成交 1.5
+    assert book.fill_price("BUY", 2.5) == pytest.approx((100 * 1 + 101 * 1.5) / 2.5)
+    assert book.sweep_price("BUY", 2.5) == 101
+    assert book.fill_price("SELL", 2) == pytest.approx((99 + 98) / 2)
+    assert book.sweep_price("SELL", 2) == 98
+
+    # 中间档位变化后前缀和从改动处重算
+    assert book.apply(delta(2, updates=[level("SELL", 101, 0.5)]), 0.0)
+    assert book.fill_price("BUY", 2.5) == pytest.approx((100 + 101 * 0.5 + 102 * 1) / 2.5)
+    assert book.sweep_price("BUY", 2.5) == 102
+
+
+def test_fill_size_equal_to_total_depth():
+    book = OrderBook("BTC-USD-PERP")
+    book.apply(snapshot(1), 0.0)
+    assert book.fill_price("BUY", 6) == pytest.approx((100 * 1 + 101 * 2 + 102 * 3) / 6)
+    assert book.sweep_price("BUY", 6) == 102
+    assert book.fill_price("SELL", 3) == pytest.approx((99 + 98 * 2) / 3)
+    assert book.fill_price("BUY", 6.001) is None
+    assert book.sweep_price("SELL", 3.001) is None
+
+
+def test_seq_gap_invalidates_until_resync():
+    book = OrderBook("BTC-USD-PERP")
+    book.apply(snapshot(10), 0.0)
+    assert book.apply(delta(11, inserts=[level("SELL", 103, 1)]), 0.0)
+    # 丢了 12
+    assert not book.apply(delta(13, updates=[level("SELL", 100, 4)]), 0.0)
+    assert not book.valid
+    assert book.gaps == 1
+    assert not book.apply(delta(14, deletes=[level("BUY", 98, 0)]), 0.0)
+
+    asks = [(100, 1), (101, 2), (102, 3), (103, 1)]
+    assert book.load_snapshot(rest_snapshot(12, asks, [(99, 1), (98, 2)]), 1.0)
+    assert book.valid
+    assert book.seq_no == 14
+    assert book.resyncs == 1
+    assert book.asks.best() == (100, 4)
+    assert book.bids.total() == 1
+
+
+def test_replay_skips_deltas_covered_by_snapshot():
+    book = OrderBook("BTC-USD-PERP")
+    book.apply(snapshot(10), 0.0)
+    book.apply(delta(12, inserts=[level("SELL", 104, 9)]), 0.0)   # 跳号，开始缓存
+    book.apply(delta(13, updates=[level("SELL", 100, 7)]), 0.0)
+    book.apply(delta(14, inserts=[level("BUY", 99.5, 1)]), 0.0)
+    assert not book.valid
+
+    # 快照 seq 13 已覆盖 12、13，只补 14; 快照里 100 档为 5，若误重放 13 会变成 7
+    asks = [(100, 5), (101, 2), (102, 3), (104, 9)]
+    assert book.load_snapshot(rest_snapshot(13, asks, [(99, 1), (98, 2)]), 1.0)
+    assert book.seq_no == 14
+    assert book.asks.best() == (100, 5)
+    assert book.asks.total() == 19
+    assert book.bids.best() == (99.5, 1)
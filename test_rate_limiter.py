@@ -0,0 +1,75 @@
+"""分桶限速器测试 (python -m pytest test_rate_limiter.py)"""
+
+import random
+from collections import deque
+
+import pytest
+
+from rate_limiter import RateLimiter
+
+WINDOWS = (60.0, 3600.0, 86400.0)
+
+
+def exact_counts(stamps: deque, now: float) -> list[int]:
+    """精确滑动窗口: 各级窗口内 (now - 窗口, now] 的下单数"""
+    return [sum(1 for ts in stamps if ts > now - window) for window in WINDOWS]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("orders_per_check", [1, 2])
+def test_never_admits_more_than_limits(seed: int, orders_per_check: int):
+    limits = (5, 40, 120)
+    limiter = RateLimiter(*limits)
+    rng = random.Random(seed)
+    stamps: deque = deque()
+    now = 1_700_000_000.0
+    admitted = 0
+    for _ in range(6000):
+        now += rng.expovariate(1 / 40)
+        while stamps and stamps[0] <= now - WINDOWS[-1]:
+            stamps.popleft()
+        can_trade, wait, _ = limiter.can_place_order(now, n=orders_per_check)
+        if not can_trade:
+            assert wait > 0
+            continue
+        limiter.record_order(now, orders_per_check)
+        stamps.extend([now] * orders_per_check)
+        admitted += orders_per_check
+        for count, limit in zip(exact_counts(stamps, now), limits):
+            assert count <= limit
+    # 偏保守但不能饿死: 约 2.8 天应放行多轮日额度
+    assert admitted >= 2 * limits[-1]
+
+
+def test_next_slot_waits_for_oldest_bucket():
+    limiter = RateLimiter(3, 100, 1000)
+    first = 1000.25
+    for ts in (first, 1010.5, 1020.75):
+        limiter.record_order(ts)
+    now = 1030.0
+    assert not limiter.can_place_order(now)[0]
+    wait = limiter.next_slot(now)
+    # 最早的一单在 first + 60 才移出精确窗口，不能早于这个时刻
+    assert now + wait >= first + 60
+    # 时间只能前进 (桶不会回滚)，先查前一刻
+    assert not limiter.can_place_order(now + wait - 0.01)[0]
+    assert limiter.can_place_order(now + wait)[0]
+
+
+def test_next_slot_for_two_orders():
+    limiter = RateLimiter(3, 100, 1000)
+    limiter.record_order(1000.0)
+    limiter.record_order(1030.0)
+    assert limiter.can_place_order(1031.0)[0]
+    assert not limiter.can_place_order(1031.0, n=2)[0]
+    wait = limiter.next_slot(1031.0, n=2)
+    assert 1031.0 + wait >= 1000.0 + 60
+    assert limiter.can_place_order(1031.0 + wait, n=2)[0]
+
+
+def test_counts_expire_after_long_idle():
+    limiter = RateLimiter(30, 300, 1000)
+    limiter.record_order(0.0, 10)
+    assert limiter.get_counts(30.0) == (10, 10, 10)
+    assert limiter.get_counts(200_000.0) == (0, 0, 0)
+    assert limiter.next_slot(200_000.0) == 0
@@ -0,0 +1,57 @@
+"""限速与会话状态日志测试 (python -m pytest test_state_journal.py)"""
+
+import json
+import time
+
+from state_journal import StateJournal
+
+DAY = 86400
+
+
+def test_round_trip_expires_and_compacts(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    now = time.time()
+    journal = StateJournal(path, compact_every=4)
+    assert not journal.load(now)
+    journal.set_baseline(1000.0, ts=now - 3600)
+    journal.record_order(now - DAY - 60)          # 已超出 24 小时
+    for ts in (now - 300, now - 200, now - 100):  # 第 4 行触发一次压缩
+        journal.record_order(ts)
+    journal.record_cycle("BTC-USD-PERP", "LONG", 200.0, ts=now - 99)
+    journal.record_cycle("BTC-USD-PERP", "SHORT", 150.0, ts=now - 98)
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"t":"order","ts":')                # 异常退出留下的半行
+
+    restored = StateJournal(path)
+    assert restored.load(now)
+    assert list(restored.orders) == [now - 300, now - 200, now - 100]
+    assert restored.cycles == 2
+    assert (restored.long_count, restored.short_count) == (1, 1)
+    assert restored.volume == 350.0
+    assert restored.baseline == 1000.0
+    assert restored.baseline_ts == now - 3600
+
+    # 启动时压缩成一条 snapshot，损坏行不会留下
+    restored.close()
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["orders"] == [now - 300, now - 200, now - 100]
+
+
+def test_expired_baseline_starts_new_session(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    now = time.time()
+    journal = StateJournal(path)
+    journal.load(now - DAY - 600)
+    journal.set_baseline(1000.0, ts=now - DAY - 600)
+    journal.record_cycle("BTC-USD-PERP", "LONG", 200.0, ts=now - DAY - 500)
+    journal.record_order(now - 10)
+    journal.close()
+
+    restored = StateJournal(path)
+    assert restored.load(now)
+    assert restored.baseline is None
+    assert restored.cycles == 0
+    assert list(restored.orders) == [now - 10]
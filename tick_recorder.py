@@ -0,0 +1,235 @@
+"""
+BBO tick 录制与回放
+
+录制: 每个 BBO tick 写成定长二进制记录 (本地时间戳、买一、卖一、买一量、卖一量),
+      追加到内存映射文件，按块预分配，写入只是一次 struct.pack_into。
+回放: 按原始时间间隔 (或加速) 把记录还原成 BBO 消息，驱动
+      WebSocketScalper.on_bbo_update 等回调，用于确定性回测和复现问题。
+
+文件格式:
+    头部 32 字节: magic(4) | version(u16) | record_size(u16) | count(u64) | 保留(16)
+    记录 40 字节: ts(f64) | bid(f64) | ask(f64) | bid_size(f64) | ask_size(f64)
+
+用法:
+    python tick_recorder.py info bbo_ticks.bin
+    python tick_recorder.py replay bbo_ticks.bin --speed 10
+"""
+
+import argparse
+import asyncio
+import mmap
+import os
+import struct
+import time
+from typing import Optional, Iterator, Callable, Awaitable
+
+MAGIC = b"BBOT"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ16x")
+RECORD = struct.Struct("<ddddd")
+HEADER_SIZE = HEADER.size
+RECORD_SIZE = RECORD.size
+
+
+class TickRecorder:
+    """定长记录追加写入 (内存映射，按块扩容)"""
+
+    def __init__(self, path: str, chunk_records: int = 65536):
+        """
+        Args:
+            path: 录制文件 (已存在则继续追加)
+            chunk_records: 每次扩容的记录数
+        """
+        self.path = path
+        self.chunk_bytes = chunk_records * RECORD_SIZE
+        self.count = 0
+
+        exists = os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE
+        self.file = open(path, "r+b" if exists else "w+b")
+        if exists:
+            magic, version, record_size, count = HEADER.unpack(self.file.read(HEADER_SIZE))
+            if magic != MAGIC or record_size != RECORD_SIZE:
+                self.file.close()
+                raise ValueError(f"不是 BBO 录制文件或格式不兼容: {path}")
+            self.count = count
+        else:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0))
+
+        self.capacity = 0
+        self.mm: Optional[mmap.mmap] = None
+        self._grow()
+
+    def _grow(self):
+        if self.mm is not None:
+            self.mm.flush()
+            self.mm.close()
+        size = HEADER_SIZE + self.count * RECORD_SIZE + self.chunk_bytes
+        self.file.truncate(size)
+        self.mm = mmap.mmap(self.file.fileno(), size)
+        self.capacity = (size - HEADER_SIZE) // RECORD_SIZE
+
+    def append(self, ts: float, bid: float, ask: float, bid_size: float, ask_size: float):
+        if self.count >= self.capacity:
+            self._grow()
+        RECORD.pack_into(self.mm, HEADER_SIZE + self.count * RECORD_SIZE, ts, bid, ask, bid_size, ask_size)
+        self.count += 1
+        # 记录数写回头部，读取方据此确定有效长度
+        struct.pack_into("<Q", self.mm, 8, self.count)
+
+    def flush(self):
+        if self.mm is not None:
+            self.mm.flush()
+
+    def close(self):
+        """关闭并截掉预分配的空白部分"""
+        if self.mm is None:
+            return
+        self.mm.flush()
+        self.mm.close()
+        self.mm = None
+        self.file.truncate(HEADER_SIZE + self.count * RECORD_SIZE)
+        self.file.close()
+
+
+class TickReader:
+    """录制文件读取"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, record_size, count = HEADER.unpack(f.read(HEADER_SIZE))
+        if magic != MAGIC or record_size != RECORD_SIZE:
+            raise ValueError(f"不是 BBO 录制文件或格式不兼容: {path}")
+        # 异常退出时头部计数可能小于实际写入量，以头部为准
+        self.count = min(count, (os.path.getsize(path) - HEADER_SIZE) // RECORD_SIZE)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[tuple[float, float, float, float, float]]:
+        if self.count == 0:
+            return
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                end = HEADER_SIZE + self.count * RECORD_SIZE
+                yield from RECORD.iter_unpack(mm[HEADER_SIZE:end])
+            finally:
+                mm.close()
+
+    def as_numpy(self):
+        """返回结构化 numpy 数组 (字段: ts, bid, ask, bid_size, ask_size)，零拷贝映射"""
+        import numpy as np
+        dtype = np.dtype([("ts", "<f8"), ("bid", "<f8"), ("ask", "<f8"),
+                          ("bid_size", "<f8"), ("ask_size", "<f8")])
+        if self.count == 0:
+            # 空文件无法映射 (np.memmap 不接受长度为 0 的映射)
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(self.count,))
+
+
+def tick_to_message(market: str, bid: float, ask: float, bid_size: float, ask_size: float) -> dict:
+    """还原成 BBO 频道消息格式"""
+    return {
+        "params": {
+            "channel": f"bbo.{market}",
+            "data": {
+                "market": market,
+                "bid": str(bid), "ask": str(ask),
+                "bid_size": str(bid_size), "ask_size": str(ask_size),
+            },
+        }
+    }
+
+
+class TickReplayer:
+    """按录制时间间隔回放 BBO tick"""
+
+    def __init__(self, path: str, callback: Callable[..., Awaitable], market: str = "BTC-USD-PERP",
+                 speed: float = 1.0):
+        """
+        Args:
+            path: 录制文件
+            callback: BBO 回调 (channel, message)，如 WebSocketScalper.on_bbo_update
+            market: 消息中的市场名
+            speed: 回放倍速，0 表示不等待 (尽快回放)
+        """
+        self.reader = TickReader(path)
+        self.callback = callback
+        self.market = market
+        self.speed = speed
+        self.replayed = 0
+
+    async def run(self):
+        channel = f"bbo.{self.market}"
+        first_ts = None
+        start = time.perf_counter()
+        for ts, bid, ask, bid_size, ask_size in self.reader:
+            if first_ts is None:
+                first_ts = ts
+            if self.speed > 0:
+                delay = (ts - first_ts) / self.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                # 让出事件循环，等待触发的任务有机会运行
+                await asyncio.sleep(0)
+            await self.callback(channel, tick_to_message(self.market, bid, ask, bid_size, ask_size))
+            self.replayed += 1
+
+
+def print_info(path: str, max_spread_pct: float):
+    reader = TickReader(path)
+    if not len(reader):
+        print(f"📼 {path}: 空文件")
+        return
+    first = last = None
+    tight = 0
+    for ts, bid, ask, _, _ in reader:
+        if first is None:
+            first = ts
+        last = ts
+        if bid > 0 and ask > 0 and (ask - bid) / ((ask + bid) / 2) * 100 <= max_spread_pct:
+            tight += 1
+    duration = last - first
+    print(f"📼 {path}: {len(reader)} 条 | 时长 {duration / 60:.1f} 分钟 | {len(reader) / max(duration, 1e-9):.1f} tick/s")
+    print(f"   价差 ≤ {max_spread_pct}%: {tight} 条 ({tight / len(reader) * 100:.2f}%)")
+
+
+async def replay_into_scalper(path: str, speed: float):
+    """把录制数据回放进 WebSocketScalper 的 BBO 回调，统计触发次数 (不下单)"""
+    from scalper import WebSocketScalper, MARKET
+
+    scalper = WebSocketScalper()
+    engine = scalper.trigger_engine
+    replayer = TickReplayer(path, scalper.on_bbo_update, MARKET, speed)
+    replay_task = asyncio.create_task(replayer.run())
+
+    while not replay_task.done() or engine.event.is_set():
+        if await engine.wait(timeout=0.1) is not None:
+            engine.rearm()
+    await replay_task
+
+    stats = engine.get_stats()
+    print(f"▶️ 回放 {replayer.replayed} 条 | 触发 {stats['count']} 次 | 限速拒绝 {engine.rejected_rate_limit} 次")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BBO tick 录制文件工具")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_info = sub.add_parser("info", help="文件统计")
+    p_info.add_argument("path")
+    p_replay = sub.add_parser("replay", help="回放进 WebSocketScalper 回调")
+    p_replay.add_argument("path")
+    p_replay.add_argument("--speed", type=float, default=1.0, help="回放倍速，0 为不等待")
+    args = parser.parse_args()
+
+    if args.cmd == "info":
+        from config import MAX_SPREAD_PERCENT
+        print_info(args.path, MAX_SPREAD_PERCENT)
+    else:
+        asyncio.run(replay_into_scalper(args.path, args.speed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+事件驱动触发引擎
+
+在 BBO 回调中内联判断入场条件 (价差、深度、数据新鲜度、限速余量),
+满足时通过 asyncio.Event 唤醒循环执行器, 不再每 50ms 轮询 current_bbo。
+同时记录 tick 到达 → 执行器被唤醒的延迟。
+
+多市场时每个市场有独立的价差/深度阈值 (set_market)，共用一个 Event 和限速额度:
+谁先满足条件谁触发，循环结束重新布防时在各市场当前盘口中挑最优的一个。
+
+开启 pacing 时，下单速度超过日额度的均匀节奏 r 倍，价差阈值按 1/r 收紧,
+额度留给价差更好的时段，而不是先用完分钟额度再空等。
+
+盘口新鲜度按交易所时间戳计算 (feed_monitor.feed_age_ms)，超过 max_feed_age_ms 的
+tick 不触发、唤醒时已过期的快照也丢弃，而不是按本地收到时刻 1 秒的经验值。
+
+市场挂有已同步的 L2 盘口 (set_book) 时，深度条件改为: 每单大小能被盘口完全吃下，
+且按深度加权的开平往返成本 ≤ 价差阈值 (吃穿一档的成本计入); 盘口未同步时退回买一/卖一判断。
+
+市场挂有方向模型 (set_signal) 时，触发时刻由模型决定方向 (pending_sign)，模型给出 0 则不触发。
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Optional, Dict
+
+from book_top import BookTop
+from feed_monitor import feed_age_ms
+from order_book import OrderBook
+from signals import DirectionModel
+
+# 每个循环至少下开、平两单，触发时两单的额度都要有
+ORDERS_PER_CYCLE = 2
+
+
+class TriggerEngine:
+    """入场触发器 (BBO 回调内联判断 + asyncio.Event 通知)"""
+
+    def __init__(self, rate_limiter, max_spread_pct: float, min_depth: float,
+                 max_feed_age_ms: float = 500.0, max_records: int = 100, pacing: bool = False):
+        self.rate_limiter = rate_limiter
+        self.pacing = pacing
+        self.max_spread_pct = max_spread_pct
+        self.min_depth = min_depth
+        self.max_feed_age_ms = max_feed_age_ms
+        self.thresholds: Dict[str, tuple[float, float]] = {}  # 市场 → (价差阈值, 最小深度)
+        self.sizes: Dict[str, float] = {}       # 市场 → 每单大小 (按 L2 盘口计算成本用)
+        self.books: Dict[str, OrderBook] = {}
+        self.signals: Dict[str, DirectionModel] = {}
+
+        self.event = asyncio.Event()
+        self.armed = True
+        self.paused = False         # 控制命令暂停时不触发
+        self.pending: Optional[BookTop] = None
+        self.pending_tick_ts = 0.0  # perf_counter 时间戳
+        self.pending_sign = 0       # 触发时的方向: +1 做多 / -1 做空
+
+        self.trigger_latencies = deque(maxlen=max_records)
+        self.trigger_count = 0
+        self.rejected_rate_limit = 0
+        self.rejected_pacing = 0
+        self.rejected_stale = 0
+        self.rejected_depth = 0     # 买一/卖一价差满足但按 L2 深度加权成本不满足
+        self.rejected_signal = 0    # 方向模型判断不值得交易
+
+    def set_market(self, market: str, max_spread_pct: float, min_depth: float, size: float = 0.0):
+        """设置单个市场的入场阈值 (未设置的市场用构造时的默认值)"""
+        self.thresholds[market] = (max_spread_pct, min_depth)
+        if size > 0:
+            self.sizes[market] = size
+
+    def set_book(self, market: str, book: OrderBook):
+        """挂上市场的 L2 盘口，同步后按深度加权成本判断"""
+        self.books[market] = book
+
+    def set_signal(self, market: str, model: DirectionModel):
+        """挂上市场的方向模型 (未设置时按买一/卖一数量定方向)"""
+        self.signals[market] = model
+
+    def _limits(self, bbo: BookTop) -> tuple[float, float]:
+        return self.thresholds.get(bbo.market, (self.max_spread_pct, self.min_depth))
+
+    def check(self, bbo: BookTop) -> bool:
+        """入场条件: 价差 ≤ 阈值 且深度足够 (有 L2 盘口时按每单的深度加权成本)"""
+        max_spread_pct, min_depth = self._limits(bbo)
+        if bbo.spread > max_spread_pct:
+            return False
+        book = self.books.get(bbo.market)
+        size = self.sizes.get(bbo.market)
+        if book is not None and book.valid and size:
+            cost = book.round_trip_pct(size)
+            if cost is None or cost > max_spread_pct:
+                self.rejected_depth += 1
+                return False
+            return True
+        if bbo.bid_size < min_depth or bbo.ask_size < min_depth:
+            return False
+        return True
+
+    def on_tick(self, bbo: BookTop, tick_ts: Optional[float] = None) -> bool:
+        """BBO 回调中调用，满足条件时唤醒执行器，返回是否触发"""
+        if not self.armed or self.paused or not self.check(bbo):
+            return False
+        if feed_age_ms(bbo) > self.max_feed_age_ms:
+            # 行情推送本身已滞后，盘口不可信
+            self.rejected_stale += 1
+            return False
+        if self.pacing and bbo.spread > self._limits(bbo)[0] * self.rate_limiter.pace_factor():
+            self.rejected_pacing += 1
+            return False
+        signal = self.signals.get(bbo.market)
+        if signal is not None:
+            sign = signal.decide(bbo.last_update)
+            if sign == 0:
+                self.rejected_signal += 1
+                return False
+        else:
+            sign = 1 if bbo.bid_size >= bbo.ask_size else -1
+        can_trade, _, _ = self.rate_limiter.can_place_order(n=ORDERS_PER_CYCLE)
+        if not can_trade:
+            self.rejected_rate_limit += 1
+            return False
+        self.pending_sign = sign
+        # 盘口对象会被后续 tick 原地更新，交给执行器的是触发时刻的副本
+        self.pending = bbo.copy()
+        self.pending_tick_ts = tick_ts if tick_ts is not None else time.perf_counter()
+        self.armed = False
+        self.event.set()
+        return True
+
+    async def wait(self, timeout: float) -> Optional[BookTop]:
+        """等待触发，超时返回 None
+
+        Returns:
+            触发时的 BBO 快照; 超时或快照已过期返回 None
+        """
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        self.event.clear()
+        bbo = self.pending
+        self.pending = None
+        if bbo is None:
+            return None
+
+        latency_ms = (time.perf_counter() - self.pending_tick_ts) * 1000
+        if feed_age_ms(bbo) > self.max_feed_age_ms:
+            # 执行器被长时间占用，快照已过期
+            self.rearm()
+            return None
+
+        self.trigger_latencies.append(latency_ms)
+        self.trigger_count += 1
+        return bbo
+
+    def rearm(self, *bbos: BookTop):
+        """循环结束后重新布防; 传入各市场当前盘口则立即再判断一次
+
+        多个市场同时满足条件时，选价差相对阈值最小的一个。
+        """
+        self.armed = True
+        now = time.time()
+        fresh = [
+            bbo for bbo in bbos
+            if bbo is not None and feed_age_ms(bbo, now) <= self.max_feed_age_ms and self.check(bbo)
+        ]
+        if fresh:
+            self.on_tick(min(fresh, key=lambda bbo: bbo.spread / (self._limits(bbo)[0] or 1e-12)))
+
+    def get_stats(self) -> dict:
+        if not self.trigger_latencies:
+            return {"count": self.trigger_count, "avg": 0, "max": 0, "last": 0}
+        latencies = list(self.trigger_latencies)
+        return {
+            "count": self.trigger_count,
+            "avg": sum(latencies) / len(latencies),
+            "max": max(latencies),
+            "last": latencies[-1],
+        }